@@ -194,6 +194,7 @@ class AssetManager {
                 name: `Image from Slide ${image.slideNumber}`,
                 filename: image.filename,
                 url: image.url,
+                fullUrl: image.fullUrl || image.url,
                 slideNumber: image.slideNumber,
                 category: 'images',
                 preview: 'image'
@@ -293,6 +294,7 @@ class AssetManager {
                         slideNumber: slide.slide_number,
                         category: 'slides',
                         preview: 'slide',
+                        url: slide.preview ? slide.preview.url : undefined,
                         description: `Complete slide with ${totalTextItems} text items, ${totalImages} images`,
                         metadata: {
                             textItems: totalTextItems,
@@ -359,6 +361,9 @@ class AssetManager {
         // Create different previews based on content type
         if (asset.type === 'image') {
             preview.innerHTML = `<img src="${asset.url}" class="asset-image" alt="${asset.name}">`;
+        } else if (asset.type === 'slide-summary' && asset.url) {
+            // Rendered slide preview, once the server has produced it
+            preview.innerHTML = `<img src="${asset.url}" class="asset-image" alt="${asset.name}">`;
         } else if (asset.type === 'slide-summary') {
             preview.className += ' slide-summary-preview';
             preview.innerHTML = `
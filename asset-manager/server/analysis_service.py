@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""Asynchronous analysis service.
+
+Accepts analysis jobs over HTTP, runs them on a bounded pool of
+ppt_worker.py processes and streams each job's progress, so a large deck
+no longer holds one request open for its whole analysis.
+
+    POST   /jobs              {"file_path", "output_dir", "image_dir", ...} -> 202 {"job_id", ...}
+                              (503 with Retry-After when the queue is full)
+    GET    /jobs/<id>         job status, and the result once done
+    GET    /jobs/<id>/events  Server-Sent Events, or NDJSON with ?format=ndjson
+    DELETE /jobs/<id>         cancel a queued or running job
+    GET    /health            workers and queue depth
+
+Events: queued, started, slide ({"slide_number", "total", "slide"}),
+done ({"result"}), error ({"error"}) and cancelled. Every stream replays
+the job's events from the start (or after Last-Event-ID), so clients can
+connect late or reconnect.
+"""
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+
+HOST = os.environ.get('ANALYSIS_SERVICE_HOST', '127.0.0.1')
+PORT = int(os.environ.get('ANALYSIS_SERVICE_PORT', '5051'))
+
+# Jobs analysed at once (one worker process each, separate from the server's
+# ANALYSIS_WORKERS pool for /api/upload) and jobs allowed to wait
+WORKERS = int(os.environ.get('ANALYSIS_SERVICE_WORKERS', '2'))
+MAX_QUEUED = int(os.environ.get('ANALYSIS_MAX_QUEUED', '16'))
+
+JOB_TIMEOUT = float(os.environ.get('ANALYSIS_JOB_TIMEOUT', '600'))
+# Finished jobs (and their results) are kept this long for late readers
+JOB_TTL = float(os.environ.get('ANALYSIS_JOB_TTL', '900'))
+
+WORKER_SCRIPT = str(Path(__file__).parent / 'ppt_worker.py')
+# Worker responses carry whole analyses on one line
+WORKER_LINE_LIMIT = 256 * 1024 * 1024
+MAX_REQUEST_BODY = 1024 * 1024
+KEEPALIVE_INTERVAL = 15.0
+
+FINISHED = ('done', 'error', 'cancelled')
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    """One analysis request and the events it has produced so far."""
+
+    def __init__(self, params):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.status = 'queued'
+        self.created = time.time()
+        self.events = []
+        self.result = None
+        self.runner = None
+        self._updated = asyncio.Event()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED
+
+    def publish(self, event, data=None):
+        """Append an event and wake every stream waiting on this job."""
+        self.events.append((event, data or {}))
+        if event in ('started', *FINISHED):
+            self.status = 'running' if event == 'started' else event
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    async def wait(self, seen, timeout):
+        """Wait until there are more than ``seen`` events; False on timeout."""
+        updated = self._updated
+        if len(self.events) > seen or self.finished:
+            return True
+        try:
+            await asyncio.wait_for(updated.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def describe(self):
+        slides = [data for event, data in self.events if event == 'slide']
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'created': self.created,
+            'slides_done': len(slides),
+            'total_slides': slides[-1]['total'] if slides else None,
+            'result': self.result
+        }
+
+
+class WorkerProcess:
+    """A ppt_worker.py subprocess handling one request at a time."""
+
+    def __init__(self):
+        self.proc = None
+        self.next_id = 1
+
+    async def start(self):
+        self.proc = await asyncio.create_subprocess_exec(
+            sys.executable, WORKER_SCRIPT,
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+            cwd=str(Path(WORKER_SCRIPT).parent), limit=WORKER_LINE_LIMIT)
+        return self
+
+    @property
+    def alive(self):
+        return self.proc is not None and self.proc.returncode is None
+
+    async def request(self, method, params, on_progress=None):
+        """Send one request and return its result, passing progress messages to ``on_progress``."""
+        request_id = self.next_id
+        self.next_id += 1
+        self.proc.stdin.write((json.dumps({'id': request_id, 'method': method, 'params': params}) + '\n').encode())
+        await self.proc.stdin.drain()
+
+        while True:
+            line = await self.proc.stdout.readline()
+            if not line:
+                raise RuntimeError(f"Analysis worker exited (code {await self.proc.wait()})")
+            message = json.loads(line)
+            if message.get('id') != request_id:
+                continue
+            if 'progress' in message:
+                if on_progress:
+                    on_progress(message['progress'])
+                continue
+            if 'error' in message:
+                raise RuntimeError(message['error'])
+            return message['result']
+
+    def kill(self):
+        if self.alive:
+            self.proc.kill()
+
+
+class AnalysisService:
+    """Bounded job queue in front of a fixed number of worker processes.
+
+    ``submit`` refuses jobs once ``max_queued`` are waiting, so a burst of
+    uploads is pushed back to the caller instead of piling up on the host.
+    Each worker slot takes the next job, streams its slides into the job's
+    events and is killed and replaced if the job is cancelled or times out.
+    """
+
+    def __init__(self, workers=WORKERS, max_queued=MAX_QUEUED, job_timeout=JOB_TIMEOUT, job_ttl=JOB_TTL):
+        self.workers = workers
+        self.job_timeout = job_timeout
+        self.job_ttl = job_ttl
+        self.queue = asyncio.Queue(maxsize=max_queued)
+        self.jobs = {}
+        self.slots = []
+        self.processes = [None] * workers
+
+    def start(self):
+        self.slots = [asyncio.create_task(self._run_slot(index)) for index in range(self.workers)]
+
+    async def stop(self):
+        for slot in self.slots:
+            slot.cancel()
+        for process in self.processes:
+            if process:
+                process.kill()
+        await asyncio.gather(*self.slots, return_exceptions=True)
+
+    def submit(self, params):
+        job = Job(params)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFull(f"{self.queue.qsize()} jobs already queued")
+        self.jobs[job.id] = job
+        job.publish('queued', {'position': self.queue.qsize()})
+        return job
+
+    def cancel(self, job):
+        """Cancel a job; a running job's worker is killed. Returns False if it had already finished."""
+        if job.finished:
+            return False
+        if job.runner:
+            job.runner.cancel()
+        else:
+            # Still queued; its slot will skip it
+            job.publish('cancelled')
+            self._expire(job)
+        return True
+
+    def stats(self):
+        return {
+            'workers': [{'pid': process.proc.pid if process and process.alive else None}
+                        for process in self.processes],
+            'queued': sum(1 for job in self.jobs.values() if job.status == 'queued'),
+            'running': sum(1 for job in self.jobs.values() if job.status == 'running'),
+            'max_queued': self.queue.maxsize
+        }
+
+    def _expire(self, job):
+        asyncio.get_running_loop().call_later(self.job_ttl, self.jobs.pop, job.id, None)
+
+    async def _run_slot(self, index):
+        while True:
+            job = await self.queue.get()
+            if job.finished:
+                continue
+
+            process = self.processes[index]
+            if not process or not process.alive:
+                # Fail this job rather than the slot, which retries with the next job
+                try:
+                    process = self.processes[index] = await WorkerProcess().start()
+                except Exception as e:
+                    self.processes[index] = None
+                    job.publish('error', {'error': f"Could not start an analysis worker: {e}"})
+                    self._expire(job)
+                    continue
+
+            job.publish('started')
+            params = {**job.params, 'progress': True}
+            job.runner = asyncio.ensure_future(asyncio.wait_for(
+                process.request('analyze', params, lambda progress: job.publish('slide', progress)),
+                self.job_timeout))
+            await asyncio.wait([job.runner])
+
+            if job.runner.cancelled():
+                # The worker is mid-analysis; replace it rather than wait
+                process.kill()
+                job.publish('cancelled')
+            elif job.runner.exception():
+                error = job.runner.exception()
+                if isinstance(error, asyncio.TimeoutError):
+                    process.kill()
+                    error = f"Analysis timed out after {self.job_timeout:.0f}s"
+                job.publish('error', {'error': str(error)})
+            else:
+                job.result = job.runner.result()
+                if job.result.get('success'):
+                    job.publish('done', {'result': job.result})
+                else:
+                    job.publish('error', {'error': job.result.get('error')})
+            job.runner = None
+            self._expire(job)
+
+
+# HTTP
+
+STATUS_TEXT = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               409: 'Conflict', 413: 'Payload Too Large', 503: 'Service Unavailable'}
+
+
+async def read_request(reader):
+    """Parse one HTTP/1.1 request; returns (method, path, query, headers, body)."""
+    request_line = (await reader.readline()).decode('latin-1').strip()
+    if not request_line:
+        return None
+    method, target, _ = request_line.split(' ', 2)
+
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode('latin-1').strip()
+        if not line:
+            break
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get('content-length') or 0)
+    if length > MAX_REQUEST_BODY:
+        raise ValueError('Request body too large')
+    body = await reader.readexactly(length) if length else b''
+
+    url = urlsplit(target)
+    query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+    return method.upper(), url.path.rstrip('/') or '/', query, headers, body
+
+
+def write_head(writer, status, headers):
+    lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}", 'Connection: close']
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+
+
+async def send_json(writer, status, data, headers=None):
+    body = json.dumps(data).encode()
+    write_head(writer, status, {'Content-Type': 'application/json', 'Content-Length': len(body), **(headers or {})})
+    writer.write(body)
+    await writer.drain()
+
+
+async def stream_events(writer, job, ndjson, last_event_id):
+    """Write the job's events as they arrive until it finishes or the client goes away.
+
+    Writes wait on ``drain``, so a slow reader only falls behind the job's
+    event history; it never holds up the worker.
+    """
+    content_type = 'application/x-ndjson' if ndjson else 'text/event-stream'
+    write_head(writer, 200, {'Content-Type': content_type, 'Cache-Control': 'no-cache'})
+
+    index = last_event_id + 1 if last_event_id is not None else 0
+    while True:
+        while index < len(job.events):
+            event, data = job.events[index]
+            if ndjson:
+                writer.write((json.dumps({'id': index, 'event': event, **data}) + '\n').encode())
+            else:
+                writer.write(f"id: {index}\nevent: {event}\ndata: {json.dumps(data)}\n\n".encode())
+            index += 1
+        await writer.drain()
+
+        if job.finished and index >= len(job.events):
+            return
+        if not await job.wait(index, KEEPALIVE_INTERVAL) and not ndjson:
+            writer.write(b': keepalive\n\n')
+
+
+def make_handler(service):
+    async def handle(reader, writer):
+        try:
+            try:
+                request = await read_request(reader)
+            except ValueError as e:
+                await send_json(writer, 413, {'error': str(e)})
+                return
+            if request is None:
+                return
+            method, path, query, headers, body = request
+            parts = path.strip('/').split('/')
+
+            if path == '/health' and method == 'GET':
+                await send_json(writer, 200, {'status': 'ok', **service.stats()})
+
+            elif path == '/jobs' and method == 'POST':
+                try:
+                    params = json.loads(body or b'{}')
+                    missing = [key for key in ('file_path', 'output_dir', 'image_dir') if not params.get(key)]
+                    if missing:
+                        raise ValueError(f"Missing {', '.join(missing)}")
+                    if not os.path.isfile(params['file_path']):
+                        raise ValueError(f"File not found: {params['file_path']}")
+                except ValueError as e:
+                    await send_json(writer, 400, {'error': str(e)})
+                    return
+                try:
+                    job = service.submit(params)
+                except QueueFull as e:
+                    await send_json(writer, 503, {'error': f"Analysis queue is full ({e})"}, {'Retry-After': 5})
+                    return
+                await send_json(writer, 202, job.describe())
+
+            elif len(parts) in (2, 3) and parts[0] == 'jobs':
+                job = service.jobs.get(parts[1])
+                if not job:
+                    await send_json(writer, 404, {'error': 'Job not found'})
+                elif len(parts) == 3 and parts[2] == 'events' and method == 'GET':
+                    last_event_id = headers.get('last-event-id')
+                    await stream_events(writer, job, query.get('format') == 'ndjson',
+                                        int(last_event_id) if last_event_id and last_event_id.isdigit() else None)
+                elif len(parts) == 2 and method == 'GET':
+                    await send_json(writer, 200, job.describe())
+                elif len(parts) == 2 and method == 'DELETE':
+                    if service.cancel(job):
+                        await send_json(writer, 202, {'job_id': job.id, 'status': 'cancelling'})
+                    else:
+                        await send_json(writer, 409, {'error': f"Job already {job.status}"})
+                else:
+                    await send_json(writer, 405, {'error': 'Method not allowed'})
+
+            else:
+                await send_json(writer, 404, {'error': 'Not found'})
+
+        except (ConnectionError, asyncio.IncompleteReadError):
+            # Client went away; the job carries on for other readers
+            pass
+        finally:
+            writer.close()
+
+    return handle
+
+
+async def main():
+    service = AnalysisService()
+    service.start()
+    server = await asyncio.start_server(make_handler(service), HOST, PORT)
+    print(f"Analysis service listening on http://{HOST}:{PORT} "
+          f"({service.workers} workers, {service.queue.maxsize} queued jobs max)", file=sys.stderr)
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+
+    async with server:
+        await stopping.wait()
+    await service.stop()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
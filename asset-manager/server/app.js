@@ -2,20 +2,75 @@ const express = require('express');
 const multer = require('multer');
 const cors = require('cors');
 const path = require('path');
+const http = require('http');
+const { spawn } = require('child_process');
 const fs = require('fs').promises;
-const { exec } = require('child_process');
-const { promisify } = require('util');
-
-const execAsync = promisify(exec);
+const { PythonWorkerPool } = require('./worker-pool');
 
 const app = express();
 const PORT = 3005;
 
+// Content-addressed image store shared by all uploads (see ppt_processor.py)
+const IMAGE_STORE_DIR = process.env.PPT_IMAGE_STORE_DIR || path.join(__dirname, '../image-store');
+
+// The add-in's assets directory (repo-root ppt-addin/web/assets), which ppt_processor.py
+// also reads as the brand reference set; both sides take it from PPT_BRAND_ASSETS_DIR
+const ADDIN_ASSETS_DIR = process.env.PPT_BRAND_ASSETS_DIR || path.join(__dirname, '../../ppt-addin/web/assets');
+const ADDIN_WEB_DIR = path.dirname(ADDIN_ASSETS_DIR);
+
+// Images saved to the asset library, served by the add-in as assets/library/<id>.png.
+// The brand index reads only files directly in the assets directory, so these
+// are never matched as brand images
+const LIBRARY_IMAGES_DIR = path.join(ADDIN_ASSETS_DIR, 'library');
+
+// Rendered slide previews, named by slide content (see src/slide_render.py)
+const SLIDE_PREVIEW_DIR = process.env.PPT_SLIDE_PREVIEW_DIR || path.join(__dirname, '../slide-previews');
+
+// Warm Python analysis workers, reused across uploads
+const analysisPool = new PythonWorkerPool({
+  script: path.join(__dirname, 'ppt_worker.py'),
+  size: parseInt(process.env.ANALYSIS_WORKERS || '2', 10),
+  maxJobsPerWorker: parseInt(process.env.ANALYSIS_MAX_JOBS_PER_WORKER || '50', 10)
+});
+
+// Separate worker for search queries so lookups never wait behind an analysis
+const searchPool = new PythonWorkerPool({
+  script: path.join(__dirname, 'ppt_worker.py'),
+  size: 1,
+  maxJobsPerWorker: 10000,
+  jobTimeout: 30 * 1000
+});
+
+// Worker that owns the asset library database (see src/asset_library.py)
+const libraryPool = new PythonWorkerPool({
+  script: path.join(__dirname, 'ppt_worker.py'),
+  size: 1,
+  maxJobsPerWorker: 10000,
+  jobTimeout: 30 * 1000
+});
+
+// Workers that render slide previews through LibreOffice, apart from analysis
+// so uploads never wait for them; the pool size bounds LibreOffice processes
+const renderPool = new PythonWorkerPool({
+  script: path.join(__dirname, 'ppt_worker.py'),
+  size: parseInt(process.env.RENDER_WORKERS || '1', 10),
+  maxJobsPerWorker: parseInt(process.env.RENDER_MAX_JOBS_PER_WORKER || '50', 10)
+});
+const pendingRenders = new Map();
+// Whether LibreOffice and pdftoppm are installed, asked of the render workers at startup
+let previewsAvailable = false;
+
+// Queued analyses with per-slide progress streaming (see analysis_service.py)
+const ANALYSIS_SERVICE_PORT = parseInt(process.env.ANALYSIS_SERVICE_PORT || '5051', 10);
+const JOB_ID_PATTERN = /^[0-9a-f]{32}$/;
+
 // Middleware
 app.use(cors());
 app.use(express.json());
 app.use('/uploads', express.static(path.join(__dirname, '../uploads')));
 app.use('/extracted', express.static(path.join(__dirname, '../extracted')));
+app.use('/image-store', express.static(IMAGE_STORE_DIR));
+app.use('/slide-previews', express.static(SLIDE_PREVIEW_DIR));
 app.use('/', express.static(path.join(__dirname, '../client')));
 
 // Serve the refreshed interface
@@ -50,30 +105,74 @@ const upload = multer({
   limits: { fileSize: 100 * 1024 * 1024 } // 100MB limit
 });
 
-// Asset library storage
-let assetLibrary = [];
-const ASSET_LIBRARY_FILE = path.join(__dirname, '../asset-library.json');
-
-// Load existing asset library
-async function loadAssetLibrary() {
-  try {
-    const data = await fs.readFile(ASSET_LIBRARY_FILE, 'utf8');
-    assetLibrary = JSON.parse(data);
-    console.log(`Loaded ${assetLibrary.length} assets from library`);
-  } catch (error) {
-    console.log('No existing asset library found, starting fresh');
-    assetLibrary = [];
+// Asset library operations (add, query, get, update, delete); rejects on failure
+async function libraryRequest(operation, params) {
+  const result = await libraryPool.request(`library_${operation}`, params);
+  if (!result.success) {
+    throw new Error(result.error);
   }
+  return result;
 }
 
-// Save asset library
-async function saveAssetLibrary() {
-  try {
-    await fs.writeFile(ASSET_LIBRARY_FILE, JSON.stringify(assetLibrary, null, 2));
-    console.log('Asset library saved');
-  } catch (error) {
-    console.error('Error saving asset library:', error);
-  }
+// Bring the search index's view of the whole library up to date at startup;
+// library add/update/delete requests index the assets they change themselves
+function syncLibrarySearchIndex() {
+  searchPool.request('index_library', {})
+    .then(result => {
+      if (!result.success) console.error('Library search indexing failed:', result.error);
+    })
+    .catch(error => console.error('Library search indexing failed:', error.message));
+}
+
+// Run the analysis service alongside the server, restarting it if it exits
+function startAnalysisService() {
+  const proc = spawn('python3', [path.join(__dirname, 'analysis_service.py')], {
+    cwd: __dirname,
+    env: { ...process.env, ANALYSIS_SERVICE_PORT: String(ANALYSIS_SERVICE_PORT) },
+    stdio: ['ignore', 'inherit', 'inherit']
+  });
+  proc.on('exit', (code, signal) => {
+    console.error(`Analysis service exited (code ${code}, signal ${signal}); restarting`);
+    setTimeout(startAnalysisService, 1000).unref();
+  });
+  proc.on('error', error => console.error('Failed to start analysis service:', error));
+}
+
+function analysisServiceOptions(method, servicePath, headers = {}) {
+  return { host: '127.0.0.1', port: ANALYSIS_SERVICE_PORT, method, path: servicePath, headers };
+}
+
+// JSON request to the analysis service; resolves with its status, headers and body
+function analysisServiceRequest(method, servicePath, body) {
+  return new Promise((resolve, reject) => {
+    const payload = body ? JSON.stringify(body) : '';
+    const request = http.request(analysisServiceOptions(method, servicePath, {
+      'Content-Type': 'application/json',
+      'Content-Length': Buffer.byteLength(payload)
+    }), response => {
+      let data = '';
+      response.setEncoding('utf8');
+      response.on('data', chunk => { data += chunk; });
+      response.on('end', () => {
+        try {
+          resolve({ status: response.statusCode, headers: response.headers, data: JSON.parse(data) });
+        } catch (error) {
+          reject(error);
+        }
+      });
+    });
+    request.on('error', reject);
+    request.end(payload);
+  });
+}
+
+// Create the directories an upload's analysis is written to
+async function prepareExtractDirs(file) {
+  const extractDir = path.join(__dirname, '../extracted', path.basename(file.filename, path.extname(file.filename)));
+  const imageDir = path.join(extractDir, 'images');
+  await fs.mkdir(extractDir, { recursive: true });
+  await fs.mkdir(imageDir, { recursive: true });
+  return { extractDir, imageDir };
 }
 
 // API Routes
@@ -88,25 +187,18 @@ app.post('/api/upload', upload.single('pptFile'), async (req, res) => {
     console.log('Processing uploaded file:', req.file.filename);
 
     // Create extract directories
-    const extractDir = path.join(__dirname, '../extracted', path.basename(req.file.filename, path.extname(req.file.filename)));
-    const imageDir = path.join(extractDir, 'images');
-
-    // Ensure directories exist
-    await fs.mkdir(extractDir, { recursive: true });
-    await fs.mkdir(imageDir, { recursive: true });
+    const { extractDir, imageDir } = await prepareExtractDirs(req.file);
 
-    // Process PowerPoint file using Python script
-    const pythonScript = path.join(__dirname, 'ppt_processor.py');
-    const command = `python3 "${pythonScript}" "${req.file.path}" "${extractDir}" "${imageDir}"`;
-
-    const { stdout, stderr } = await execAsync(command);
+    // Process PowerPoint file on a warm Python worker
+    const analysisResult = await analysisPool.analyze({
+      file_path: req.file.path,
+      output_dir: extractDir,
+      image_dir: imageDir
+    });
 
-    if (stderr) {
-      console.error('Python script error:', stderr);
+    if (analysisResult.unsupported_format) {
+      return res.status(415).json({ error: 'Unsupported file format', details: analysisResult.error });
     }
-
-    const analysisResult = JSON.parse(stdout);
-
     if (!analysisResult.success) {
       throw new Error(analysisResult.error);
     }
@@ -124,6 +216,8 @@ app.post('/api/upload', upload.single('pptFile'), async (req, res) => {
       slides: slidesInfo,
       totalSlides: metadata.slide_count,
       totalImages: metadata.total_images,
+      convertedFrom: analysisResult.converted_from,
+      previewsAvailable: analysisResult.previews_available,
       uploadTime: new Date().toISOString()
     };
 
@@ -133,6 +227,10 @@ app.post('/api/upload', upload.single('pptFile'), async (req, res) => {
       data: analysisData
     });
 
+    if (analysisResult.previews_pending) {
+      renderPreviews(req.file.path, extractDir);
+    }
+
   } catch (error) {
     console.error('Upload error:', error);
     res.status(500).json({
@@ -142,6 +240,96 @@ app.post('/api/upload', upload.single('pptFile'), async (req, res) => {
   }
 });
 
+// Upload a PowerPoint file and queue its analysis; progress is read from the job's events
+app.post('/api/jobs', upload.single('pptFile'), async (req, res) => {
+  try {
+    if (!req.file) {
+      return res.status(400).json({ error: 'No file uploaded' });
+    }
+
+    const { extractDir, imageDir } = await prepareExtractDirs(req.file);
+    const { status, headers, data } = await analysisServiceRequest('POST', '/jobs', {
+      file_path: req.file.path,
+      output_dir: extractDir,
+      image_dir: imageDir
+    });
+
+    if (status !== 202) {
+      // A full queue is passed on as 503 with Retry-After so clients back off
+      if (headers['retry-after']) res.set('Retry-After', headers['retry-after']);
+      return res.status(status).json({ error: 'Failed to queue analysis', details: data.error });
+    }
+
+    res.status(202).json({
+      success: true,
+      jobId: data.job_id,
+      fileId: req.file.filename,
+      filename: req.file.originalname,
+      extractDir,
+      eventsUrl: `/api/jobs/${data.job_id}/events`
+    });
+
+  } catch (error) {
+    console.error('Job submission error:', error);
+    res.status(503).json({ error: 'Analysis service unavailable', details: error.message });
+  }
+});
+
+// Job status, with the analysis result once it is done
+app.get('/api/jobs/:jobId', async (req, res) => {
+  if (!JOB_ID_PATTERN.test(req.params.jobId)) {
+    return res.status(404).json({ error: 'Job not found' });
+  }
+  try {
+    const { status, data } = await analysisServiceRequest('GET', `/jobs/${req.params.jobId}`);
+    res.status(status).json(data);
+  } catch (error) {
+    res.status(503).json({ error: 'Analysis service unavailable', details: error.message });
+  }
+});
+
+// Stream job progress as Server-Sent Events (or NDJSON with ?format=ndjson)
+app.get('/api/jobs/:jobId/events', (req, res) => {
+  if (!JOB_ID_PATTERN.test(req.params.jobId)) {
+    return res.status(404).json({ error: 'Job not found' });
+  }
+
+  const format = req.query.format === 'ndjson' ? '?format=ndjson' : '';
+  const headers = req.get('Last-Event-ID') ? { 'Last-Event-ID': req.get('Last-Event-ID') } : {};
+  const upstream = http.request(analysisServiceOptions('GET', `/jobs/${req.params.jobId}/events${format}`, headers),
+    response => {
+      res.status(response.statusCode);
+      res.set('Content-Type', response.headers['content-type']);
+      res.set('Cache-Control', 'no-cache');
+      res.flushHeaders();
+      response.pipe(res);
+    });
+
+  upstream.on('error', error => {
+    if (!res.headersSent) {
+      res.status(503).json({ error: 'Analysis service unavailable', details: error.message });
+    } else {
+      res.end();
+    }
+  });
+  // Stop relaying when the browser disconnects; the job itself keeps running
+  res.on('close', () => upstream.destroy());
+  upstream.end();
+});
+
+// Cancel a queued or running job
+app.delete('/api/jobs/:jobId', async (req, res) => {
+  if (!JOB_ID_PATTERN.test(req.params.jobId)) {
+    return res.status(404).json({ error: 'Job not found' });
+  }
+  try {
+    const { status, data } = await analysisServiceRequest('DELETE', `/jobs/${req.params.jobId}`);
+    res.status(status).json(data);
+  } catch (error) {
+    res.status(503).json({ error: 'Analysis service unavailable', details: error.message });
+  }
+});
+
 // Get extracted assets for selection
 app.get('/api/extracted/:fileId', async (req, res) => {
   try {
@@ -156,15 +344,6 @@ app.get('/api/extracted/:fileId', async (req, res) => {
       return res.status(404).json({ error: 'Extracted assets not found' });
     }
 
-    // Read extracted images
-    let imageFiles = [];
-    try {
-      const files = await fs.readdir(imagesDir);
-      imageFiles = files.filter(file => /\.(png|jpg|jpeg|gif)$/i.test(file));
-    } catch {
-      console.log('No images directory found');
-    }
-
     // Read analysis JSON if available
     let analysisData = null;
     try {
@@ -179,15 +358,66 @@ app.get('/api/extracted/:fileId', async (req, res) => {
       console.log('No analysis data found for', fileId);
     }
 
+    // Link rendered slide previews; missing ones are rendered in the background,
+    // unless there is nothing to render them with
+    const missingPreviews = await usePreviews(analysisData);
+    const previewsPending = previewsAvailable ? missingPreviews : 0;
+    if (previewsPending) {
+      renderPreviews(path.join(__dirname, '../uploads', path.basename(fileId)), extractDir);
+    }
+
+    // Image sizes and thumbnails recorded by the analysis, by filename
+    const details = new Map();
+    for (const slide of (analysisData && analysisData.slides) || []) {
+      for (const detail of slide.image_details || []) {
+        details.set(detail.file, detail);
+      }
+    }
+
+    let images = [];
+    if (analysisData && analysisData.image_store) {
+      // Images live once in the shared store; list every slide that uses each one
+      const usage = new Map();
+      for (const slide of analysisData.slides || []) {
+        for (const file of slide.image_files || []) {
+          if (!usage.has(file)) usage.set(file, []);
+          if (!usage.get(file).includes(slide.slide_number)) {
+            usage.get(file).push(slide.slide_number);
+          }
+        }
+      }
+      images = Array.from(usage, ([file, slides]) => ({
+        filename: file,
+        url: `/image-store/${file}`,
+        slideNumber: slides[0],
+        slides
+      }));
+      await useThumbnails(images, details, IMAGE_STORE_DIR, '/image-store', req.query.size === 'full');
+    } else {
+      // Read extracted images
+      let imageFiles = [];
+      try {
+        const files = await fs.readdir(imagesDir);
+        imageFiles = files.filter(file => /\.(png|jpg|jpeg|gif)$/i.test(file));
+      } catch {
+        console.log('No images directory found');
+      }
+      const imagesUrl = `/extracted/${path.basename(fileId, path.extname(fileId))}/images`;
+      images = imageFiles.map(file => ({
+        filename: file,
+        url: `${imagesUrl}/${file}`,
+        slideNumber: file.match(/slide_(\d+)_/)?.[1] || 'unknown'
+      }));
+      await useThumbnails(images, details, imagesDir, imagesUrl, req.query.size === 'full');
+    }
+
     res.json({
       success: true,
       extractDir: extractDir.replace(__dirname + '/../', ''),
-      images: imageFiles.map(file => ({
-        filename: file,
-        url: `/extracted/${path.basename(fileId, path.extname(fileId))}/images/${file}`,
-        slideNumber: file.match(/slide_(\d+)_/)?.[1] || 'unknown'
-      })),
-      analysisData
+      images,
+      analysisData,
+      previewsPending,
+      previewsAvailable
     });
 
   } catch (error) {
@@ -196,6 +426,60 @@ app.get('/api/extracted/:fileId', async (req, res) => {
   }
 });
 
+// Give each slide with a rendered preview its URL; returns how many are still to be rendered
+async function usePreviews(analysisData) {
+  let pending = 0;
+  await Promise.all(((analysisData && analysisData.slides) || []).map(async slide => {
+    if (!slide.preview) return;
+    try {
+      await fs.access(path.join(SLIDE_PREVIEW_DIR, slide.preview.file));
+      slide.preview.url = `/slide-previews/${slide.preview.file}`;
+    } catch {
+      pending++;
+    }
+  }));
+  return pending;
+}
+
+// Render a deck's missing slide previews on the render pool, one render at a time per upload
+function renderPreviews(filePath, extractDir) {
+  if (pendingRenders.has(filePath)) return pendingRenders.get(filePath);
+  const render = renderPool.request('render_previews', { file_path: filePath, output_dir: extractDir })
+    .then(result => {
+      if (!result.success) {
+        console.error(`Slide preview rendering failed for ${path.basename(filePath)}:`, result.error);
+      } else if (result.errors.length > 0) {
+        console.error(`Some slide previews failed for ${path.basename(filePath)}:`, result.errors.join('; '));
+      }
+    })
+    .catch(error => console.error('Slide preview rendering failed:', error.message))
+    .finally(() => pendingRenders.delete(filePath));
+  pendingRenders.set(filePath, render);
+  return render;
+}
+
+// Point image URLs at their thumbnails (unless full size was requested),
+// keeping the original as fullUrl; thumbnails still being rendered fall back to the original
+async function useThumbnails(images, details, imagesDir, imagesUrl, fullSize) {
+  await Promise.all(images.map(async image => {
+    image.fullUrl = image.url;
+    const detail = details.get(image.filename);
+    if (!detail) return;
+
+    image.width = detail.width;
+    image.height = detail.height;
+    if (fullSize || !detail.thumbnail) return;
+
+    try {
+      await fs.access(path.join(imagesDir, detail.thumbnail.file));
+      image.url = `${imagesUrl}/${detail.thumbnail.file}`;
+      image.thumbnail = detail.thumbnail;
+    } catch {
+      // Not rendered yet
+    }
+  }));
+}
+
 // Save selected assets to library
 app.post('/api/save-assets', async (req, res) => {
   try {
@@ -222,13 +506,16 @@ app.post('/api/save-assets', async (req, res) => {
 
       if (asset.type === 'image' && asset.filename) {
         // Copy image to permanent location
-        const sourcePath = path.join(extractDir, 'images', asset.filename);
-        const destPath = path.join(__dirname, '../ppt-addin/web/assets', `${assetData.id}.png`);
+        const sourcePath = asset.url && asset.url.startsWith('/image-store/')
+          ? path.join(IMAGE_STORE_DIR, path.basename(asset.filename))
+          : path.join(extractDir, 'images', asset.filename);
+        const destPath = path.join(LIBRARY_IMAGES_DIR, `${assetData.id}.png`);
 
         try {
+          await fs.mkdir(LIBRARY_IMAGES_DIR, { recursive: true });
           await fs.copyFile(sourcePath, destPath);
-          assetData.url = `assets/${assetData.id}.png`;
-          assetData.originalPath = asset.url;
+          assetData.url = `assets/library/${assetData.id}.png`;
+          assetData.originalPath = asset.fullUrl || asset.url;
         } catch (copyError) {
           console.error('Error copying asset:', copyError);
           continue; // Skip this asset if copy fails
@@ -237,12 +524,13 @@ app.post('/api/save-assets', async (req, res) => {
         assetData.content = asset.content;
       }
 
-      assetLibrary.push(assetData);
       savedAssets.push(assetData);
     }
 
-    // Save updated library
-    await saveAssetLibrary();
+    // Save the batch in one transaction
+    if (savedAssets.length > 0) {
+      await libraryRequest('add', { assets: savedAssets });
+    }
 
     res.json({
       success: true,
@@ -256,30 +544,48 @@ app.post('/api/save-assets', async (req, res) => {
   }
 });
 
-// Get current asset library
-app.get('/api/library', (req, res) => {
-  res.json({
-    success: true,
-    assets: assetLibrary,
-    count: assetLibrary.length
-  });
+// Get one page of the asset library, optionally filtered by type, category, tag, source file or name
+app.get('/api/library', async (req, res) => {
+  try {
+    const tags = [].concat(req.query.tag || []).flatMap(tag => tag.split(',')).filter(Boolean);
+    const page = await libraryRequest('query', {
+      type: req.query.type || null,
+      category: req.query.category || null,
+      sourceFile: req.query.sourceFile || null,
+      tags,
+      search: req.query.q || null,
+      order: req.query.order === 'newest' ? 'newest' : 'oldest',
+      limit: parseInt(req.query.limit || '100', 10) || 100,
+      offset: parseInt(req.query.offset || '0', 10) || 0
+    });
+
+    res.json({
+      success: true,
+      assets: page.assets,
+      count: page.total,
+      limit: page.limit,
+      offset: page.offset
+    });
+
+  } catch (error) {
+    console.error('Error loading library:', error);
+    res.status(500).json({ error: 'Failed to load library' });
+  }
 });
 
 // Delete asset from library
 app.delete('/api/library/:assetId', async (req, res) => {
   try {
     const { assetId } = req.params;
-    const assetIndex = assetLibrary.findIndex(asset => asset.id === assetId);
+    const { asset } = await libraryRequest('delete', { id: assetId });
 
-    if (assetIndex === -1) {
+    if (!asset) {
       return res.status(404).json({ error: 'Asset not found' });
     }
 
-    const asset = assetLibrary[assetIndex];
-
     // Delete physical file if it exists
     if (asset.url) {
-      const filePath = path.join(__dirname, '../ppt-addin/web', asset.url);
+      const filePath = path.join(ADDIN_WEB_DIR, asset.url);
       try {
         await fs.unlink(filePath);
       } catch {
@@ -287,10 +593,6 @@ app.delete('/api/library/:assetId', async (req, res) => {
       }
     }
 
-    // Remove from library
-    assetLibrary.splice(assetIndex, 1);
-    await saveAssetLibrary();
-
     res.json({
       success: true,
       message: 'Asset deleted successfully'
@@ -308,24 +610,16 @@ app.put('/api/library/:assetId', async (req, res) => {
     const { assetId } = req.params;
     const updates = req.body;
 
-    const assetIndex = assetLibrary.findIndex(asset => asset.id === assetId);
-    if (assetIndex === -1) {
+    // Merged and stamped with lastModified in one transaction
+    const { asset } = await libraryRequest('update', { id: assetId, updates });
+    if (!asset) {
       return res.status(404).json({ error: 'Asset not found' });
     }
 
-    // Update asset
-    assetLibrary[assetIndex] = {
-      ...assetLibrary[assetIndex],
-      ...updates,
-      lastModified: new Date().toISOString()
-    };
-
-    await saveAssetLibrary();
-
     res.json({
       success: true,
       message: 'Asset updated successfully',
-      asset: assetLibrary[assetIndex]
+      asset
     });
 
   } catch (error) {
@@ -334,6 +628,40 @@ app.put('/api/library/:assetId', async (req, res) => {
   }
 });
 
+// Full-text search over analysed slides and library text assets
+app.get('/api/search', async (req, res) => {
+  try {
+    const query = (req.query.q || '').trim();
+    if (!query) {
+      return res.status(400).json({ error: 'Missing search query (q)' });
+    }
+
+    const result = await searchPool.request('search', {
+      query,
+      limit: Math.min(parseInt(req.query.limit || '20', 10) || 20, 200),
+      scope: ['slides', 'assets'].includes(req.query.scope) ? req.query.scope : null
+    });
+
+    if (!result.success) {
+      throw new Error(result.error);
+    }
+
+    res.json(result);
+
+  } catch (error) {
+    console.error('Search error:', error);
+    res.status(500).json({ error: 'Search failed', details: error.message });
+  }
+});
+
+// Analysis worker health
+app.get('/api/workers', (req, res) => {
+  res.json({
+    success: true,
+    ...analysisPool.stats()
+  });
+});
+
 // Get uploaded files
 app.get('/api/uploads', async (req, res) => {
   try {
@@ -366,7 +694,23 @@ app.get('/api/uploads', async (req, res) => {
 
 // Initialize and start server
 async function startServer() {
-  await loadAssetLibrary();
+  analysisPool.start();
+  searchPool.start();
+  libraryPool.start();
+  renderPool.start();
+
+  // Opening the library imports asset-library.json the first time
+  const { total } = await libraryRequest('query', { limit: 0 });
+  console.log(`Asset library holds ${total} assets`);
+
+  const previewSupport = await renderPool.request('preview_support', {});
+  previewsAvailable = previewSupport.available;
+  if (!previewsAvailable) {
+    console.log('Slide previews unavailable: LibreOffice (soffice) or pdftoppm was not found');
+  }
+
+  startAnalysisService();
+  syncLibrarySearchIndex();
 
   app.listen(PORT, () => {
     console.log(`Asset Manager Server running at http://localhost:${PORT}`);
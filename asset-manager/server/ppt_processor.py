@@ -2,18 +2,351 @@
 import sys
 import json
 import os
+import re
+import time
 from pathlib import Path
 
 # Add the parent directory to the path to import ppt_inspector
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from src.ppt_inspector import PowerPointInspector
+from dataclasses import asdict
 
-def process_powerpoint(file_path, output_dir, image_dir):
-    """Process PowerPoint file and return analysis data"""
+from src.ppt_inspector import PowerPointInspector, DocumentMetadata, SlideInfo, INSPECTOR_VERSION
+from src.analysis_cache import AnalysisCache
+from src.search_index import SearchIndex
+from src.slide_fingerprint import SlideIndex
+from src.image_hash import ImageHashIndex
+from src.thumbnails import ThumbnailGenerator
+from src.asset_library import AssetLibrary
+from src.office_convert import (OfficeConverter, UnsupportedFormatError, detect_format, find_soffice, FORMAT_PPTX,
+                                CONVERTIBLE_FORMATS, DEFAULT_TIMEOUT as DEFAULT_CONVERSION_TIMEOUT)
+from src.analysis_cache import link_or_copy
+from src.slide_render import SlideRenderer, find_pdftoppm, DEFAULT_WORKERS as DEFAULT_RASTERIZE_WORKERS
+from src.metrics import Metrics
+
+# Analysis cache shared by all uploads, keyed by deck content hash
+CACHE_DIR = os.environ.get('PPT_ANALYSIS_CACHE_DIR', str(Path(__file__).parent.parent / 'cache'))
+CACHE_MAX_BYTES = int(os.environ.get('PPT_ANALYSIS_CACHE_MAX_MB', '512')) * 1024 * 1024
+
+# Content-addressed image store shared by all uploads
+IMAGE_STORE_DIR = os.environ.get('PPT_IMAGE_STORE_DIR', str(Path(__file__).parent.parent / 'image-store'))
+
+# Known brand images that extracted images are matched against: the add-in's
+# assets directory, which app.js resolves from the same variable. Only files
+# directly in it count, so the library images app.js saves to its library/
+# subdirectory are not taken for brand images
+BRAND_ASSETS_DIR = os.environ.get('PPT_BRAND_ASSETS_DIR', str(Path(__file__).parent.parent.parent / 'ppt-addin' / 'web' / 'assets'))
+
+# Perceptual hashes of every image in the store, for spotting re-encoded copies
+IMAGE_HASH_INDEX_PATH = os.environ.get('PPT_IMAGE_HASH_INDEX', str(Path(__file__).parent.parent / 'image-hashes.jsonl'))
+_image_hash_index = None
+
+# Full-text index over analysed slides and library text assets
+SEARCH_INDEX_PATH = os.environ.get('PPT_SEARCH_INDEX', str(Path(__file__).parent.parent / 'search-index.sqlite'))
+_search_index = None
+
+# Saved library assets; the old asset-library.json is imported on first use
+ASSET_LIBRARY_PATH = os.environ.get('PPT_ASSET_LIBRARY_DB', str(Path(__file__).parent.parent / 'asset-library.sqlite'))
+LEGACY_LIBRARY_FILE = str(Path(__file__).parent.parent / 'asset-library.json')
+_asset_library = None
+
+# Legacy .ppt uploads converted to .pptx by LibreOffice, cached by content hash
+CONVERSION_CACHE_DIR = os.environ.get('PPT_CONVERSION_CACHE_DIR', str(Path(__file__).parent.parent / 'converted'))
+CONVERSION_TIMEOUT = float(os.environ.get('PPT_CONVERSION_TIMEOUT', DEFAULT_CONVERSION_TIMEOUT))
+_converter = None
+
+# Whole-slide previews, named by slide content and shared by all uploads
+SLIDE_PREVIEW_DIR = os.environ.get('PPT_SLIDE_PREVIEW_DIR', str(Path(__file__).parent.parent / 'slide-previews'))
+RASTERIZE_WORKERS = int(os.environ.get('PPT_RASTERIZE_WORKERS', DEFAULT_RASTERIZE_WORKERS))
+_renderer = None
+_previews_available = None
+
+# Optional profile captured for every analysis: cpu, memory or all
+PROFILE_MODE = os.environ.get('PPT_PROFILE') or None
+
+def get_search_index():
+    """Return this process's search index connection, opening it on first use"""
+    global _search_index
+    if _search_index is None:
+        _search_index = SearchIndex(SEARCH_INDEX_PATH)
+    return _search_index
+
+# Near-duplicate slide index over every analysed deck
+SLIDE_INDEX_PATH = os.environ.get('PPT_SLIDE_INDEX', str(Path(__file__).parent.parent / 'slide-index.sqlite'))
+_slide_index = None
+
+def get_asset_library():
+    """Open the asset library on first use and keep it for the life of the worker"""
+    global _asset_library
+    if _asset_library is None:
+        _asset_library = AssetLibrary(ASSET_LIBRARY_PATH, LEGACY_LIBRARY_FILE)
+    return _asset_library
+
+def get_converter():
+    """Return this process's LibreOffice converter; the worker pool already bounds how many run at once"""
+    global _converter
+    if _converter is None:
+        _converter = OfficeConverter(CONVERSION_CACHE_DIR, workers=1, timeout=CONVERSION_TIMEOUT)
+    return _converter
+
+def get_renderer():
+    """Return this process's slide renderer, which converts through the same LibreOffice converter"""
+    global _renderer
+    if _renderer is None:
+        _renderer = SlideRenderer(SLIDE_PREVIEW_DIR, get_converter(), workers=RASTERIZE_WORKERS)
+    return _renderer
+
+def previews_available():
+    """Whether slide previews can be rendered here, i.e. LibreOffice and pdftoppm are installed (checked once)"""
+    global _previews_available
+    if _previews_available is None:
+        _previews_available = bool(find_soffice() and find_pdftoppm())
+    return _previews_available
+
+def presentation_source(file_path, output_dir):
+    """Return the .pptx to analyse for an upload, the format it was converted from and the conversion
+
+    Files are classified by content, so anything that is not a presentation
+    fails here without a load attempt. Legacy decks are converted (or taken
+    from the conversion cache) and linked into ``output_dir`` under the
+    upload's name, which exports and the search index are keyed on.
+    """
+    file_format = detect_format(file_path)
+    if file_format == FORMAT_PPTX:
+        return file_path, None, None
+    if file_format not in CONVERTIBLE_FORMATS:
+        raise UnsupportedFormatError(f'{Path(file_path).name} is not a PowerPoint presentation')
+
+    conversion = get_converter().convert(file_path)
+    converted = Path(output_dir) / f'{Path(file_path).stem}.pptx'
+    converted.parent.mkdir(parents=True, exist_ok=True)
+    if converted.exists():
+        converted.unlink()
+    link_or_copy(Path(conversion['path']), converted)
+    return str(converted), file_format, conversion
+
+def get_slide_index():
+    """Return this process's slide index connection, opening it on first use"""
+    global _slide_index
+    if _slide_index is None:
+        _slide_index = SlideIndex(SLIDE_INDEX_PATH)
+    return _slide_index
+
+def get_image_hash_index():
+    """Return this process's view of the image hash index, catching up with other workers"""
+    global _image_hash_index
+    if _image_hash_index is None:
+        _image_hash_index = ImageHashIndex(IMAGE_HASH_INDEX_PATH)
+    else:
+        _image_hash_index.refresh()
+    return _image_hash_index
+
+def find_similar_images(slides):
+    """Map each stored image of a deck to perceptually identical images from earlier uploads, then index it"""
+    index = get_image_hash_index()
+    similar = {}
+    for slide in slides:
+        for detail in slide.get('image_details', []):
+            if not detail.get('phash') or detail['file'] in similar:
+                continue
+            matches = [match['label'] for match in index.match(detail, exclude=detail['file'])]
+            if matches:
+                similar[detail['file']] = matches
+            index.add(detail['file'], detail)
+    return similar
+
+def search(query, limit=20, scope=None):
+    """Search indexed slides and library assets"""
+    try:
+        return {
+            'success': True,
+            'query': query,
+            **get_search_index().search(query, limit, scope)
+        }
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
+def index_library(library_file=None):
+    """Bring the library part of the search index in line with the asset library
+    (or with an asset-library.json file, if one is given)"""
+    try:
+        if library_file:
+            counts = get_search_index().sync_library_file(library_file)
+        else:
+            counts = get_search_index().sync_library(get_asset_library().iter_assets(exclude_type='image'))
+        return {
+            'success': True,
+            **counts
+        }
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
+def _update_library_search_index(assets=(), removed_ids=()):
+    """Apply one library change to the search index; a failure is logged and
+    repaired by the full sync at the next startup"""
+    try:
+        index = get_search_index()
+        if assets:
+            index.index_assets(assets)
+        if removed_ids:
+            index.remove_assets(removed_ids)
+    except Exception as e:
+        print(f'Library search indexing failed: {e}', file=sys.stderr)
+
+def library_request(method, params):
+    """Run one asset library operation: add, query, get, update or delete.
+    Changes are applied to the search index in the same call."""
+    try:
+        library = get_asset_library()
+        if method == 'add':
+            assets = library.add_many(params['assets'])
+            _update_library_search_index(assets=assets)
+            return {'success': True, 'assets': assets}
+        if method == 'query':
+            tags = params.get('tags') or []
+            page = library.query(
+                limit=params.get('limit', 100),
+                offset=params.get('offset', 0),
+                tags=[tags] if isinstance(tags, str) else tags,
+                search=params.get('search'),
+                newest_first=params.get('order') == 'newest',
+                **{name: params.get(name) for name in ('type', 'category', 'sourceFile')}
+            )
+            return {'success': True, **page}
+        if method == 'get':
+            return {'success': True, 'asset': library.get(params['id'])}
+        if method == 'update':
+            asset = library.update(params['id'], params.get('updates') or {})
+            if asset:
+                _update_library_search_index(assets=[asset])
+            return {'success': True, 'asset': asset}
+        if method == 'delete':
+            asset = library.delete(params['id'])
+            if asset:
+                _update_library_search_index(removed_ids=[asset['id']])
+            return {'success': True, 'asset': asset}
+        raise ValueError(f'Unknown library method: {method}')
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
+def extract_images(file_path, output_dir, image_dir, use_image_store=True):
+    """Extract slide images straight from the pptx zip, skipping analysis"""
+    try:
+        source_path, converted_from, conversion = presentation_source(file_path, output_dir)
+        image_store = IMAGE_STORE_DIR if use_image_store else None
+        inspector = PowerPointInspector(source_path, output_dir, image_dir, image_store)
+        if conversion:
+            inspector.metrics.add_time('convert', conversion['seconds'])
+
+        from io import StringIO
+        old_stdout = sys.stdout
+        sys.stdout = StringIO()
+        try:
+            images = inspector.extract_media_only()
+        finally:
+            sys.stdout = old_stdout
+
+        return {
+            'success': True,
+            'images': images,
+            'image_store': image_store,
+            'converted_from': converted_from,
+            'metrics': inspector.metrics.to_dict()
+        }
+
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
+def render_previews(file_path, output_dir, profile=PROFILE_MODE):
+    """Render the slide previews of an analysed upload that do not exist yet"""
     try:
+        metrics = Metrics()
+        source_path, _, _ = presentation_source(file_path, output_dir)
+        with metrics.capture(profile):
+            result = get_renderer().render(source_path, metrics=metrics)
+        return {
+            'success': True,
+            **result,
+            'metrics': metrics.to_dict()
+        }
+
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
+def document_lineage(file_path):
+    """Name shared by re-uploads of one document: the upload name without its timestamp suffix"""
+    return re.sub(r'_\d{10,}$', '', Path(file_path).stem)
+
+def reuse_previous_slides(inspector, cache, previous_key, previous, image_dir):
+    """Let the inspector reuse the slides of a previous version whose parts are unchanged"""
+    hashes = inspector.slide_hashes()
+    if inspector.image_store:
+        current = set(hashes)
+        reusable = [(slide, part) for slide, part in zip(previous['slides'], previous['slide_parts'])
+                    if part['hash'] in current]
+    else:
+        # Image names carry the slide number, so slides must also keep their position
+        reusable = [(slide, part) for slide, part in zip(previous['slides'], previous['slide_parts'])
+                    if slide['slide_number'] <= len(hashes) and hashes[slide['slide_number'] - 1] == part['hash']]
+    if not reusable:
+        return
+
+    # Only the images of reusable slides are brought back into this upload's image directory
+    filenames = list(dict.fromkeys(name for slide, _ in reusable for name in slide['image_files']))
+    cache.restore_images(previous_key, filenames, image_dir)
+    inspector.reuse_slides([slide for slide, _ in reusable], [part for _, part in reusable])
+
+def process_powerpoint(file_path, output_dir, image_dir, use_cache=True, use_image_store=True, profile=PROFILE_MODE,
+                       on_slide=None, lineage=None):
+    """Process PowerPoint file and return analysis data
+
+    ``on_slide(slide_info, total)`` is called as each slide is analysed
+    (or read from the cache), before the full result is assembled.
+    Slides unchanged since the last analysis in the same ``lineage``
+    (by default the upload name) are reused rather than analysed again.
+    Legacy .ppt files are converted to .pptx first.
+    """
+    try:
+        start = time.perf_counter()
+        filename = Path(file_path).name
+        lineage = lineage or document_lineage(file_path)
+        source_path, converted_from, conversion = presentation_source(file_path, output_dir)
+
         # Create inspector
-        inspector = PowerPointInspector(file_path, output_dir, image_dir)
+        image_store = IMAGE_STORE_DIR if use_image_store else None
+        inspector = PowerPointInspector(source_path, output_dir, image_dir, image_store,
+                                        brand_assets_dir=BRAND_ASSETS_DIR)
+        if conversion:
+            inspector.metrics.add_time('convert', conversion['seconds'])
+            if conversion['cached']:
+                inspector.metrics.count('conversion_cache_hits')
+
+        # Reuse a stored analysis of identical content when available; images
+        # are named differently with a store, and tags and brand matches depend
+        # on the patterns and brand images, so those are part of the cache key
+        cache_version = f"{INSPECTOR_VERSION}{'+store' if image_store else ''}+{inspector.settings_digest()[:16]}"
+        cache_image_dir = image_store or image_dir
+        metrics = inspector.metrics
+        cache = AnalysisCache(CACHE_DIR, cache_version, CACHE_MAX_BYTES, enabled=use_cache)
+        with metrics.span('cache_lookup'):
+            cache_key = cache.key_for(source_path) if use_cache else None
+            cached = cache.get(cache_key, cache_image_dir) if use_cache else None
+            previous = cache.get_lineage(lineage) if use_cache and not cached else None
 
         # Redirect stdout temporarily to suppress print statements
         import sys
@@ -23,24 +356,111 @@ def process_powerpoint(file_path, output_dir, image_dir):
         sys.stdout = StringIO()
 
         try:
-            # Load and analyze
-            inspector.load_presentation()
-            metadata = inspector.extract_document_metadata()
-            slides_info = inspector.extract_slide_content()
+            with metrics.capture(profile):
+                if cached:
+                    metadata = DocumentMetadata(**cached['metadata'])
+                    slides_info = [SlideInfo(**slide) for slide in cached['slides']]
+                    inspector.load_cached_analysis(metadata, slides_info)
+                    if on_slide:
+                        for slide_info in slides_info:
+                            on_slide(slide_info, len(slides_info))
+                else:
+                    # Load and analyze
+                    inspector.load_presentation()
+                    if previous and previous[1].get('slide_parts'):
+                        reuse_previous_slides(inspector, cache, *previous, cache_image_dir)
+                    if on_slide:
+                        total = len(inspector.presentation.slides)
+                        for slide_info in inspector.iter_slides():
+                            on_slide(slide_info, total)
+                    metadata = inspector.extract_document_metadata()
+                    slides_info = inspector.extract_slide_content()
+                # A converted deck is reported under the uploaded file's name and size
+                metadata.filename = filename
+                metadata.file_size = os.path.getsize(file_path)
         finally:
             # Restore stdout
             sys.stdout = old_stdout
 
+        # Thumbnail sizes come from image headers; the thumbnails themselves
+        # are rendered in the background and the response does not wait for them
+        thumbnails = ThumbnailGenerator(cache_image_dir)
+        with metrics.span('thumbnails'):
+            for slide in slides_info:
+                for detail in slide.image_details:
+                    detail.update(thumbnails.describe(detail['file']))
+
+        # Serialize slides once; the same dicts feed the cache and the response
+        # (cached SlideInfo objects share their image details with cached['slides'])
+        with metrics.span('serialize'):
+            slides = cached['slides'] if cached else [slide.to_dict() for slide in slides_info]
+
+        # Previews are named from slide content now and rendered later by
+        # render_previews, so the analysis never waits for LibreOffice; with
+        # no LibreOffice or pdftoppm to render them, none are planned
+        previews_pending = 0
+        if previews_available():
+            try:
+                with metrics.span('plan_previews'):
+                    renderer = get_renderer()
+                    previews = renderer.plan(source_path)
+                    previews_pending = len(renderer.missing(previews))
+                for slide_info, slide, preview in zip(slides_info, slides, previews):
+                    slide_info.preview = preview
+                    slide['preview'] = preview
+            except Exception as e:
+                print(f'Preview planning failed for {filename}: {e}', file=sys.stderr)
+
+        if not cached and use_cache:
+            with metrics.span('cache_store'):
+                cache.put(cache_key, {
+                    'metadata': asdict(metadata),
+                    'slides': slides,
+                    'slide_parts': [{'hash': slide_hash, 'pictures': pictures} for slide_hash, pictures
+                                    in zip(inspector.slide_hashes(), inspector.slide_pictures)]
+                }, cache_image_dir)
+                cache.set_lineage(lineage, cache_key)
+
         # Export data (suppress output here too)
         sys.stdout = StringIO()
         try:
-            json_path = inspector.export_to_json()
+            json_path = inspector.export_to_json(compact=True)
         finally:
             sys.stdout = old_stdout
 
+        # Keep the search index current; a failure here must not fail the upload
+        doc_id = inspector.filepath.stem
+        try:
+            with metrics.span('search_index'):
+                get_search_index().index_document(doc_id, metadata.filename, slides)
+        except Exception as e:
+            print(f'Search indexing failed for {metadata.filename}: {e}', file=sys.stderr)
+
+        # Look up slides already known from other decks, then add this deck
+        duplicates = {}
+        try:
+            with metrics.span('slide_index'):
+                slide_index = get_slide_index()
+                duplicates = slide_index.find_document_duplicates(doc_id, slides)
+                slide_index.index_document(doc_id, metadata.filename, slides)
+        except Exception as e:
+            print(f'Slide indexing failed for {metadata.filename}: {e}', file=sys.stderr)
+
+        # Store filenames are global, so images can be compared across uploads
+        similar_images = {}
+        if image_store:
+            try:
+                with metrics.span('image_hash_index'):
+                    similar_images = find_similar_images(slides)
+            except Exception as e:
+                print(f'Image hash indexing failed for {metadata.filename}: {e}', file=sys.stderr)
+
+        metrics.add_time('total', time.perf_counter() - start)
+
         # Return structured data
         return {
             'success': True,
+            'lineage': lineage,
             'metadata': {
                 'filename': metadata.filename,
                 'file_size': metadata.file_size,
@@ -54,25 +474,24 @@ def process_powerpoint(file_path, output_dir, image_dir):
                 'copyright_notices': metadata.copyright_notices,
                 'confidentiality_labels': metadata.confidentiality_labels
             },
-            'slides': [
-                {
-                    'slide_number': slide.slide_number,
-                    'title': slide.title,
-                    'text_content': slide.text_content,
-                    'shape_count': slide.shape_count,
-                    'image_count': slide.image_count,
-                    'image_files': slide.image_files,
-                    'text_shapes': slide.text_shapes,
-                    'graphic_elements': slide.graphic_elements,
-                    'logos_and_brands': slide.logos_and_brands,
-                    'tags': slide.tags,
-                    'notes': slide.notes
-                }
-                for slide in slides_info
-            ],
-            'json_export': json_path
+            'slides': slides,
+            'json_export': json_path,
+            'duplicates': duplicates,
+            'similar_images': similar_images,
+            'cached': bool(cached),
+            'converted_from': converted_from,
+            'previews_pending': previews_pending,
+            'previews_available': previews_available(),
+            'image_store': image_store,
+            'metrics': metrics.to_dict()
         }
 
+    except UnsupportedFormatError as e:
+        return {
+            'success': False,
+            'error': str(e),
+            'unsupported_format': True
+        }
     except Exception as e:
         return {
             'success': False,
@@ -80,16 +499,27 @@ def process_powerpoint(file_path, output_dir, image_dir):
         }
 
 if __name__ == '__main__':
-    if len(sys.argv) < 4:
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    flags = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+
+    if len(args) < 3:
         print(json.dumps({
             'success': False,
-            'error': 'Usage: python ppt_processor.py <file_path> <output_dir> <image_dir>'
+            'error': 'Usage: python ppt_processor.py <file_path> <output_dir> <image_dir> [--no-cache] [--no-image-store] [--images-only] [--profile=cpu|memory|all]'
         }))
         sys.exit(1)
 
-    file_path = sys.argv[1]
-    output_dir = sys.argv[2]
-    image_dir = sys.argv[3]
+    file_path = args[0]
+    output_dir = args[1]
+    image_dir = args[2]
 
-    result = process_powerpoint(file_path, output_dir, image_dir)
+    if '--images-only' in flags:
+        result = extract_images(file_path, output_dir, image_dir,
+                                use_image_store='--no-image-store' not in flags)
+    else:
+        result = process_powerpoint(file_path, output_dir, image_dir,
+                                    use_cache='--no-cache' not in flags,
+                                    use_image_store='--no-image-store' not in flags,
+                                    profile=next((flag.split('=', 1)[1] for flag in flags
+                                                  if flag.startswith('--profile=')), PROFILE_MODE))
     print(json.dumps(result))
\ No newline at end of file
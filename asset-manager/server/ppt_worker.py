@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Long-lived PowerPoint analysis worker.
+
+Reads one JSON request per line on stdin and writes one JSON response per
+line on stdout, so the server pays for interpreter startup and the
+python-pptx/lxml/Pillow imports once per worker instead of once per upload.
+
+Request:  {"id": 1, "method": "analyze", "params": {"file_path": ..., "output_dir": ..., "image_dir": ...}}
+          (methods: analyze, extract_images, render_previews, preview_support, search, index_library, ping, and
+          library_add, library_query, library_get, library_update, library_delete)
+Response: {"id": 1, "result": {...}}  or  {"id": 1, "error": "..."}
+
+An analyze request with "progress": true is preceded by one
+{"id": 1, "progress": {"slide_number", "total", "slide"}} line per slide.
+"""
+import sys
+import json
+import os
+
+from ppt_processor import (process_powerpoint, extract_images, render_previews, previews_available, search,
+                           index_library, library_request, PROFILE_MODE)
+
+
+def handle_request(request, jobs_completed, send_progress=None):
+    """Dispatch a single protocol request and return its result."""
+    method = request.get('method')
+    params = request.get('params') or {}
+
+    if method == 'ping':
+        return {
+            'status': 'ok',
+            'pid': os.getpid(),
+            'jobs_completed': jobs_completed
+        }
+
+    if method == 'analyze':
+        on_slide = None
+        if params.get('progress') and send_progress:
+            def on_slide(slide_info, total):
+                send_progress({
+                    'slide_number': slide_info.slide_number,
+                    'total': total,
+                    'slide': slide_info.to_dict()
+                })
+
+        return process_powerpoint(
+            params['file_path'],
+            params['output_dir'],
+            params['image_dir'],
+            use_cache=params.get('use_cache', True),
+            use_image_store=params.get('use_image_store', True),
+            profile=params.get('profile', PROFILE_MODE),
+            on_slide=on_slide,
+            lineage=params.get('lineage')
+        )
+
+    if method == 'extract_images':
+        return extract_images(
+            params['file_path'],
+            params['output_dir'],
+            params['image_dir'],
+            use_image_store=params.get('use_image_store', True)
+        )
+
+    if method == 'render_previews':
+        return render_previews(
+            params['file_path'],
+            params['output_dir'],
+            profile=params.get('profile', PROFILE_MODE)
+        )
+
+    if method == 'preview_support':
+        return {'success': True, 'available': previews_available()}
+
+    if method == 'search':
+        return search(params['query'], params.get('limit', 20), params.get('scope'))
+
+    if method == 'index_library':
+        return index_library(params.get('library_file'))
+
+    if method.startswith('library_'):
+        return library_request(method[len('library_'):], params)
+
+    raise ValueError(f'Unknown method: {method}')
+
+
+def main():
+    # Keep stdout for protocol messages; stray prints go to stderr
+    protocol_out = sys.stdout
+    sys.stdout = sys.stderr
+
+    jobs_completed = 0
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+
+            def send_progress(progress):
+                protocol_out.write(json.dumps({'id': request_id, 'progress': progress}) + '\n')
+                protocol_out.flush()
+
+            response = {'id': request_id, 'result': handle_request(request, jobs_completed, send_progress)}
+            if request.get('method') in ('analyze', 'extract_images'):
+                jobs_completed += 1
+        except Exception as e:
+            response = {'id': request_id, 'error': str(e)}
+
+        protocol_out.write(json.dumps(response) + '\n')
+        protocol_out.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+const { spawn } = require('child_process');
+const path = require('path');
+const readline = require('readline');
+
+// Methods that count toward maxJobsPerWorker: they load decks and grow the
+// worker's memory, unlike pings and search or library requests
+const COUNTED_METHODS = new Set(['analyze', 'extract_images', 'render_previews']);
+
+// Pool of long-lived Python analysis workers (see ppt_worker.py).
+// Each worker handles one job at a time over a line-delimited JSON protocol
+// and is recycled after maxJobsPerWorker jobs or a failed health check.
+// Workers that die before answering anything are restarted with exponential
+// backoff, so a broken Python environment does not spin in a fork loop.
+class PythonWorkerPool {
+  constructor(options = {}) {
+    this.script = options.script;
+    this.pythonPath = options.pythonPath || 'python3';
+    this.size = options.size || 2;
+    this.maxJobsPerWorker = options.maxJobsPerWorker || 50;
+    this.jobTimeout = options.jobTimeout || 10 * 60 * 1000;
+    this.healthCheckInterval = options.healthCheckInterval || 30 * 1000;
+    this.healthCheckTimeout = options.healthCheckTimeout || 5 * 1000;
+    this.restartDelay = options.restartDelay || 500;
+    this.maxRestartDelay = options.maxRestartDelay || 30 * 1000;
+
+    this.workers = [];
+    this.queue = [];
+    this.nextRequestId = 1;
+    this.healthTimer = null;
+    this.stopped = false;
+    // Workers in a row that died before answering a request
+    this.startFailures = 0;
+  }
+
+  start() {
+    for (let i = 0; i < this.size; i++) {
+      this.workers.push(this._spawnWorker());
+    }
+    this.healthTimer = setInterval(() => this._checkHealth(), this.healthCheckInterval);
+    this.healthTimer.unref();
+  }
+
+  stop() {
+    this.stopped = true;
+    clearInterval(this.healthTimer);
+    for (const worker of this.workers) {
+      this._retireWorker(worker);
+    }
+    for (const job of this.queue) {
+      job.reject(new Error('Worker pool stopped'));
+    }
+    this.queue = [];
+  }
+
+  // Queue a job for any worker method; resolves with the method's result
+  request(method, params) {
+    return new Promise((resolve, reject) => {
+      this.queue.push({ method, params, resolve, reject });
+      this._dispatch();
+    });
+  }
+
+  // Queue an analysis job; resolves with the ppt_processor result object
+  analyze(params) {
+    return this.request('analyze', params);
+  }
+
+  // Queue an images-only extraction job (no slide analysis)
+  extractImages(params) {
+    return this.request('extract_images', params);
+  }
+
+  stats() {
+    return {
+      workers: this.workers.map(worker => ({
+        pid: worker.proc.pid,
+        busy: worker.busy,
+        jobsCompleted: worker.jobsCompleted
+      })),
+      queued: this.queue.length
+    };
+  }
+
+  _spawnWorker() {
+    const proc = spawn(this.pythonPath, [this.script], {
+      cwd: path.dirname(this.script),
+      stdio: ['pipe', 'pipe', 'pipe']
+    });
+
+    const worker = {
+      proc,
+      busy: false,
+      retired: false,
+      gone: false,
+      answered: false,
+      jobsCompleted: 0,
+      pending: new Map()
+    };
+
+    readline.createInterface({ input: proc.stdout }).on('line', line => {
+      let message;
+      try {
+        message = JSON.parse(line);
+      } catch {
+        console.error('Invalid message from analysis worker:', line);
+        return;
+      }
+      // Per-slide progress lines are only requested by the analysis service
+      if (message.progress) return;
+      const request = worker.pending.get(message.id);
+      if (!request) return;
+      worker.answered = true;
+      worker.pending.delete(message.id);
+      clearTimeout(request.timer);
+      if (message.error) {
+        request.reject(new Error(message.error));
+      } else {
+        request.resolve(message.result);
+      }
+    });
+
+    proc.stderr.on('data', data => {
+      console.error(`[analysis worker ${proc.pid}] ${data.toString().trimEnd()}`);
+    });
+
+    proc.on('exit', (code, signal) => {
+      this._workerGone(worker, new Error(`Analysis worker exited (code ${code}, signal ${signal})`));
+    });
+
+    // A worker that fails to spawn may never emit 'exit'
+    proc.on('error', error => {
+      console.error('Failed to start analysis worker:', error);
+      this._workerGone(worker, new Error(`Analysis worker failed: ${error.message}`));
+    });
+    // Writes to a worker that failed or died are reported through 'error'/'exit'
+    proc.stdin.on('error', () => {});
+
+    return worker;
+  }
+
+  _send(worker, method, params, timeout) {
+    return new Promise((resolve, reject) => {
+      const id = this.nextRequestId++;
+      const timer = setTimeout(() => {
+        worker.pending.delete(id);
+        reject(new Error(`Analysis worker ${method} timed out`));
+        this._retireWorker(worker);
+      }, timeout);
+      worker.pending.set(id, { resolve, reject, timer });
+      worker.proc.stdin.write(JSON.stringify({ id, method, params }) + '\n');
+    });
+  }
+
+  _dispatch() {
+    while (this.queue.length > 0) {
+      const worker = this.workers.find(w => !w.busy && !w.retired);
+      if (!worker) return;
+
+      const job = this.queue.shift();
+      worker.busy = true;
+      this._send(worker, job.method, job.params, this.jobTimeout)
+        .then(job.resolve, job.reject)
+        .finally(() => {
+          worker.busy = false;
+          if (COUNTED_METHODS.has(job.method)) worker.jobsCompleted++;
+          if (worker.jobsCompleted >= this.maxJobsPerWorker) {
+            this._retireWorker(worker);
+          }
+          this._dispatch();
+        });
+    }
+  }
+
+  _checkHealth() {
+    for (const worker of this.workers) {
+      // Busy workers are covered by the job timeout
+      if (worker.busy || worker.retired) continue;
+      worker.busy = true;
+      this._send(worker, 'ping', {}, this.healthCheckTimeout)
+        .catch(error => console.error('Analysis worker health check failed:', error.message))
+        .finally(() => {
+          worker.busy = false;
+          this._dispatch();
+        });
+    }
+  }
+
+  _retireWorker(worker) {
+    if (worker.retired) return;
+    worker.retired = true;
+    // Closing stdin lets the worker finish cleanly; kill it if it lingers
+    worker.proc.stdin.end();
+    setTimeout(() => worker.proc.kill('SIGKILL'), this.healthCheckTimeout).unref();
+  }
+
+  // Fail the worker's pending requests and replace it, once per worker
+  _workerGone(worker, error) {
+    if (worker.gone) return;
+    worker.gone = true;
+    worker.retired = true;
+    for (const request of worker.pending.values()) {
+      clearTimeout(request.timer);
+      request.reject(error);
+    }
+    worker.pending.clear();
+
+    if (worker.answered) {
+      this.startFailures = 0;
+      this._replaceWorker(worker);
+      return;
+    }
+    this.startFailures++;
+    const delay = Math.min(this.restartDelay * 2 ** (this.startFailures - 1), this.maxRestartDelay);
+    console.error(`Analysis worker died before answering; restarting in ${delay}ms`);
+    setTimeout(() => this._replaceWorker(worker), delay).unref();
+  }
+
+  _replaceWorker(worker) {
+    const index = this.workers.indexOf(worker);
+    if (index === -1) return;
+    if (this.stopped) {
+      this.workers.splice(index, 1);
+      return;
+    }
+    this.workers[index] = this._spawnWorker();
+    this._dispatch();
+  }
+}
+
+module.exports = { PythonWorkerPool };
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""On-disk cache of deck analyses and their extracted images, keyed by deck
+content hash and analysis version, with lineages linking re-uploads."""
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+RESULT_FILE = "result.json"
+IMAGES_DIR = "images"
+LINEAGE_DIR = "lineage"
+
+
+def hash_file(filepath: str) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def link_or_copy(source: Path, destination: Path) -> None:
+    """Hard-link a file into place, copying it when linking is not possible."""
+    try:
+        os.link(source, destination)
+    except FileExistsError:
+        pass
+    except OSError:
+        # Copy beside the destination and rename so readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(prefix=f".{destination.name}.", dir=destination.parent)
+        os.close(fd)
+        try:
+            shutil.copyfile(source, temp_path)
+            os.replace(temp_path, destination)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+
+class AnalysisCache:
+    """Content-addressed on-disk cache of inspector results.
+
+    Each entry lives in its own directory named after the deck's content hash
+    and the inspector version, holding the serialized analysis plus the images
+    that were extracted for it. Entries are evicted least-recently-used first
+    once the cache grows past ``max_bytes``.
+    """
+
+    def __init__(self, cache_dir: str, inspector_version: str,
+                 max_bytes: int = DEFAULT_MAX_BYTES, enabled: bool = True):
+        self.cache_dir = Path(cache_dir)
+        self.inspector_version = inspector_version
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+
+        if self.enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def key_for(self, filepath: str) -> str:
+        """Build the cache key for a deck from its content hash and the inspector version."""
+        return f"{hash_file(filepath)}_{self.inspector_version}"
+
+    def get(self, key: str, image_dir: str) -> Optional[Dict[str, Any]]:
+        """Return the cached analysis for ``key`` and restore its images into ``image_dir``."""
+        payload = self.load(key)
+        if payload is None or not self.restore_images(key, self._image_files(payload), image_dir):
+            # Entry is incomplete; treat it as a miss
+            return None
+        return payload
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached analysis for ``key`` without restoring any images."""
+        if not self.enabled:
+            return None
+
+        result_path = self.cache_dir / key / RESULT_FILE
+        try:
+            with open(result_path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # Mark as recently used for LRU eviction
+        try:
+            os.utime(result_path)
+        except OSError:
+            pass
+
+        return payload
+
+    def restore_images(self, key: str, filenames: List[str], image_dir: str) -> bool:
+        """Link an entry's images into ``image_dir``; False if any of them is missing."""
+        target_dir = Path(image_dir)
+        target_dir.mkdir(parents=True, exist_ok=True)
+        restored = True
+        for filename in filenames:
+            destination = target_dir / filename
+            if destination.exists():
+                continue
+            try:
+                link_or_copy(self.cache_dir / key / IMAGES_DIR / filename, destination)
+            except OSError:
+                restored = False
+        return restored
+
+    def get_lineage(self, lineage: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Return the key and analysis most recently stored for a document lineage.
+
+        A lineage names successive versions of one document (e.g. re-uploads
+        under the same name), so an edited deck can reuse its unchanged slides.
+        """
+        if not self.enabled:
+            return None
+        try:
+            with open(self._lineage_path(lineage), 'r', encoding='utf-8') as f:
+                key = json.load(f)["key"]
+        except (OSError, ValueError, KeyError):
+            return None
+        payload = self.load(key)
+        return (key, payload) if payload is not None else None
+
+    def set_lineage(self, lineage: str, key: str) -> None:
+        """Point a document lineage at its latest analysis."""
+        if not self.enabled:
+            return
+        path = self._lineage_path(lineage)
+        path.parent.mkdir(exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({"lineage": lineage, "key": key}, f)
+        os.replace(temp_path, path)
+
+    def _lineage_path(self, lineage: str) -> Path:
+        name = hashlib.sha256(f"{lineage}_{self.inspector_version}".encode('utf-8')).hexdigest()
+        return self.cache_dir / LINEAGE_DIR / f"{name}.json"
+
+    def put(self, key: str, payload: Dict[str, Any], image_dir: str) -> None:
+        """Store an analysis and the images it references, then enforce the size bound."""
+        if not self.enabled:
+            return
+
+        entry_dir = self.cache_dir / key
+        if (entry_dir / RESULT_FILE).exists():
+            return
+
+        # Build the entry in a staging directory and rename it into place so
+        # concurrent readers never see a partially written entry
+        staging_dir = Path(tempfile.mkdtemp(prefix=".staging_", dir=self.cache_dir))
+        try:
+            staged_images = staging_dir / IMAGES_DIR
+            staged_images.mkdir()
+            for filename in self._image_files(payload):
+                source = Path(image_dir) / filename
+                if source.exists():
+                    link_or_copy(source, staged_images / filename)
+
+            with open(staging_dir / RESULT_FILE, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, ensure_ascii=False)
+
+            os.rename(staging_dir, entry_dir)
+        except OSError:
+            # Another writer stored the same entry first, or the disk is unavailable
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            return
+
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove least-recently-used entries until the cache fits in ``max_bytes``."""
+        entries = []
+        total_size = 0
+        for entry_dir in self.cache_dir.iterdir():
+            result_path = entry_dir / RESULT_FILE
+            if entry_dir.name.startswith('.') or not result_path.exists():
+                continue
+            try:
+                size = sum(p.stat().st_size for p in entry_dir.rglob('*') if p.is_file())
+                entries.append((result_path.stat().st_mtime, size, entry_dir))
+            except OSError:
+                # Entry removed by a concurrent eviction
+                continue
+            total_size += size
+
+        entries.sort(key=lambda entry: entry[0])
+        for _, size, entry_dir in entries:
+            if total_size <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
+
+    def _image_files(self, payload: Dict[str, Any]) -> List[str]:
+        """List the unique image filenames referenced by an analysis payload."""
+        filenames = {}
+        for slide in payload.get('slides', []):
+            for filename in slide.get('image_files', []):
+                filenames[filename] = None
+        return list(filenames)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""Asset library stored in SQLite, with indexed filters and paging."""
+
+import json
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterator
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assets (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT,
+    type TEXT,
+    category TEXT,
+    source_file TEXT,
+    slide_number INTEGER,
+    date_added TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS assets_type ON assets (type, seq);
+CREATE INDEX IF NOT EXISTS assets_category ON assets (category, seq);
+CREATE INDEX IF NOT EXISTS assets_source_file ON assets (source_file, seq);
+CREATE TABLE IF NOT EXISTS asset_tags (
+    tag TEXT NOT NULL,
+    asset_seq INTEGER NOT NULL,
+    PRIMARY KEY (tag, asset_seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS asset_tags_asset ON asset_tags (asset_seq);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+DEFAULT_PAGE_SIZE = 100
+# Refresh planner statistics after inserting at least this many assets at once
+ANALYZE_THRESHOLD = 1000
+MAX_PAGE_SIZE = 1000
+
+# Filter name -> indexed column
+FILTER_COLUMNS = {
+    "type": "type",
+    "category": "category",
+    "sourceFile": "source_file"
+}
+
+
+def _now() -> str:
+    """ISO timestamp in the same form as JavaScript's toISOString()."""
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+class AssetLibrary:
+    """Saved assets, one row each, in a WAL-mode SQLite database.
+
+    Assets keep their JSON form in ``data``; the fields used for filtering
+    are copied into indexed columns and tags into their own table, so
+    filtered, paged queries stay cheap however large the library grows.
+    Writes take the database lock up front (``BEGIN IMMEDIATE``), so
+    concurrent writers queue on the busy timeout instead of failing halfway.
+    """
+
+    def __init__(self, db_path: str, legacy_file: Optional[str] = None):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        if legacy_file:
+            self.import_json(legacy_file)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _write(self):
+        return _WriteTransaction(self.conn)
+
+    def import_json(self, library_file: str) -> int:
+        """Import an asset-library.json file once; later calls are no-ops. Returns assets imported."""
+        with self._write():
+            if self.conn.execute("SELECT 1 FROM meta WHERE key = 'imported_json'").fetchone():
+                return 0
+            try:
+                with open(library_file, 'r', encoding='utf-8') as f:
+                    assets = json.load(f)
+            except (OSError, ValueError):
+                assets = []
+            self._insert(assets)
+            self.conn.execute("INSERT INTO meta (key, value) VALUES ('imported_json', ?)", (str(library_file),))
+        return len(assets)
+
+    def add_many(self, assets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert assets in one transaction; either all are saved or none."""
+        with self._write():
+            self._insert(assets)
+        return assets
+
+    def _insert(self, assets: List[Dict[str, Any]]) -> None:
+        self.conn.executemany(
+            "INSERT INTO assets (id, name, type, category, source_file, slide_number, date_added, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [self._row(asset) for asset in assets]
+        )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO asset_tags (tag, asset_seq) SELECT ?, seq FROM assets WHERE id = ?",
+            [(tag, asset["id"]) for asset in assets for tag in asset.get("tags") or []]
+        )
+        if len(assets) >= ANALYZE_THRESHOLD:
+            self.conn.execute("ANALYZE")
+
+    def _row(self, asset: Dict[str, Any]) -> tuple:
+        return (
+            asset["id"],
+            asset.get("name"),
+            asset.get("type"),
+            asset.get("category"),
+            asset.get("sourceFile"),
+            asset.get("slideNumber"),
+            asset.get("dateAdded"),
+            json.dumps(asset, ensure_ascii=False)
+        )
+
+    def get(self, asset_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT data FROM assets WHERE id = ?", (asset_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, asset_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Merge ``updates`` into an asset and stamp ``lastModified``; None if it does not exist."""
+        with self._write():
+            asset = self.get(asset_id)
+            if asset is None:
+                return None
+            asset = {**asset, **updates, "id": asset_id, "lastModified": _now()}
+            row = self._row(asset)
+            self.conn.execute(
+                "UPDATE assets SET name = ?, type = ?, category = ?, source_file = ?, slide_number = ?, "
+                "date_added = ?, data = ? WHERE id = ?",
+                row[1:] + (asset_id,)
+            )
+            self._delete_tags(asset_id)
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO asset_tags (tag, asset_seq) SELECT ?, seq FROM assets WHERE id = ?",
+                [(tag, asset_id) for tag in asset.get("tags") or []]
+            )
+        return asset
+
+    def delete(self, asset_id: str) -> Optional[Dict[str, Any]]:
+        """Remove an asset and return it; None if it does not exist."""
+        with self._write():
+            asset = self.get(asset_id)
+            if asset is None:
+                return None
+            self._delete_tags(asset_id)
+            self.conn.execute("DELETE FROM assets WHERE id = ?", (asset_id,))
+        return asset
+
+    def _delete_tags(self, asset_id: str) -> None:
+        self.conn.execute("DELETE FROM asset_tags WHERE asset_seq = (SELECT seq FROM assets WHERE id = ?)", (asset_id,))
+
+    def query(self, limit: int = DEFAULT_PAGE_SIZE, offset: int = 0, tags: Optional[List[str]] = None,
+              search: Optional[str] = None, newest_first: bool = False, **filters) -> Dict[str, Any]:
+        """Return one page of assets matching every given filter, and the total number matching.
+
+        ``filters`` may be ``type``, ``category`` and ``sourceFile``; ``tags``
+        requires all of the listed tags and ``search`` matches names.
+        """
+        clauses = []
+        params = []
+        for name, value in filters.items():
+            if name not in FILTER_COLUMNS:
+                raise ValueError(f"Unknown filter: {name}")
+            if value is not None:
+                clauses.append(f"{FILTER_COLUMNS[name]} = ?")
+                params.append(value)
+        narrowed = bool(clauses)
+        if search:
+            clauses.append("name LIKE ? ESCAPE '\\'")
+            escaped = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            params.append(f"%{escaped}%")
+        # Tags probe the (tag, asset_seq) key per candidate row, which lets the
+        # page walk seq order and stop once it is full. Counting with no
+        # column filter to narrow the candidates reads the first tag's rows instead.
+        tags = list(dict.fromkeys(tags or []))
+        tag_clauses = ["EXISTS (SELECT 1 FROM asset_tags WHERE tag = ? AND asset_seq = assets.seq)"] * len(tags)
+        count_tag_clauses = list(tag_clauses)
+        if tags and not narrowed:
+            count_tag_clauses[0] = "seq IN (SELECT asset_seq FROM asset_tags WHERE tag = ?)"
+        params.extend(tags)
+
+        where = f" WHERE {' AND '.join(clauses + tag_clauses)}" if clauses or tags else ""
+        count_where = f" WHERE {' AND '.join(clauses + count_tag_clauses)}" if clauses or tags else ""
+        limit = max(0, min(int(limit), MAX_PAGE_SIZE))
+        offset = max(0, int(offset))
+
+        # Count and page from one snapshot so concurrent writes cannot skew them
+        self.conn.execute("BEGIN")
+        try:
+            total = self.conn.execute(f"SELECT COUNT(*) FROM assets{count_where}", params).fetchone()[0]
+            rows = self.conn.execute(
+                f"SELECT data FROM assets{where} ORDER BY seq {'DESC' if newest_first else 'ASC'} LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        finally:
+            self.conn.execute("COMMIT")
+
+        return {
+            "assets": [json.loads(row[0]) for row in rows],
+            "total": total,
+            "limit": limit,
+            "offset": offset
+        }
+
+    def iter_assets(self, asset_type: Optional[str] = None, exclude_type: Optional[str] = None,
+                    batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Yield every asset in insertion order, reading in batches."""
+        last_seq = 0
+        while True:
+            clauses = ["seq > ?"]
+            params = [last_seq]
+            if asset_type is not None:
+                clauses.append("type = ?")
+                params.append(asset_type)
+            if exclude_type is not None:
+                clauses.append("type IS NOT ?")
+                params.append(exclude_type)
+            rows = self.conn.execute(
+                f"SELECT seq, data FROM assets WHERE {' AND '.join(clauses)} ORDER BY seq LIMIT ?",
+                params + [batch_size]
+            ).fetchall()
+            if not rows:
+                return
+            for seq, data in rows:
+                yield json.loads(data)
+            last_seq = rows[-1][0]
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM assets").fetchone()[0]
+
+
+class _WriteTransaction:
+    """``BEGIN IMMEDIATE`` ... ``COMMIT``, rolled back on error."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        return False
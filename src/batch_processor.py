@@ -2,14 +2,315 @@
 
 import os
 import json
+import time
+from datetime import datetime
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Callable
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict
 import click
 from ppt_inspector import PowerPointInspector
+from analysis_cache import hash_file, link_or_copy
+from corpus_export import CorpusWriter, deck_rows
+from metrics import PROFILE_MODES
+from office_convert import (OfficeConverter, detect_format, FORMAT_PPTX, CONVERTIBLE_FORMATS,
+                            DEFAULT_WORKERS as DEFAULT_CONVERT_WORKERS, DEFAULT_TIMEOUT as DEFAULT_CONVERT_TIMEOUT)
 
+MANIFEST_FILE = "batch_manifest.json"
+MANIFEST_VERSION = 2
 
-def process_directory(directory: str, output_dir: str = "batch_exports") -> Dict:
-    """Process all PowerPoint files in a directory."""
+# Converted copies of legacy decks, by content hash, inside the output directory
+CONVERSION_CACHE_DIR = "converted"
+
+# Slowest slides kept in each file's metrics, and slowest files listed in the summary
+SLOWEST_SLIDES = 5
+SLOWEST_FILES = 10
+
+
+class BatchManifest:
+    """Per-output-directory record of processed files, used to skip unchanged
+    files and to resume interrupted batches.
+
+    Entries are kept per file and per mode (``full`` or ``metadata``), so a
+    run in one mode neither replaces nor cleans up after the other.
+    """
+
+    def __init__(self, output_path: Path, save_interval: float = 1.0):
+        self.path = output_path / MANIFEST_FILE
+        self.save_interval = save_interval
+        self.files = {}
+        self._last_save = 0.0
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.files = data.get("files", {})
+            elif data.get("version") == 1:
+                # Version 1 held one entry per file, for whichever mode ran last
+                self.files = {
+                    filename: {entry["record"].get("mode", "full"): entry}
+                    for filename, entry in data.get("files", {}).items()
+                }
+        except (OSError, ValueError):
+            pass
+
+    def lookup(self, ppt_file: Path, mode: str = "full", corpus_dir: Optional[str] = None) -> Optional[Dict]:
+        """Return the stored record for a file if it is unchanged since it was processed in ``mode``.
+
+        With ``corpus_dir``, the part files holding the file's corpus rows
+        must also still be in that corpus.
+        """
+        entry = self.files.get(ppt_file.name, {}).get(mode)
+        if not entry:
+            return None
+        if corpus_dir:
+            corpus = entry.get("corpus") or {}
+            if corpus.get("dir") != corpus_dir or not corpus.get("parts"):
+                return None
+            if not all(Path(part).exists() for part in corpus["parts"]):
+                return None
+        if not all(Path(output).exists() for output in entry["outputs"]):
+            return None
+
+        stat = ppt_file.stat()
+        if entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            return entry["record"]
+
+        # Touched but possibly identical; fall back to the content hash
+        if entry["sha256"] and entry["size"] == stat.st_size and hash_file(str(ppt_file)) == entry["sha256"]:
+            entry["mtime"] = stat.st_mtime
+            return entry["record"]
+
+        return None
+
+    def record(self, record: Dict, corpus: Optional[Dict] = None) -> Dict:
+        """Store a successful record, removing stale outputs, and return the summary record.
+
+        Stale outputs are those of the file's previous record in the same
+        mode; outputs recorded by another mode are never removed.
+
+        ``corpus`` names the corpus ``dir``, ``batch_id`` and part files
+        (``parts``) holding the file's rows, which must already be written.
+        """
+        source = record.pop("source")
+        outputs = record.pop("outputs")
+
+        mode = record.get("mode", "full")
+        entries = self.files.setdefault(record["filename"], {})
+        previous = entries.get(mode)
+        if previous:
+            kept = set(outputs).union(*(entry["outputs"] for other, entry in entries.items() if other != mode))
+            for output in previous["outputs"]:
+                if output not in kept and os.path.exists(output):
+                    os.remove(output)
+
+        entries[mode] = {
+            "size": source["size"],
+            "mtime": source["mtime"],
+            "sha256": source["sha256"],
+            "outputs": outputs,
+            "corpus": corpus,
+            "record": record
+        }
+
+        if time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+        return record
+
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        temp_path = self.path.with_suffix(".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": MANIFEST_VERSION, "files": self.files}, f, indent=2)
+        os.replace(temp_path, self.path)
+        self._last_save = time.monotonic()
+
+
+def process_file(ppt_file: Path, output_path: Path, metadata_only: bool = False,
+                 corpus_batch: Optional[str] = None, profile: Optional[str] = None,
+                 conversion: Optional[Dict] = None) -> Dict:
+    """Analyse a single PowerPoint file and return its batch record.
+
+    With ``corpus_batch`` the record also carries the deck's corpus rows
+    under ``corpus``. The record's ``metrics`` hold the inspector's phase
+    timings and counters, plus a cProfile/tracemalloc capture with ``profile``.
+    A legacy deck is analysed from the .pptx in ``conversion`` but keeps
+    its own name in the record.
+    """
+    try:
+        print(f"\nProcessing: {ppt_file.name}")
+        start = time.perf_counter()
+
+        # Fingerprint the source before analysis so later edits are detected.
+        # Metadata scans skip the content hash, which would read the whole file
+        stat = ppt_file.stat()
+        source = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": None if metadata_only else hash_file(str(ppt_file))
+        }
+
+        if metadata_only:
+            analysed_file = Path(conversion["path"]) if conversion else ppt_file
+            inspector = PowerPointInspector(str(analysed_file), str(output_path), str(output_path))
+            with inspector.metrics.capture(profile):
+                metadata = inspector.extract_metadata_only()
+            if conversion:
+                _describe_original(inspector, ppt_file, stat, conversion)
+            inspector.metrics.add_time("total", time.perf_counter() - start)
+            record = {
+                "filename": ppt_file.name,
+                "slides": metadata.slide_count,
+                "images": metadata.total_images,
+                "has_copyright": False,
+                "has_confidentiality": False,
+                "metadata": asdict(metadata),
+                "mode": "metadata",
+                "metrics": inspector.metrics.to_dict(slide_limit=SLOWEST_SLIDES),
+                "source": source,
+                "outputs": []
+            }
+            if conversion:
+                record["converted_from"] = conversion["format"]
+            if corpus_batch:
+                record["corpus"] = deck_rows(corpus_batch, ppt_file.name, metadata)
+            return record
+
+        # Create subdirectory for this file
+        file_output_dir = output_path / ppt_file.stem
+        file_output_dir.mkdir(exist_ok=True)
+
+        # A converted deck is linked in under the original's name, which the exports are named after
+        analysed_file = ppt_file
+        if conversion:
+            analysed_file = file_output_dir / f"{ppt_file.stem}.pptx"
+            if analysed_file.exists():
+                analysed_file.unlink()
+            link_or_copy(Path(conversion["path"]), analysed_file)
+
+        # Process file
+        inspector = PowerPointInspector(
+            str(analysed_file),
+            str(file_output_dir / "exports"),
+            str(file_output_dir / "images")
+        )
+
+        with inspector.metrics.capture(profile):
+            inspector.load_presentation()
+            metadata = inspector.extract_document_metadata()
+            if conversion:
+                _describe_original(inspector, ppt_file, stat, conversion)
+            slides_info = inspector.extract_slide_content()
+
+            # Export data
+            json_path = inspector.export_to_json()
+            csv_path = inspector.export_to_csv()
+        inspector.metrics.add_time("total", time.perf_counter() - start)
+
+        record = {
+            "filename": ppt_file.name,
+            "slides": metadata.slide_count,
+            "images": metadata.total_images,
+            "has_copyright": bool(metadata.copyright_notices),
+            "has_confidentiality": bool(metadata.confidentiality_labels),
+            "output_dir": str(file_output_dir),
+            "mode": "full",
+            "metrics": inspector.metrics.to_dict(slide_limit=SLOWEST_SLIDES),
+            "source": source,
+            "outputs": [json_path, csv_path]
+        }
+        if conversion:
+            record["converted_from"] = conversion["format"]
+            record["outputs"].append(str(analysed_file))
+        if corpus_batch:
+            record["corpus"] = deck_rows(corpus_batch, ppt_file.name, metadata, slides_info, source["sha256"])
+        return record
+
+    except Exception as e:
+        print(f"Error processing {ppt_file.name}: {e}")
+        return {
+            "filename": ppt_file.name,
+            "error": str(e)
+        }
+
+
+def _describe_original(inspector: PowerPointInspector, ppt_file: Path, stat: os.stat_result,
+                        conversion: Dict) -> None:
+    """Report a converted deck under its original name and size, counting the conversion time."""
+    inspector.metadata.filename = ppt_file.name
+    inspector.metadata.file_size = stat.st_size
+    inspector.metrics.add_time("convert", conversion["seconds"])
+    if conversion["cached"]:
+        inspector.metrics.count("conversion_cache_hits")
+
+
+def _process_files_parallel(ppt_files: List[Path], output_path: Path, workers: int,
+                            on_record: Callable[[Dict], None], metadata_only: bool = False,
+                            corpus_batch: Optional[str] = None, profile: Optional[str] = None,
+                            conversions: Optional[Dict[Path, Dict]] = None) -> List[Dict]:
+    """Analyse files in a process pool, returning records in input order."""
+    records = {}
+    arguments = (output_path, metadata_only, corpus_batch, profile)
+    broken = []
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(process_file, ppt_file, *arguments, (conversions or {}).get(ppt_file)): ppt_file
+                   for ppt_file in ppt_files}
+        for future in as_completed(futures):
+            ppt_file = futures[future]
+            try:
+                records[ppt_file] = future.result()
+                on_record(records[ppt_file])
+            except BrokenProcessPool:
+                broken.append(ppt_file)
+            except Exception as e:
+                records[ppt_file] = {"filename": ppt_file.name, "error": str(e)}
+
+    # A crashed worker breaks the whole pool, failing every file still in it.
+    # Retry those files each in a pool of its own, so that only the file
+    # that actually crashes its worker is recorded as failed
+    if broken:
+        print(f"Worker crashed; retrying {len(broken)} files one per process")
+        with ThreadPoolExecutor(max_workers=workers) as retries:
+            futures = {retries.submit(_process_file_isolated, ppt_file, *arguments,
+                                      (conversions or {}).get(ppt_file)): ppt_file for ppt_file in broken}
+            for future in as_completed(futures):
+                ppt_file = futures[future]
+                records[ppt_file] = future.result()
+                if "error" not in records[ppt_file]:
+                    on_record(records[ppt_file])
+
+    return [records[ppt_file] for ppt_file in ppt_files]
+
+
+def _process_file_isolated(ppt_file: Path, *arguments) -> Dict:
+    """Run ``process_file`` in a single-use worker process; a crash fails only this file."""
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        try:
+            return executor.submit(process_file, ppt_file, *arguments).result()
+        except BrokenProcessPool as e:
+            return {"filename": ppt_file.name, "error": f"Worker crashed: {e}"}
+        except Exception as e:
+            return {"filename": ppt_file.name, "error": str(e)}
+
+
+def process_directory(directory: str, output_dir: str = "batch_exports", workers: int = 1,
+                      force: bool = False, metadata_only: bool = False, corpus_dir: Optional[str] = None,
+                      batch_id: Optional[str] = None, corpus_format: Optional[str] = None,
+                      profile: Optional[str] = None, convert_workers: int = DEFAULT_CONVERT_WORKERS,
+                      convert_timeout: float = DEFAULT_CONVERT_TIMEOUT) -> Dict:
+    """Process all PowerPoint files in a directory.
+
+    With ``corpus_dir``, the rows of every file analysed in this run are
+    also appended to the columnar corpus, in the partition of ``batch_id``;
+    unchanged files whose rows are not in that corpus yet are analysed again.
+    The summary lists the slowest files by their recorded analysis time.
+    Files are classified by their content first: unsupported ones fail
+    without being loaded, and legacy decks are converted to .pptx by up to
+    ``convert_workers`` LibreOffice processes before analysis.
+    """
 
     dir_path = Path(directory)
     output_path = Path(output_dir)
@@ -32,55 +333,144 @@ def process_directory(directory: str, output_dir: str = "batch_exports") -> Dict
             "total_slides": 0,
             "total_images": 0,
             "files_with_copyright": 0,
-            "files_with_confidentiality": 0
-        }
+            "files_with_confidentiality": 0,
+            "converted_files": 0,
+            "analysis_seconds": 0.0
+        },
+        "slowest_files": []
     }
 
-    for ppt_file in ppt_files:
+    # Reuse results for files that are unchanged since a previous (possibly interrupted) run
+    manifest = BatchManifest(output_path)
+    corpus_dir = str(Path(corpus_dir).resolve()) if corpus_dir else None
+    records = {}
+    if not force:
+        for ppt_file in ppt_files:
+            record = manifest.lookup(ppt_file, "metadata" if metadata_only else "full", corpus_dir)
+            if record:
+                records[ppt_file] = dict(record)
+
+    pending = [ppt_file for ppt_file in ppt_files if ppt_file not in records]
+    if records:
+        print(f"Skipping {len(records)} unchanged files, processing {len(pending)}")
+
+    # Classify by magic bytes so unsupported files fail without a load attempt
+    legacy = []
+    for ppt_file in pending:
         try:
-            print(f"\nProcessing: {ppt_file.name}")
+            file_format = detect_format(str(ppt_file))
+        except OSError as e:
+            records[ppt_file] = {"filename": ppt_file.name, "error": str(e)}
+            continue
+        if file_format in CONVERTIBLE_FORMATS:
+            legacy.append((ppt_file, file_format))
+        elif file_format != FORMAT_PPTX:
+            records[ppt_file] = {"filename": ppt_file.name, "error": "Unsupported format: not a PowerPoint presentation"}
 
-            # Create subdirectory for this file
-            file_output_dir = output_path / ppt_file.stem
-            file_output_dir.mkdir(exist_ok=True)
+    conversions = {}
+    if legacy:
+        print(f"Converting {len(legacy)} legacy files with LibreOffice")
+        converter = OfficeConverter(str(output_path / CONVERSION_CACHE_DIR), convert_workers, convert_timeout)
+        try:
+            converted = converter.convert_many([str(ppt_file) for ppt_file, _ in legacy])
+        finally:
+            converter.close()
+        for ppt_file, file_format in legacy:
+            result = converted[str(ppt_file)]
+            if isinstance(result, Exception):
+                print(f"Error converting {ppt_file.name}: {result}")
+                records[ppt_file] = {"filename": ppt_file.name, "error": f"Conversion failed: {result}"}
+            else:
+                conversions[ppt_file] = {**result, "format": file_format}
 
-            # Process file
-            inspector = PowerPointInspector(
-                str(ppt_file),
-                str(file_output_dir / "exports"),
-                str(file_output_dir / "images")
-            )
+    pending = [ppt_file for ppt_file in pending if ppt_file not in records]
 
-            inspector.load_presentation()
-            metadata = inspector.extract_document_metadata()
-            slides_info = inspector.extract_slide_content()
+    # Skipped files already have their rows in the partition of an earlier batch
+    corpus = None
+    corpus_entry = None
+    if corpus_dir:
+        batch_id = batch_id or datetime.now().strftime("%Y%m%dT%H%M%S")
+        corpus = CorpusWriter(corpus_dir, batch_id, corpus_format)
+        corpus_entry = {"dir": corpus_dir, "batch_id": batch_id}
 
-            # Export data
-            inspector.export_to_json()
-            inspector.export_to_csv()
+    # Completed files whose corpus rows are still buffered in memory
+    unflushed = []
 
-            # Update summary
-            results["summary"]["total_slides"] += metadata.slide_count
-            results["summary"]["total_images"] += metadata.total_images
+    def record_unflushed(parts: Optional[List[str]] = None) -> None:
+        for record in unflushed:
+            manifest.record(record, {**corpus_entry, "parts": parts} if corpus_entry else None)
+        unflushed.clear()
 
-            if metadata.copyright_notices:
-                results["summary"]["files_with_copyright"] += 1
-            if metadata.confidentiality_labels:
-                results["summary"]["files_with_confidentiality"] += 1
+    def on_record(record: Dict) -> None:
+        corpus_rows = record.pop("corpus", None)
+        if "error" in record:
+            return
 
-            results["processed_files"].append({
-                "filename": ppt_file.name,
-                "slides": metadata.slide_count,
-                "images": metadata.total_images,
-                "output_dir": str(file_output_dir)
-            })
+        # Record each completed file as soon as its results are on disk, so an
+        # interrupted run resumes without losing rows: with a corpus, that is
+        # once its rows have been flushed
+        unflushed.append(record)
+        if not corpus:
+            record_unflushed()
+            return
+        parts = corpus.add(corpus_rows or {})
+        if parts:
+            record_unflushed(parts)
 
-        except Exception as e:
-            print(f"Error processing {ppt_file.name}: {e}")
-            results["failed_files"].append({
-                "filename": ppt_file.name,
-                "error": str(e)
-            })
+    try:
+        if workers > 1:
+            processed = _process_files_parallel(pending, output_path, workers, on_record, metadata_only,
+                                                corpus.batch_id if corpus else None, profile, conversions)
+        else:
+            processed = []
+            for ppt_file in pending:
+                processed.append(process_file(ppt_file, output_path, metadata_only,
+                                              corpus.batch_id if corpus else None, profile,
+                                              conversions.get(ppt_file)))
+                on_record(processed[-1])
+    finally:
+        try:
+            if corpus:
+                parts = corpus.flush()
+                record_unflushed(parts)
+                results["corpus"] = {
+                    "batch_id": corpus.batch_id,
+                    "format": corpus.format,
+                    "files": corpus.close()
+                }
+        finally:
+            manifest.save()
+
+    records.update(zip(pending, processed))
+
+    for ppt_file in ppt_files:
+        record = dict(records[ppt_file])
+        if "error" in record:
+            results["failed_files"].append(record)
+            continue
+
+        # Update summary
+        results["summary"]["total_slides"] += record["slides"]
+        results["summary"]["total_images"] += record["images"]
+
+        if record.pop("has_copyright"):
+            results["summary"]["files_with_copyright"] += 1
+        if record.pop("has_confidentiality"):
+            results["summary"]["files_with_confidentiality"] += 1
+        if record.get("converted_from"):
+            results["summary"]["converted_files"] += 1
+
+        results["processed_files"].append(record)
+
+    # Records from older manifests have no metrics
+    timed = []
+    for record in results["processed_files"]:
+        total = record.get("metrics", {}).get("timings", {}).get("total")
+        if total:
+            results["summary"]["analysis_seconds"] += total["seconds"]
+            timed.append({"filename": record["filename"], "seconds": total["seconds"], "slides": record["slides"]})
+    results["summary"]["analysis_seconds"] = round(results["summary"]["analysis_seconds"], 6)
+    results["slowest_files"] = sorted(timed, key=lambda item: item["seconds"], reverse=True)[:SLOWEST_FILES]
 
     # Save batch summary
     summary_file = output_path / "batch_summary.json"
@@ -92,7 +482,12 @@ def process_directory(directory: str, output_dir: str = "batch_exports") -> Dict
     print(f"Failed: {len(results['failed_files'])} files")
     print(f"Total slides: {results['summary']['total_slides']}")
     print(f"Total images: {results['summary']['total_images']}")
+    if results["slowest_files"]:
+        slowest = results["slowest_files"][0]
+        print(f"Slowest file: {slowest['filename']} ({slowest['seconds']:.2f}s, {slowest['slides']} slides)")
     print(f"Summary saved: {summary_file}")
+    if corpus:
+        print(f"Corpus batch {corpus.batch_id}: {len(results['corpus']['files'])} files in {corpus_dir}")
 
     return results
 
@@ -100,9 +495,26 @@ def process_directory(directory: str, output_dir: str = "batch_exports") -> Dict
 @click.command()
 @click.argument('directory', type=click.Path(exists=True, file_okay=False, dir_okay=True))
 @click.option('--output-dir', '-o', default='batch_exports', help='Output directory for batch exports')
-def main(directory, output_dir):
+@click.option('--workers', '-w', default=1, type=click.IntRange(min=1), help='Number of files to process in parallel')
+@click.option('--force', is_flag=True, help='Reprocess every file, ignoring the batch manifest')
+@click.option('--metadata-only', is_flag=True,
+              help='Only inventory document properties and slide counts, skipping slide analysis')
+@click.option('--corpus-dir', type=click.Path(file_okay=False),
+              help='Append document, slide and shape rows to a columnar corpus in this directory')
+@click.option('--batch-id', help='Corpus partition name for this run (default: current timestamp)')
+@click.option('--corpus-format', type=click.Choice(['parquet', 'pcol']),
+              help='Corpus file format (default: parquet if pyarrow is installed, else pcol)')
+@click.option('--profile', type=click.Choice(PROFILE_MODES),
+              help='Capture a cProfile and/or tracemalloc profile in each file\'s metrics')
+@click.option('--convert-workers', default=DEFAULT_CONVERT_WORKERS, type=click.IntRange(min=1),
+              help='Number of LibreOffice conversions of legacy .ppt files to run at once')
+@click.option('--convert-timeout', default=DEFAULT_CONVERT_TIMEOUT, type=click.FloatRange(min=1),
+              help='Seconds before a LibreOffice conversion is abandoned')
+def main(directory, output_dir, workers, force, metadata_only, corpus_dir, batch_id, corpus_format, profile,
+         convert_workers, convert_timeout):
     """Process all PowerPoint files in a directory."""
-    process_directory(directory, output_dir)
+    process_directory(directory, output_dir, workers, force, metadata_only, corpus_dir, batch_id, corpus_format,
+                      profile, convert_workers, convert_timeout)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""Benchmark the inspector on synthetic decks.
+
+Generates decks with a configurable number of slides, shapes, nested
+groups and images, times each phase of the inspector separately and
+writes the results as JSON so runs can be compared across versions.
+"""
+
+import gc
+import io
+import json
+import platform
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Callable, Optional
+
+import click
+from PIL import Image, ImageDraw
+from pptx import Presentation
+from pptx.util import Inches, Pt
+from pptx.enum.shapes import MSO_SHAPE
+
+from ppt_inspector import PowerPointInspector, INSPECTOR_VERSION
+
+BENCHMARK_VERSION = 1
+
+WORDS = ("revenue growth customer market product strategy team quarter results "
+         "confidential overview agenda summary garden community roadmap launch").split()
+
+
+def _synthetic_image(rng: random.Random, size: int) -> bytes:
+    """A JPEG of random coloured blocks, so every image has distinct content."""
+    image = Image.new('RGB', (size, size * 3 // 4), tuple(rng.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(24):
+        x, y = rng.randrange(image.width), rng.randrange(image.height)
+        draw.rectangle([x, y, x + rng.randrange(1, size // 2), y + rng.randrange(1, size // 2)],
+                       fill=tuple(rng.randrange(256) for _ in range(3)))
+    output = io.BytesIO()
+    image.save(output, 'JPEG', quality=85)
+    return output.getvalue()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def generate_deck(path: str, slides: int = 20, shapes: int = 10, group_depth: int = 0,
+                  images: int = 1, image_size: int = 800, seed: int = 0) -> Dict[str, Any]:
+    """Write a synthetic deck and return a description of what it contains.
+
+    Each slide gets a title, ``shapes`` top-level text boxes and autoshapes,
+    a chain of ``group_depth`` nested groups (each holding a text box and a
+    rectangle) and ``images`` pictures ``image_size`` pixels wide.
+    """
+    rng = random.Random(seed)
+    presentation = Presentation()
+    layout = presentation.slide_layouts[5]  # Title only
+
+    for slide_number in range(1, slides + 1):
+        slide = presentation.slides.add_slide(layout)
+        slide.shapes.title.text = f"Slide {slide_number}: {_sentence(rng, 3)}"
+
+        for index in range(shapes):
+            left, top = Inches(rng.uniform(0, 7)), Inches(rng.uniform(1.5, 6.5))
+            if index % 2:
+                shape = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, left, top, Inches(2), Inches(1))
+            else:
+                shape = slide.shapes.add_textbox(left, top, Inches(3), Inches(1))
+            shape.text_frame.text = _sentence(rng, rng.randint(4, 16))
+            shape.text_frame.paragraphs[0].runs[0].font.size = Pt(rng.choice((12, 14, 18, 24)))
+
+        container = slide.shapes
+        for depth in range(group_depth):
+            group = container.add_group_shape()
+            textbox = group.shapes.add_textbox(Inches(0.5 + depth * 0.2), Inches(6.8), Inches(2), Inches(0.4))
+            textbox.text_frame.text = _sentence(rng, 5)
+            group.shapes.add_shape(MSO_SHAPE.RECTANGLE, Inches(3 + depth * 0.2), Inches(6.8), Inches(1), Inches(0.4))
+            container = group.shapes
+
+        for index in range(images):
+            blob = io.BytesIO(_synthetic_image(rng, image_size))
+            slide.shapes.add_picture(blob, Inches(0.5 + index * 0.3), Inches(2 + index * 0.3), width=Inches(4))
+
+        slide.notes_slide.notes_text_frame.text = _sentence(rng, 12)
+
+    presentation.save(path)
+    return {
+        'slides': slides,
+        'shapes_per_slide': shapes,
+        'group_depth': group_depth,
+        'images_per_slide': images,
+        'image_size': image_size,
+        'seed': seed,
+        'file_size': Path(path).stat().st_size
+    }
+
+
+def _measure(action: Callable[[], Any], memory: bool) -> Dict[str, Any]:
+    """Time one call, and optionally record its peak traced allocation."""
+    gc.collect()
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        action()
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if memory else None
+    finally:
+        if memory:
+            tracemalloc.stop()
+    return {'seconds': seconds, 'peak_bytes': peak}
+
+
+def run_phases(deck_path: str, work_dir: Path, memory: bool = False) -> Dict[str, Dict[str, Any]]:
+    """Run each inspector phase once on a fresh inspector and measure it.
+
+    Slide analysis is a single pass that also extracts images, so
+    ``extract_document_metadata`` carries the traversal cost and
+    ``extract_slide_content`` only returns its results. Image extraction
+    on its own is measured with the zip-level ``extract_media_only``.
+    """
+    results = {}
+    output_dir = work_dir / 'exports'
+    image_dir = work_dir / 'images'
+    inspector = PowerPointInspector(deck_path, str(output_dir), str(image_dir))
+
+    results['load_presentation'] = _measure(inspector.load_presentation, memory)
+    results['extract_document_metadata'] = _measure(inspector.extract_document_metadata, memory)
+    results['extract_slide_content'] = _measure(inspector.extract_slide_content, memory)
+    results['export_to_json'] = _measure(inspector.export_to_json, memory)
+    results['export_to_csv'] = _measure(inspector.export_to_csv, memory)
+    results['export_to_ndjson'] = _measure(inspector.export_to_ndjson, memory)
+
+    media_dir = work_dir / 'media'
+    media_inspector = PowerPointInspector(deck_path, str(output_dir), str(media_dir))
+    results['extract_media_only'] = _measure(media_inspector.extract_media_only, memory)
+
+    metadata_inspector = PowerPointInspector(deck_path, str(output_dir), str(work_dir / 'metadata'))
+    results['extract_metadata_only'] = _measure(metadata_inspector.extract_metadata_only, memory)
+
+    results['_counts'] = {
+        'shapes': sum(slide.shape_count for slide in inspector.slides_info),
+        'images': inspector.metadata.total_images,
+        'image_bytes': sum(path.stat().st_size for path in media_dir.iterdir() if path.is_file())
+    }
+    return results
+
+
+def benchmark_deck(deck_path: str, repeat: int = 3, memory: bool = True) -> Dict[str, Any]:
+    """Benchmark all phases on one deck.
+
+    Timings are the median of ``repeat`` runs without tracing; peak memory
+    comes from one extra run under tracemalloc, which would otherwise slow
+    the timed runs down.
+    """
+    runs = []
+    peaks = {}
+    counts = {}
+    for index in range(repeat + (1 if memory else 0)):
+        traced = memory and index == repeat
+        work_dir = Path(tempfile.mkdtemp(prefix='ppt-bench-'))
+        try:
+            result = run_phases(deck_path, work_dir, memory=traced)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        counts = result.pop('_counts')
+        if traced:
+            peaks = {phase: measured['peak_bytes'] for phase, measured in result.items()}
+        else:
+            runs.append({phase: measured['seconds'] for phase, measured in result.items()})
+
+    slides = len(Presentation(deck_path).slides)
+    megabytes = Path(deck_path).stat().st_size / (1024 * 1024)
+    phases = {}
+    for phase in runs[0]:
+        seconds = [run[phase] for run in runs]
+        median = statistics.median(seconds)
+        phases[phase] = {
+            'seconds': median,
+            'runs': seconds,
+            'slides_per_second': slides / median if median else None,
+            'shapes_per_second': counts['shapes'] / median if median else None,
+            'megabytes_per_second': megabytes / median if median else None,
+            'peak_bytes': peaks.get(phase)
+        }
+
+    total = sum(phase['seconds'] for name, phase in phases.items()
+                if name in ('load_presentation', 'extract_document_metadata', 'extract_slide_content'))
+    return {
+        'deck': {
+            'path': str(deck_path),
+            'file_size': Path(deck_path).stat().st_size,
+            'slides': slides,
+            'shapes': counts['shapes'],
+            'images': counts['images'],
+            'image_bytes': counts['image_bytes']
+        },
+        'analysis_seconds': total,
+        'phases': phases
+    }
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        'benchmark_version': BENCHMARK_VERSION,
+        'inspector_version': INSPECTOR_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': datetime.now().isoformat()
+    }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Per-deck, per-phase timing ratios (current / baseline) for decks present in both."""
+    baseline_decks = {deck['name']: deck for deck in baseline['decks']}
+    rows = []
+    for deck in current['decks']:
+        previous = baseline_decks.get(deck['name'])
+        if not previous:
+            continue
+        for phase, measured in deck['phases'].items():
+            before = previous['phases'].get(phase)
+            if not before or not before['seconds']:
+                continue
+            rows.append({
+                'deck': deck['name'],
+                'phase': phase,
+                'baseline_seconds': before['seconds'],
+                'current_seconds': measured['seconds'],
+                'ratio': measured['seconds'] / before['seconds']
+            })
+    return rows
+
+
+# Decks benchmarked by default: (name, generator options)
+DEFAULT_SUITE = [
+    ('text-heavy', {'slides': 50, 'shapes': 20, 'group_depth': 0, 'images': 0}),
+    ('nested-groups', {'slides': 30, 'shapes': 5, 'group_depth': 6, 'images': 0}),
+    ('image-heavy', {'slides': 20, 'shapes': 3, 'group_depth': 0, 'images': 4, 'image_size': 1600}),
+    ('mixed', {'slides': 40, 'shapes': 10, 'group_depth': 2, 'images': 1, 'image_size': 800})
+]
+
+
+@click.group()
+def cli():
+    """Benchmark the PowerPoint inspector."""
+
+
+@cli.command()
+@click.argument('output', type=click.Path(dir_okay=False))
+@click.option('--slides', default=20, type=click.IntRange(min=1), help='Number of slides')
+@click.option('--shapes', default=10, type=click.IntRange(min=0), help='Top-level shapes per slide')
+@click.option('--group-depth', default=0, type=click.IntRange(min=0), help='Nesting depth of grouped shapes per slide')
+@click.option('--images', default=1, type=click.IntRange(min=0), help='Pictures per slide')
+@click.option('--image-size', default=800, type=click.IntRange(min=16), help='Picture width in pixels')
+@click.option('--seed', default=0, help='Random seed')
+def generate(output, slides, shapes, group_depth, images, image_size, seed):
+    """Generate a synthetic deck."""
+    description = generate_deck(output, slides, shapes, group_depth, images, image_size, seed)
+    print(f"✅ Generated {output}: {json.dumps(description)}")
+
+
+@cli.command()
+@click.option('--deck', 'decks', multiple=True, type=click.Path(exists=True, dir_okay=False),
+              help='Benchmark existing decks instead of the synthetic suite')
+@click.option('--slides', type=click.IntRange(min=1), help='Benchmark one synthetic deck with this many slides')
+@click.option('--shapes', default=10, type=click.IntRange(min=0), help='Top-level shapes per slide (with --slides)')
+@click.option('--group-depth', default=0, type=click.IntRange(min=0), help='Group nesting depth (with --slides)')
+@click.option('--images', default=1, type=click.IntRange(min=0), help='Pictures per slide (with --slides)')
+@click.option('--image-size', default=800, type=click.IntRange(min=16), help='Picture width (with --slides)')
+@click.option('--repeat', '-r', default=3, type=click.IntRange(min=1), help='Timed runs per deck')
+@click.option('--no-memory', is_flag=True, help='Skip the tracemalloc run that measures peak memory')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Write results JSON here')
+def run(decks, slides, shapes, group_depth, images, image_size, repeat, no_memory, output):
+    """Run the benchmark suite and report per-phase timings."""
+    results = {**environment(), 'repeat': repeat, 'decks': []}
+
+    temp_dir = Path(tempfile.mkdtemp(prefix='ppt-bench-decks-'))
+    try:
+        suite = []
+        if decks:
+            suite = [(Path(deck).stem, deck, None) for deck in decks]
+        else:
+            configs = DEFAULT_SUITE
+            if slides:
+                configs = [('custom', {'slides': slides, 'shapes': shapes, 'group_depth': group_depth,
+                                       'images': images, 'image_size': image_size})]
+            for name, config in configs:
+                path = temp_dir / f"{name}.pptx"
+                print(f"🛠️  Generating {name} deck...")
+                suite.append((name, str(path), generate_deck(str(path), **config)))
+
+        for name, path, config in suite:
+            print(f"⏱️  Benchmarking {name}...")
+            deck_result = benchmark_deck(path, repeat, memory=not no_memory)
+            deck_result['name'] = name
+            deck_result['generator'] = config
+            results['decks'].append(deck_result)
+
+            for phase, measured in deck_result['phases'].items():
+                peak = measured['peak_bytes']
+                peak_text = f"{peak / (1024 * 1024):8.1f} MB" if peak is not None else ''
+                print(f"  {phase:28s} {measured['seconds'] * 1000:9.1f} ms "
+                      f"{measured['slides_per_second']:9.1f} slides/s {peak_text}")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results saved: {output}")
+
+
+@cli.command()
+@click.argument('baseline', type=click.Path(exists=True, dir_okay=False))
+@click.argument('current', type=click.Path(exists=True, dir_okay=False))
+@click.option('--threshold', default=1.10, help='Flag phases slower than baseline by this factor')
+def compare(baseline, current, threshold):
+    """Compare two results files; exits non-zero if any phase regressed."""
+    with open(baseline, 'r', encoding='utf-8') as f:
+        baseline_results = json.load(f)
+    with open(current, 'r', encoding='utf-8') as f:
+        current_results = json.load(f)
+
+    regressions = 0
+    for row in compare_results(baseline_results, current_results):
+        flag = ''
+        if row['ratio'] > threshold:
+            flag = '  ⚠️  slower'
+            regressions += 1
+        print(f"{row['deck']:16s} {row['phase']:28s} {row['baseline_seconds'] * 1000:9.1f} ms -> "
+              f"{row['current_seconds'] * 1000:9.1f} ms  x{row['ratio']:.2f}{flag}")
+
+    if regressions:
+        raise SystemExit(f"{regressions} phase(s) slower than x{threshold:.2f}")
+
+
+if __name__ == "__main__":
+    cli()
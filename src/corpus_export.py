@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""Columnar corpus export: per-document, per-slide and per-shape rows from a
+batch run, written as one partition per batch.
+
+Tables are written as Parquet when pyarrow is installed. Otherwise they use
+a small self-describing columnar format (``.pcol``): zlib-compressed column
+chunks followed by a JSON footer with the schema and chunk offsets, so a
+reader only decodes the columns it asks for.
+
+Layout::
+
+    <corpus_dir>/<table>/batch=<batch_id>/part-00000.parquet|.pcol
+"""
+
+import io
+import json
+import os
+import re
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+PCOL_MAGIC = b"PCOL1\n"
+ROWS_PER_PART = 100000
+PART_NAME_PATTERN = re.compile(r"part-(\d+)\.")
+
+# Column types are fixed per table so every partition reads back the same way
+SCHEMAS = {
+    "documents": [
+        ("batch_id", "string"),
+        ("source_file", "string"),
+        ("source_sha256", "string"),
+        ("file_size", "int64"),
+        ("slide_count", "int32"),
+        ("total_images", "int32"),
+        ("author", "string"),
+        ("title", "string"),
+        ("subject", "string"),
+        ("category", "string"),
+        ("created_date", "string"),
+        ("modified_date", "string"),
+        ("company_mentions", "list<string>"),
+        ("copyright_notices", "list<string>"),
+        ("confidentiality_labels", "list<string>")
+    ],
+    "slides": [
+        ("batch_id", "string"),
+        ("source_file", "string"),
+        ("slide_number", "int32"),
+        ("title", "string"),
+        ("text", "string"),
+        ("notes", "string"),
+        ("shape_count", "int32"),
+        ("image_count", "int32"),
+        ("text_shape_count", "int32"),
+        ("graphic_element_count", "int32"),
+        ("logo_count", "int32"),
+        ("tags", "list<string>"),
+        ("image_files", "list<string>")
+    ],
+    "shapes": [
+        ("batch_id", "string"),
+        ("source_file", "string"),
+        ("slide_number", "int32"),
+        ("kind", "string"),
+        ("shape_type", "string"),
+        ("text", "string"),
+        ("left", "float64"),
+        ("top", "float64"),
+        ("width", "float64"),
+        ("height", "float64"),
+        ("font_name", "string"),
+        ("font_size", "float64"),
+        ("font_bold", "bool"),
+        ("font_italic", "bool"),
+        ("font_color", "string"),
+        ("auto_shape_type", "string"),
+        ("fill_color", "string"),
+        ("image_file", "string")
+    ]
+}
+
+_ARRAY_CODES = {"int32": "i", "int64": "q", "float64": "d", "bool": "b"}
+_MISSING = {"int32": 0, "int64": 0, "float64": 0.0, "bool": 0}
+
+
+def default_format() -> str:
+    """Parquet when pyarrow is available, the built-in columnar format otherwise."""
+    return "parquet" if pa is not None else "pcol"
+
+
+def _get(record: Any, name: str, default: Any = None) -> Any:
+    """Read a field from a shape record or its dict form."""
+    if record is None:
+        return default
+    if isinstance(record, dict):
+        return record.get(name, default)
+    return getattr(record, name, default)
+
+
+def deck_rows(batch_id: str, source_file: str, metadata: Any, slides: Optional[List[Any]] = None,
+              source_sha256: Optional[str] = None) -> Dict[str, List[tuple]]:
+    """Build the corpus rows of one analysed deck, keyed by table.
+
+    ``metadata`` is a DocumentMetadata and ``slides`` a list of SlideInfo
+    (or their dict forms); without slides only the document row is built.
+    """
+    rows = {"documents": [], "slides": [], "shapes": []}
+    rows["documents"].append((
+        batch_id, source_file, source_sha256,
+        _get(metadata, "file_size"), _get(metadata, "slide_count"), _get(metadata, "total_images"),
+        _get(metadata, "author"), _get(metadata, "title"), _get(metadata, "subject"), _get(metadata, "category"),
+        _get(metadata, "created_date"), _get(metadata, "modified_date"),
+        list(_get(metadata, "company_mentions", [])),
+        list(_get(metadata, "copyright_notices", [])),
+        list(_get(metadata, "confidentiality_labels", []))
+    ))
+
+    for slide in slides or []:
+        slide_number = _get(slide, "slide_number")
+        text_shapes = _get(slide, "text_shapes", [])
+        graphic_elements = _get(slide, "graphic_elements", [])
+        logos = _get(slide, "logos_and_brands", [])
+
+        rows["slides"].append((
+            batch_id, source_file, slide_number, _get(slide, "title"),
+            "\n".join(_get(slide, "text_content", [])), _get(slide, "notes"),
+            _get(slide, "shape_count"), _get(slide, "image_count"),
+            len(text_shapes), len(graphic_elements), len(logos),
+            list(_get(slide, "tags", [])), list(_get(slide, "image_files", []))
+        ))
+
+        def shape_row(kind, shape_type=None, text=None, positioning=None, font=None,
+                      auto_shape_type=None, fill_color=None, image_file=None):
+            return (
+                batch_id, source_file, slide_number, kind, shape_type, text,
+                _get(positioning, "left"), _get(positioning, "top"),
+                _get(positioning, "width"), _get(positioning, "height"),
+                _get(font, "name"), _get(font, "size"), _get(font, "bold"), _get(font, "italic"),
+                _get(font, "color"), auto_shape_type, fill_color, image_file
+            )
+
+        for shape in text_shapes:
+            rows["shapes"].append(shape_row(
+                "text_shape", text=_get(shape, "text"),
+                positioning=_get(shape, "positioning"), font=_get(shape, "font_info")))
+        for element in graphic_elements:
+            rows["shapes"].append(shape_row(
+                "graphic_element", shape_type=_get(element, "shape_type"), text=_get(element, "text"),
+                positioning=_get(element, "positioning"),
+                auto_shape_type=_get(element, "auto_shape_type"), fill_color=_get(element, "fill_color")))
+        for logo in logos:
+            kind = _get(logo, "type") or ("image_logo" if _get(logo, "file") else "text_logo")
+            rows["shapes"].append(shape_row(
+                kind, text=_get(logo, "content"), positioning=_get(logo, "positioning"),
+                font=_get(logo, "font_info"), image_file=_get(logo, "file")))
+
+    return rows
+
+
+def _encode_strings(values: List[Optional[str]]) -> bytes:
+    """Offsets (int64, n + 1) followed by the concatenated UTF-8 bytes."""
+    offsets = array("q", [0])
+    blob = io.BytesIO()
+    for value in values:
+        if value is not None:
+            blob.write(value.encode("utf-8"))
+        offsets.append(blob.tell())
+    return _little_endian(offsets) + blob.getvalue()
+
+
+def _decode_strings(data: bytes, count: int) -> List[str]:
+    offsets = array("q")
+    offsets.frombytes(data[:8 * (count + 1)])
+    if sys.byteorder != "little":
+        offsets.byteswap()
+    blob = data[8 * (count + 1):]
+    return [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(count)]
+
+
+def _encode_column(column_type: str, values: List[Any]) -> bytes:
+    """Encode one column: a validity byte per row, then the values."""
+    validity = bytes(0 if value is None else 1 for value in values)
+    if column_type == "string":
+        payload = _encode_strings(values)
+    elif column_type == "list<string>":
+        lengths = array("q", [0])
+        flat = []
+        for value in values:
+            flat.extend(value or [])
+            lengths.append(len(flat))
+        payload = struct.pack("<q", len(flat)) + _little_endian(lengths) + _encode_strings(flat)
+    else:
+        missing = _MISSING[column_type]
+        payload = _little_endian(array(_ARRAY_CODES[column_type],
+                                       [missing if value is None else value for value in values]))
+    return zlib.compress(validity + payload, 6)
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _decode_column(column_type: str, data: bytes, count: int) -> List[Any]:
+    data = zlib.decompress(data)
+    validity, payload = data[:count], data[count:]
+
+    if column_type == "string":
+        values = _decode_strings(payload, count)
+    elif column_type == "list<string>":
+        (flat_count,) = struct.unpack("<q", payload[:8])
+        lengths = array("q")
+        lengths.frombytes(payload[8:8 + 8 * (count + 1)])
+        if sys.byteorder != "little":
+            lengths.byteswap()
+        flat = _decode_strings(payload[8 + 8 * (count + 1):], flat_count)
+        values = [flat[lengths[i]:lengths[i + 1]] for i in range(count)]
+    else:
+        values = array(_ARRAY_CODES[column_type])
+        values.frombytes(payload)
+        if sys.byteorder != "little":
+            values.byteswap()
+        values = [bool(value) for value in values] if column_type == "bool" else list(values)
+
+    return [value if valid else None for value, valid in zip(values, validity)]
+
+
+def write_pcol(path: Path, schema: List[tuple], rows: List[tuple]) -> None:
+    """Write rows as a .pcol file (atomically)."""
+    footer = {"schema": [{"name": name, "type": column_type} for name, column_type in schema],
+              "rows": len(rows), "columns": {}}
+
+    fd, temp_path = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(PCOL_MAGIC)
+            for index, (name, column_type) in enumerate(schema):
+                chunk = _encode_column(column_type, [row[index] for row in rows])
+                footer["columns"][name] = {"offset": f.tell(), "length": len(chunk)}
+                f.write(chunk)
+            footer_bytes = json.dumps(footer).encode("utf-8")
+            f.write(footer_bytes)
+            f.write(struct.pack("<q", len(footer_bytes)))
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def read_pcol(path: Path, columns: Optional[List[str]] = None) -> Dict[str, List[Any]]:
+    """Read the requested columns (all by default) of a .pcol file."""
+    with open(path, "rb") as f:
+        if f.read(len(PCOL_MAGIC)) != PCOL_MAGIC:
+            raise ValueError(f"Not a pcol file: {path}")
+        f.seek(-8, os.SEEK_END)
+        (footer_length,) = struct.unpack("<q", f.read(8))
+        f.seek(-8 - footer_length, os.SEEK_END)
+        footer = json.loads(f.read(footer_length))
+
+        types = {column["name"]: column["type"] for column in footer["schema"]}
+        result = {}
+        for name in columns or list(types):
+            chunk = footer["columns"][name]
+            f.seek(chunk["offset"])
+            result[name] = _decode_column(types[name], f.read(chunk["length"]), footer["rows"])
+        return result
+
+
+def _arrow_schema(schema: List[tuple]):
+    arrow_types = {
+        "string": pa.string(),
+        "int32": pa.int32(),
+        "int64": pa.int64(),
+        "float64": pa.float64(),
+        "bool": pa.bool_(),
+        "list<string>": pa.list_(pa.string())
+    }
+    return pa.schema([(name, arrow_types[column_type]) for name, column_type in schema])
+
+
+def write_parquet(path: Path, schema: List[tuple], rows: List[tuple]) -> None:
+    """Write rows as a Parquet file (requires pyarrow)."""
+    columns = {name: [row[index] for row in rows] for index, (name, _) in enumerate(schema)}
+    table = pa.Table.from_pydict(columns, schema=_arrow_schema(schema))
+    temp_path = path.with_name(f".{path.name}.tmp")
+    pq.write_table(table, str(temp_path), compression="zstd")
+    os.replace(temp_path, path)
+
+
+class CorpusWriter:
+    """Buffers corpus rows for one batch and writes them as partition files.
+
+    Once any table buffers ``rows_per_part`` rows, every table is flushed
+    to a new part file, so memory stays bounded however many decks the
+    batch holds and each flush leaves whole decks on disk. Part numbers
+    continue after those already in the partition, so a batch id can be
+    reused without overwriting earlier parts.
+    """
+
+    def __init__(self, corpus_dir: str, batch_id: str, export_format: Optional[str] = None,
+                 rows_per_part: int = ROWS_PER_PART):
+        self.corpus_dir = Path(corpus_dir)
+        self.batch_id = batch_id
+        self.format = export_format or default_format()
+        if self.format == "parquet" and pa is None:
+            raise ValueError("Parquet export requires pyarrow (pip install pyarrow)")
+        self.rows_per_part = rows_per_part
+        self._rows = {table: [] for table in SCHEMAS}
+        # Next part number per table, found from the partition on first flush
+        self._parts = {}
+        self.files = []
+
+    def add(self, rows: Dict[str, List[tuple]]) -> List[str]:
+        """Append the rows of one deck (as built by ``deck_rows``).
+
+        When this flushes the buffers, every deck added so far is on disk
+        and the part files written are returned; otherwise the list is empty.
+        """
+        for table, table_rows in rows.items():
+            self._rows[table].extend(table_rows)
+        if any(len(self._rows[table]) >= self.rows_per_part for table in rows):
+            return self.flush()
+        return []
+
+    def flush(self) -> List[str]:
+        """Write every buffered row to new part files and return them."""
+        return [self._flush(table) for table in SCHEMAS if self._rows[table]]
+
+    def close(self) -> List[str]:
+        """Write any buffered rows and return the files written by this batch."""
+        self.flush()
+        return self.files
+
+    def _flush(self, table: str) -> str:
+        partition = self.corpus_dir / table / f"batch={self.batch_id}"
+        partition.mkdir(parents=True, exist_ok=True)
+        if table not in self._parts:
+            numbers = [int(match.group(1)) for match in map(PART_NAME_PATTERN.match, os.listdir(partition)) if match]
+            self._parts[table] = max(numbers, default=-1) + 1
+        path = partition / f"part-{self._parts[table]:05d}.{self.format}"
+
+        if self.format == "parquet":
+            write_parquet(path, SCHEMAS[table], self._rows[table])
+        else:
+            write_pcol(path, SCHEMAS[table], self._rows[table])
+
+        self.files.append(str(path))
+        self._parts[table] += 1
+        self._rows[table] = []
+        return str(path)
+
+
+def read_corpus(corpus_dir: str, table: str, columns: Optional[List[str]] = None,
+                batches: Optional[Iterable[str]] = None) -> Dict[str, List[Any]]:
+    """Read columns of a corpus table across its partitions (optionally only some batches)."""
+    wanted = set(batches) if batches is not None else None
+    names = columns or [name for name, _ in SCHEMAS[table]]
+    result = {name: [] for name in names}
+
+    for partition in sorted((Path(corpus_dir) / table).glob("batch=*")):
+        if wanted is not None and partition.name.split("=", 1)[1] not in wanted:
+            continue
+        for part in sorted(partition.glob("part-*")):
+            if part.suffix == ".pcol":
+                data = read_pcol(part, names)
+            elif part.suffix == ".parquet":
+                if pq is None:
+                    raise ValueError("Reading Parquet partitions requires pyarrow")
+                data = pq.read_table(str(part), columns=names).to_pydict()
+            else:
+                continue
+            for name in names:
+                result[name].extend(data[name])
+
+    return result
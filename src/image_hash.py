@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""Perceptual image hashes and a Hamming-distance index for matching images
+that differ only by scaling, re-encoding or small edits."""
+
+import io
+import json
+import hashlib
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple, Union
+
+from PIL import Image
+
+
+HASH_SIZE = 8
+DCT_SIZE = 32
+
+# Largest pHash distance (of 64 bits) at which two images count as the same
+MAX_MATCH_DISTANCE = 8
+
+BRAND_IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tif', '.tiff', '.webp'}
+
+_executor = None
+_brand_indexes = {}
+
+_DCT_COEFFICIENTS = [
+    [math.cos((2 * x + 1) * u * math.pi / (2 * DCT_SIZE)) for x in range(DCT_SIZE)]
+    for u in range(HASH_SIZE)
+]
+
+ImageSource = Union[str, Path, bytes]
+
+
+def _to_hex(bits: List[bool]) -> str:
+    return f"{sum(1 << i for i, bit in enumerate(reversed(bits)) if bit):0{len(bits) // 4}x}"
+
+
+def hamming(a: str, b: str) -> int:
+    """Number of differing bits between two hex hashes."""
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+def load_grayscale(source: ImageSource, size: int = DCT_SIZE) -> Image.Image:
+    """Decode an image to a small grayscale copy.
+
+    JPEG decoding is scaled down by the codec (``draft``) and other formats
+    are shrunk with ``reduce`` before the final resample, so large photos
+    cost little more than small ones.
+    """
+    image = Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+    image.draft('L', (size * 2, size * 2))
+    if image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info):
+        # Flatten transparency onto white, as the image would appear on a slide
+        image = image.convert('RGBA')
+        background = Image.new('RGBA', image.size, (255, 255, 255, 255))
+        image = Image.alpha_composite(background, image)
+    return image.convert('L').resize((size, size), Image.BILINEAR, reducing_gap=2.0)
+
+
+def average_hash(image: Image.Image) -> str:
+    """aHash: pixels of an 8x8 thumbnail compared with their mean."""
+    pixels = list(image.resize((HASH_SIZE, HASH_SIZE), Image.BILINEAR).getdata())
+    mean = sum(pixels) / len(pixels)
+    return _to_hex([pixel > mean for pixel in pixels])
+
+
+def difference_hash(image: Image.Image) -> str:
+    """dHash: horizontal gradients of a 9x8 thumbnail."""
+    pixels = list(image.resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR).getdata())
+    width = HASH_SIZE + 1
+    return _to_hex([
+        pixels[row * width + col] < pixels[row * width + col + 1]
+        for row in range(HASH_SIZE) for col in range(HASH_SIZE)
+    ])
+
+
+def perceptual_hash(image: Image.Image) -> str:
+    """pHash: low-frequency DCT coefficients of a 32x32 thumbnail compared with their median."""
+    if image.size != (DCT_SIZE, DCT_SIZE):
+        image = image.resize((DCT_SIZE, DCT_SIZE), Image.BILINEAR)
+    pixels = list(image.getdata())
+    rows = [pixels[y * DCT_SIZE:(y + 1) * DCT_SIZE] for y in range(DCT_SIZE)]
+
+    # Separable 2D DCT, computing only the 8x8 low-frequency block
+    row_coefficients = [
+        [sum(c * p for c, p in zip(_DCT_COEFFICIENTS[u], row)) for u in range(HASH_SIZE)]
+        for row in rows
+    ]
+    coefficients = [
+        sum(_DCT_COEFFICIENTS[v][y] * row_coefficients[y][u] for y in range(DCT_SIZE))
+        for v in range(HASH_SIZE) for u in range(HASH_SIZE)
+    ]
+
+    median = sorted(coefficients)[len(coefficients) // 2]
+    return _to_hex([coefficient > median for coefficient in coefficients])
+
+
+def image_hashes(source: ImageSource) -> Optional[Dict[str, str]]:
+    """Compute aHash, dHash and pHash for an image file or blob; None if it cannot be decoded."""
+    try:
+        image = load_grayscale(source)
+    except Exception:
+        return None
+    return {
+        'ahash': average_hash(image),
+        'dhash': difference_hash(image),
+        'phash': perceptual_hash(image)
+    }
+
+
+def shared_executor() -> ThreadPoolExecutor:
+    """Thread pool used for batched hashing, created on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1),
+                                       thread_name_prefix='image-hash')
+    return _executor
+
+
+def hash_images(sources: List[ImageSource], executor: Optional[ThreadPoolExecutor] = None) -> List[Optional[Dict[str, str]]]:
+    """Hash a batch of images, in parallel when an executor is given (Pillow decodes without the GIL)."""
+    if executor is None or len(sources) < 2:
+        return [image_hashes(source) for source in sources]
+    return list(executor.map(image_hashes, sources))
+
+
+class BKTree:
+    """BK-tree over hex hashes for Hamming-distance range queries.
+
+    Each node keeps the labels of every item with its hash; the triangle
+    inequality lets a query skip subtrees that cannot hold a close match.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, hash_value: str, label: Any) -> None:
+        self.size += 1
+        if self.root is None:
+            self.root = (hash_value, [label], {})
+            return
+
+        node = self.root
+        while True:
+            distance = hamming(hash_value, node[0])
+            if distance == 0:
+                node[1].append(label)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = (hash_value, [label], {})
+                return
+            node = child
+
+    def search(self, hash_value: str, max_distance: int) -> List[Tuple[int, Any]]:
+        """Return (distance, label) for every item within ``max_distance``, closest first."""
+        results = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node_hash, labels, children = stack.pop()
+            distance = hamming(hash_value, node_hash)
+            if distance <= max_distance:
+                results.extend((distance, label) for label in labels)
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        results.sort(key=lambda result: result[0])
+        return results
+
+
+class ImageHashIndex:
+    """Perceptual-hash index of labelled images, queried by pHash distance.
+
+    When backed by a file, entries are appended as JSON lines so several
+    processes can share one index; ``refresh`` picks up entries written by
+    others since the last read.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_distance: int = MAX_MATCH_DISTANCE):
+        self.path = Path(path) if path else None
+        self.max_distance = max_distance
+        self.tree = BKTree()
+        self.labels = set()
+        self._offset = 0
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Load entries appended to the index file since the last read."""
+        if not self.path or not self.path.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            f.seek(self._offset)
+            for line in iter(f.readline, ''):
+                if not line.endswith('\n'):
+                    # Partially written by another process; read it next time
+                    break
+                self._offset = f.tell()
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self._insert(entry['label'], entry['phash'])
+
+    def _insert(self, label: str, phash: str) -> None:
+        if label not in self.labels:
+            self.labels.add(label)
+            self.tree.add(phash, label)
+
+    def add(self, label: str, hashes: Dict[str, str]) -> None:
+        """Add an image; a label already in the index is ignored."""
+        if label in self.labels:
+            return
+        self._insert(label, hashes['phash'])
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            line = json.dumps({'label': label, 'phash': hashes['phash']}) + '\n'
+            # One O_APPEND write per entry keeps lines from different processes intact
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line.encode('utf-8'))
+            finally:
+                os.close(fd)
+
+    def match(self, hashes: Dict[str, str], exclude: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return indexed images within ``max_distance`` of an image, closest first."""
+        return [
+            {'label': label, 'distance': distance}
+            for distance, label in self.tree.search(hashes['phash'], self.max_distance)
+            if label != exclude
+        ]
+
+
+def load_brand_assets(directory: str, executor: Optional[ThreadPoolExecutor] = None) -> ImageHashIndex:
+    """Build an in-memory index of the brand images in a directory, labelled by filename.
+
+    Files that cannot be decoded are skipped.
+    """
+    index = ImageHashIndex()
+    paths = _brand_image_paths(directory)
+    for path, hashes in zip(paths, hash_images(paths, executor)):
+        if hashes:
+            index.add(path.name, hashes)
+    return index
+
+
+def _brand_image_paths(directory: str) -> List[Path]:
+    """Image files directly in a brand assets directory, by name."""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    return sorted(
+        path for path in directory.iterdir()
+        if path.is_file() and path.suffix.lower() in BRAND_IMAGE_EXTENSIONS
+    )
+
+
+def brand_assets_digest(directory: str) -> str:
+    """Digest of the brand images in a directory by name, size and mtime, which changes whenever its index would."""
+    digest = hashlib.sha256()
+    for path in _brand_image_paths(directory):
+        stat = path.stat()
+        digest.update(f"{path.name}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def brand_asset_index(directory: str) -> ImageHashIndex:
+    """Return the brand asset index for a directory, rebuilt only when the directory changes."""
+    try:
+        mtime = os.stat(directory).st_mtime
+    except OSError:
+        mtime = None
+
+    cached = _brand_indexes.get(directory)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, load_brand_assets(directory, shared_executor()))
+        _brand_indexes[directory] = cached
+    return cached[1]
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Timing spans, counters and optional profiling for one analysis run."""
+
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+from typing import Dict, List, Any, Optional
+
+PROFILE_MODES = ('cpu', 'memory', 'all')
+
+
+class _Span:
+    """Context manager adding its elapsed time to a named timing."""
+
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics: 'Metrics', name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _Capture:
+    """Context manager running cProfile and/or tracemalloc for the metrics it belongs to."""
+
+    def __init__(self, metrics: 'Metrics', cpu: bool, memory: bool):
+        self.metrics = metrics
+        self.cpu = cpu
+        self.memory = memory
+        self.profiler = None
+        self.started_tracing = False
+
+    def __enter__(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        if self.cpu:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.profiler:
+            self.profiler.disable()
+            self.metrics.profile = profile_summary(self.profiler)
+        if self.memory and tracemalloc.is_tracing():
+            self.metrics.memory = memory_summary(tracemalloc.take_snapshot(), tracemalloc.get_traced_memory()[1])
+            if self.started_tracing:
+                tracemalloc.stop()
+        return False
+
+
+def profile_summary(profiler: cProfile.Profile, limit: int = 25) -> List[Dict[str, Any]]:
+    """The ``limit`` functions with the most cumulative time."""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+        rows.append({
+            'function': f"{filename}:{line}({function})",
+            'calls': calls,
+            'total_seconds': round(total, 6),
+            'cumulative_seconds': round(cumulative, 6)
+        })
+    rows.sort(key=lambda row: row['cumulative_seconds'], reverse=True)
+    return rows[:limit]
+
+
+def memory_summary(snapshot: tracemalloc.Snapshot, peak: int, limit: int = 10) -> Dict[str, Any]:
+    """Peak traced memory and the source lines holding the most memory at the end of the capture."""
+    top = []
+    for stat in snapshot.statistics('lineno')[:limit]:
+        frame = stat.traceback[0]
+        top.append({'location': f"{frame.filename}:{frame.lineno}", 'bytes': stat.size, 'count': stat.count})
+    return {'peak_bytes': peak, 'top_allocations': top}
+
+
+class Metrics:
+    """Instrumentation for one analysis run.
+
+    ``span`` accumulates wall time per named phase (spans may nest, e.g.
+    ``image_write`` time is also part of ``analyze_slides``), ``count``
+    increments counters, and ``slide`` records per-slide timings. ``capture``
+    optionally wraps a block in cProfile and/or tracemalloc.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.counters = {}
+        self.slides = []
+        self.profile = None
+        self.memory = None
+
+    def span(self, name: str) -> _Span:
+        return _Span(self, name)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        timing = self.timings.get(name)
+        if timing is None:
+            self.timings[name] = [1, seconds]
+        else:
+            timing[0] += 1
+            timing[1] += seconds
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def slide(self, slide_number: int, seconds: float, shapes: int) -> None:
+        self.slides.append((slide_number, seconds, shapes))
+
+    def capture(self, mode: Optional[str]) -> _Capture:
+        """Profile the block with ``mode`` 'cpu', 'memory' or 'all'; None captures nothing."""
+        if mode and mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        return _Capture(self, mode in ('cpu', 'all'), mode in ('memory', 'all'))
+
+    def slowest_slides(self, limit: int = 5) -> List[Dict[str, Any]]:
+        slides = sorted(self.slides, key=lambda slide: slide[1], reverse=True)[:limit]
+        return [{'slide_number': number, 'seconds': round(seconds, 6), 'shapes': shapes}
+                for number, seconds, shapes in slides]
+
+    def to_dict(self, slide_limit: Optional[int] = None) -> Dict[str, Any]:
+        """JSON-ready metrics; ``slide_limit`` keeps only that many of the slowest slides."""
+        if slide_limit is None:
+            slides = [{'slide_number': number, 'seconds': round(seconds, 6), 'shapes': shapes}
+                      for number, seconds, shapes in self.slides]
+        else:
+            slides = self.slowest_slides(slide_limit)
+
+        result = {
+            'timings': {name: {'count': count, 'seconds': round(seconds, 6)}
+                        for name, (count, seconds) in self.timings.items()},
+            'counters': dict(self.counters),
+            'slides': slides
+        }
+        if self.profile is not None:
+            result['profile'] = self.profile
+        if self.memory is not None:
+            result['memory'] = self.memory
+        return result
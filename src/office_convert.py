@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""Format detection and headless LibreOffice conversion for decks python-pptx cannot open."""
+
+import os
+import queue
+import shutil
+import signal
+import struct
+import subprocess
+import tempfile
+import time
+import weakref
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+try:
+    from pptx_package import main_document_part
+    from analysis_cache import hash_file, link_or_copy
+except ImportError:
+    # Imported as src.office_convert from the asset manager
+    from src.pptx_package import main_document_part
+    from src.analysis_cache import hash_file, link_or_copy
+
+
+# Formats returned by detect_format
+FORMAT_PPTX = "pptx"    # opened directly by python-pptx
+FORMAT_PPT = "ppt"      # PowerPoint 97-2003 binary, converted
+FORMAT_OOXML = "ooxml"  # slide show or template package, converted
+
+CONVERTIBLE_FORMATS = (FORMAT_PPT, FORMAT_OOXML)
+
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+DEFAULT_TIMEOUT = 120
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+ZIP_MAGIC = b"PK\x03\x04"
+OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+NATIVE_CONTENT_TYPES = {
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation.main+xml",
+    "application/vnd.ms-powerpoint.presentation.macroEnabled.main+xml"
+}
+CONVERTIBLE_CONTENT_TYPES = {
+    "application/vnd.openxmlformats-officedocument.presentationml.slideshow.main+xml",
+    "application/vnd.openxmlformats-officedocument.presentationml.template.main+xml",
+    "application/vnd.ms-powerpoint.slideshow.macroEnabled.main+xml",
+    "application/vnd.ms-powerpoint.template.macroEnabled.main+xml"
+}
+
+# Compound File Binary (OLE2) layout, for finding the stream every .ppt has
+OLE_END_OF_CHAIN = 0xFFFFFFFE
+OLE_DIRECTORY_ENTRY_SIZE = 128
+OLE_MAX_DIRECTORY_SECTORS = 4096
+PPT_STREAM_NAME = "PowerPoint Document"
+
+# LibreOffice export filters by target extension. PDFs keep hidden slides
+# so that page N is always slide N
+EXPORT_FILTERS = {
+    "pptx": "pptx:Impress MS PowerPoint 2007 XML",
+    "pdf": 'pdf:impress_pdf_Export:{"ExportHiddenSlides":{"type":"boolean","value":"true"}}'
+}
+
+
+class UnsupportedFormatError(ValueError):
+    """The file is not a presentation format that can be analysed."""
+
+
+class ConversionError(RuntimeError):
+    """LibreOffice is unavailable, failed, or timed out."""
+
+
+def detect_format(filepath: str) -> Optional[str]:
+    """Classify a file by its leading bytes, without loading it as a presentation.
+
+    Returns ``FORMAT_PPTX``, ``FORMAT_PPT`` or ``FORMAT_OOXML``, or None
+    for anything else (other Office documents, corrupt or unrelated files).
+    Zip packages are told apart by the content type of their main part, and
+    OLE2 files by the presence of a PowerPoint Document stream, so a Word
+    document renamed to .ppt is rejected too.
+    """
+    with open(filepath, 'rb') as f:
+        magic = f.read(8)
+        if magic.startswith(ZIP_MAGIC):
+            return _ooxml_format(f)
+        if magic == OLE_MAGIC:
+            return FORMAT_PPT if _ole_has_stream(f, PPT_STREAM_NAME) else None
+    return None
+
+
+def _ooxml_format(f) -> Optional[str]:
+    try:
+        with zipfile.ZipFile(f) as zf:
+            part_name = main_document_part(zf)
+            root = ET.fromstring(zf.read("[Content_Types].xml"))
+    except (zipfile.BadZipFile, KeyError, ET.ParseError):
+        return None
+
+    content_type = None
+    for override in root.iter(f"{{{CT_NS}}}Override"):
+        if override.get("PartName", "").lstrip("/") == part_name:
+            content_type = override.get("ContentType")
+            break
+    if content_type in NATIVE_CONTENT_TYPES:
+        return FORMAT_PPTX
+    if content_type in CONVERTIBLE_CONTENT_TYPES:
+        return FORMAT_OOXML
+    return None
+
+
+def _ole_has_stream(f, stream_name: str) -> bool:
+    """Walk the directory of a Compound File Binary looking for a named stream.
+
+    Only the FAT sectors on the directory's chain are read, so this costs a
+    few small reads however large the file is.
+    """
+    f.seek(0)
+    header = f.read(512)
+    if len(header) < 512:
+        return False
+    sector_size = 1 << struct.unpack_from("<H", header, 0x1E)[0]
+    if sector_size not in (512, 4096):
+        return False
+    first_directory, = struct.unpack_from("<I", header, 0x30)
+    first_difat, difat_count = struct.unpack_from("<II", header, 0x44)
+    fat_sectors = list(struct.unpack_from("<109I", header, 0x4C))
+    per_sector = sector_size // 4
+
+    def read_sector(sector: int) -> bytes:
+        f.seek((sector + 1) * sector_size)
+        data = f.read(sector_size)
+        if len(data) < sector_size:
+            raise EOFError
+        return data
+
+    try:
+        # FAT sector locations beyond the first 109 are listed in the DIFAT chain
+        sector = first_difat
+        for _ in range(min(difat_count, OLE_MAX_DIRECTORY_SECTORS)):
+            if sector >= OLE_END_OF_CHAIN:
+                break
+            entries = struct.unpack(f"<{per_sector}I", read_sector(sector))
+            fat_sectors.extend(entries[:-1])
+            sector = entries[-1]
+
+        fat_cache = {}
+
+        def next_sector(sector: int) -> int:
+            index, offset = divmod(sector, per_sector)
+            if index not in fat_cache:
+                fat_cache[index] = read_sector(fat_sectors[index])
+            return struct.unpack_from("<I", fat_cache[index], offset * 4)[0]
+
+        target = stream_name.encode("utf-16-le")
+        sector = first_directory
+        seen = set()
+        while sector < OLE_END_OF_CHAIN and sector not in seen and len(seen) < OLE_MAX_DIRECTORY_SECTORS:
+            seen.add(sector)
+            data = read_sector(sector)
+            for offset in range(0, sector_size, OLE_DIRECTORY_ENTRY_SIZE):
+                name_length, = struct.unpack_from("<H", data, offset + 64)
+                object_type = data[offset + 66]
+                # Name length counts the UTF-16 terminator; type 2 is a stream
+                if object_type == 2 and data[offset:offset + max(0, name_length - 2)] == target:
+                    return True
+            sector = next_sector(sector)
+    except (EOFError, IndexError, struct.error):
+        return False
+    return False
+
+
+def find_soffice() -> Optional[str]:
+    """Locate the LibreOffice binary: $PPT_SOFFICE, else soffice or libreoffice on the PATH."""
+    return os.environ.get('PPT_SOFFICE') or shutil.which('soffice') or shutil.which('libreoffice')
+
+
+class OfficeConverter:
+    """Bounded pool of headless LibreOffice conversions, cached by content hash.
+
+    At most ``workers`` LibreOffice processes run at once per converter,
+    each with its own user profile (LibreOffice refuses to share one between
+    concurrent instances) that is kept for later conversions in that slot.
+    A conversion that runs past ``timeout`` seconds has its process group
+    killed. Results are stored as ``<sha256>.<format>`` in ``cache_dir`` and
+    evicted least-recently-used first past ``max_bytes``.
+    """
+
+    def __init__(self, cache_dir: str, workers: int = DEFAULT_WORKERS, timeout: float = DEFAULT_TIMEOUT,
+                 max_bytes: int = DEFAULT_MAX_BYTES, soffice: Optional[str] = None):
+        self.cache_dir = Path(cache_dir)
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.soffice = soffice or find_soffice()
+
+        self._profile_root = tempfile.mkdtemp(prefix="soffice-profiles-")
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self._profile_root, True)
+        self._slots = queue.Queue()
+        for slot in range(self.workers):
+            self._slots.put(Path(self._profile_root) / str(slot))
+
+    def close(self) -> None:
+        """Remove the LibreOffice profiles; cached conversions are kept."""
+        self._finalizer()
+
+    def cached_path(self, sha256: str, target_format: str = "pptx") -> Path:
+        return self.cache_dir / f"{sha256}.{target_format}"
+
+    def convert(self, source: str, target_format: str = "pptx", sha256: Optional[str] = None) -> Dict[str, Any]:
+        """Convert ``source`` (or reuse an earlier conversion of identical content).
+
+        Returns ``path`` (the converted file in the cache), ``cached`` and
+        ``seconds``. Raises ConversionError when LibreOffice is missing,
+        fails, or times out.
+        """
+        start = time.perf_counter()
+        sha256 = sha256 or hash_file(source)
+        destination = self.cached_path(sha256, target_format)
+        if destination.exists():
+            try:
+                # Mark as recently used for LRU eviction
+                os.utime(destination)
+                return {'path': str(destination), 'cached': True, 'seconds': time.perf_counter() - start}
+            except FileNotFoundError:
+                # Evicted between the check and the touch
+                pass
+
+        if not self.soffice:
+            raise ConversionError("LibreOffice (soffice) was not found; set PPT_SOFFICE to convert legacy decks")
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        profile = self._slots.get()
+        try:
+            work_dir = Path(tempfile.mkdtemp(prefix=".convert_", dir=self.cache_dir))
+            try:
+                # A fixed input name keeps odd upload names away from the command line
+                staged = work_dir / f"source{Path(source).suffix.lower()}"
+                link_or_copy(Path(source), staged)
+                output = self._run(profile, staged, target_format, work_dir / "out")
+                os.replace(output, destination)
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+        finally:
+            self._slots.put(profile)
+
+        self.evict()
+        return {'path': str(destination), 'cached': False, 'seconds': time.perf_counter() - start}
+
+    def convert_many(self, sources: List[str], target_format: str = "pptx") -> Dict[str, Any]:
+        """Convert several files across the pool; maps each source to its result or its exception."""
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='soffice') as executor:
+            futures = {source: executor.submit(self.convert, source, target_format) for source in sources}
+            for source, future in futures.items():
+                try:
+                    results[source] = future.result()
+                except Exception as e:
+                    results[source] = e
+        return results
+
+    def _run(self, profile: Path, source: Path, target_format: str, out_dir: Path) -> Path:
+        """Run one LibreOffice conversion and return the file it wrote."""
+        command = [
+            self.soffice,
+            f"-env:UserInstallation={profile.resolve().as_uri()}",
+            "--headless", "--norestore", "--nologo", "--nodefault", "--nolockcheck",
+            "--convert-to", EXPORT_FILTERS.get(target_format, target_format),
+            "--outdir", str(out_dir),
+            str(source)
+        ]
+        # A session of its own lets a timeout kill LibreOffice's helper processes too
+        process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT, start_new_session=True)
+        try:
+            output, _ = process.communicate(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.communicate()
+            raise ConversionError(f"LibreOffice timed out after {self.timeout}s")
+
+        converted = out_dir / f"{source.stem}.{target_format}"
+        # LibreOffice can exit 0 without writing anything when the import fails
+        if process.returncode != 0 or not converted.exists():
+            detail = output.decode('utf-8', 'replace').strip().splitlines()
+            raise ConversionError(f"LibreOffice could not convert the file{': ' + detail[-1] if detail else ''}")
+        return converted
+
+    def evict(self) -> None:
+        """Remove least-recently-used conversions until the cache fits in ``max_bytes``."""
+        entries = []
+        total_size = 0
+        for path in self.cache_dir.iterdir():
+            if path.name.startswith('.') or not path.is_file():
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                # Removed by a concurrent eviction
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+
+        entries.sort(key=lambda entry: entry[0])
+        for _, size, path in entries:
+            if total_size <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            total_size -= size
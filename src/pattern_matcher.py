@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Single-pass multi-pattern matching for compliance, brand and tag detection."""
+
+import re
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Set, Optional
+
+
+# Default detection patterns. A patterns file uses the same structure and
+# replaces any section it defines.
+DEFAULT_PATTERNS = {
+    "copyright": [
+        "©", "copyright", "(c)", "©️", "all rights reserved"
+    ],
+    "confidentiality": [
+        "confidential", "proprietary", "internal", "restricted", "private",
+        "not for distribution", "do not distribute", "internal use only"
+    ],
+    "company": [
+        "inc.", "llc", "corp.", "corporation", "ltd.", "limited", "company"
+    ],
+    "brand": [
+        "garden", "giving", "company", "corp", "inc", "llc", "ltd",
+        "©", "copyright", "trademark", "™", "®", "all rights reserved"
+    ],
+    "tags": {
+        "agenda": ["agenda"],
+        "introduction": ["introduction", "overview"],
+        "conclusion": ["conclusion", "summary", "thank you"]
+    },
+    "whole_words": False
+}
+
+
+def load_patterns(patterns_file: Optional[str] = None) -> Dict:
+    """Load detection patterns, overlaying a JSON patterns file on the defaults."""
+    patterns = dict(DEFAULT_PATTERNS)
+    if patterns_file:
+        with open(patterns_file, 'r', encoding='utf-8') as f:
+            patterns.update(json.load(f))
+    return patterns
+
+
+@dataclass
+class PatternMatch:
+    pattern: str
+    categories: List[str]
+    start: int
+    end: int
+
+
+class PatternMatcher:
+    """Finds every occurrence of many literal patterns in one scan of the text.
+
+    All patterns are compiled into a single regex whose alternatives sit in a
+    zero-width lookahead, so the scan reports a match at every position
+    (including overlapping ones). Alternatives are ordered longest first; any
+    shorter pattern matching at the same position is a prefix of the longest
+    one and is reported alongside it. Matching is case-insensitive: callers
+    may pass text that is already lowercased.
+    """
+
+    def __init__(self, categories: Dict[str, List[str]], whole_words: bool = False):
+        self.categories = {name: [p.lower() for p in patterns] for name, patterns in categories.items()}
+        self.whole_words = whole_words
+
+        self._pattern_categories = {}
+        for name, patterns in self.categories.items():
+            for pattern in patterns:
+                pattern_categories = self._pattern_categories.setdefault(pattern, [])
+                if name not in pattern_categories:
+                    pattern_categories.append(name)
+
+        ordered = sorted(self._pattern_categories, key=len, reverse=True)
+        self._prefixes = {
+            pattern: [other for other in ordered if other != pattern and pattern.startswith(other)]
+            for pattern in ordered
+        }
+        self._pattern_regexes = {pattern: re.compile(self._compile_pattern(pattern)) for pattern in ordered}
+        alternatives = '|'.join(self._compile_pattern(pattern) for pattern in ordered)
+        self._regex = re.compile(f"(?=({alternatives}))") if ordered else None
+
+    def _compile_pattern(self, pattern: str) -> str:
+        """Escape a literal pattern, adding word boundaries where its ends are word characters."""
+        expression = re.escape(pattern)
+        if self.whole_words:
+            if re.match(r'\w', pattern):
+                expression = r'(?<!\w)' + expression
+            if re.search(r'\w$', pattern):
+                expression = expression + r'(?!\w)'
+        return expression
+
+    def find_all(self, text: str) -> List[PatternMatch]:
+        """Return every pattern occurrence with its categories and position.
+
+        Positions are offsets into the lowercased text.
+        """
+        if not self._regex or not text:
+            return []
+
+        text = text.lower()
+        matches = []
+        for match in self._regex.finditer(text):
+            start = match.start()
+            longest = match.group(1)
+            for pattern in [longest] + self._prefixes[longest]:
+                # A prefix may still end mid-word when whole words are required
+                if self.whole_words and pattern != longest and not self._pattern_regexes[pattern].match(text, start):
+                    continue
+                matches.append(PatternMatch(
+                    pattern=pattern,
+                    categories=self._pattern_categories[pattern],
+                    start=start,
+                    end=start + len(pattern)
+                ))
+        return matches
+
+    def match_categories(self, text: str) -> Dict[str, Set[str]]:
+        """Return the set of patterns found in ``text`` for each category."""
+        hits = {}
+        for match in self.find_all(text):
+            for category in match.categories:
+                hits.setdefault(category, set()).add(match.pattern)
+        return hits
@@ -3,11 +3,15 @@
 import os
 import json
 import csv
+import tempfile
 import hashlib
+import zipfile
+import posixpath
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, asdict
+from typing import Dict, List, Any, Optional, Iterator
+from dataclasses import dataclass, asdict, field, fields, replace
 
 import click
 from pptx import Presentation
@@ -26,6 +30,26 @@ except ImportError:
     MSO_AUTO_SIZE = None
 from PIL import Image
 
+try:
+    from pptx_package import read_relationships, slide_part_names, slide_part_hashes, core_properties, RT_IMAGE
+    from pattern_matcher import PatternMatcher, load_patterns
+    from slide_fingerprint import slide_fingerprint
+    from image_hash import hash_images, shared_executor, brand_asset_index, brand_assets_digest
+    from records import (Positioning, FontInfo, TextShape, GraphicElement, TextLogo, ImageLogo,
+                         DeckColumns, to_json_value)
+    from metrics import Metrics, PROFILE_MODES
+except ImportError:
+    # Imported as src.ppt_inspector from the asset manager
+    from src.pptx_package import read_relationships, slide_part_names, slide_part_hashes, core_properties, RT_IMAGE
+    from src.pattern_matcher import PatternMatcher, load_patterns
+    from src.slide_fingerprint import slide_fingerprint
+    from src.image_hash import hash_images, shared_executor, brand_asset_index, brand_assets_digest
+    from src.records import (Positioning, FontInfo, TextShape, GraphicElement, TextLogo, ImageLogo,
+                             DeckColumns, to_json_value)
+    from src.metrics import Metrics, PROFILE_MODES
+
+INSPECTOR_VERSION = "1.2.1"
+
 
 @dataclass
 class SlideInfo:
@@ -35,11 +59,19 @@ class SlideInfo:
     shape_count: int
     image_count: int
     image_files: List[str]
-    text_shapes: List[Dict[str, Any]]
-    graphic_elements: List[Dict[str, Any]]
-    logos_and_brands: List[Dict[str, Any]]
+    text_shapes: List[TextShape]
+    graphic_elements: List[GraphicElement]
+    logos_and_brands: List[Any]
     tags: List[str]
     notes: Optional[str]
+    fingerprint: Optional[Dict[str, Any]] = None
+    image_details: List[Dict[str, Any]] = field(default_factory=list)
+    # Rendered slide image (file, width, height), when previews are produced
+    preview: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize to the dict written to exports, expanding shape records."""
+        return {f.name: to_json_value(getattr(self, f.name)) for f in fields(self)}
 
 
 @dataclass
@@ -62,46 +94,183 @@ class DocumentMetadata:
 
 
 class PowerPointInspector:
-    def __init__(self, filepath: str, output_dir: str = "exports", image_dir: str = "images"):
+    def __init__(self, filepath: str, output_dir: str = "exports", image_dir: str = "images",
+                 image_store: Optional[str] = None, patterns_file: Optional[str] = None,
+                 brand_assets_dir: Optional[str] = None):
         self.filepath = Path(filepath)
         self.output_dir = Path(output_dir)
         self.image_dir = Path(image_dir)
+        # Optional content-addressed directory shared across decks; when set,
+        # each unique image is written once as <sha1>.<ext> and slides refer to it by that name
+        self.image_store = Path(image_store) if image_store else None
+        # Image filenames already written (or found on disk) during this run
+        self._stored_images = set()
+        # Perceptual hashes per image filename, and blobs waiting to be hashed
+        self._image_hashes = {}
+        self._pending_image_blobs = {}
+        # Known brand images that extracted images are matched against
+        self.brand_assets_dir = str(brand_assets_dir) if brand_assets_dir else None
+        self.brand_index = brand_asset_index(self.brand_assets_dir) if brand_assets_dir else None
         self.presentation = None
         self.metadata = None
         self.slides_info = []
+        # Phase timings and counters for this run
+        self.metrics = Metrics()
+
+        # Results of the single shape traversal shared by slide and document analysis
+        self._analyzed = False
+        self._reset_aggregates()
+
+        # Previously analysed slides by part hash (see reuse_slides), and this
+        # deck's hashes and picture counts per slide
+        self._previous_slides = {}
+        self._slide_hashes = None
+        self.slide_pictures = []
 
         self.output_dir.mkdir(exist_ok=True)
         self.image_dir.mkdir(exist_ok=True)
-
-        # Common patterns for detection
-        self.copyright_patterns = [
-            "©", "copyright", "(c)", "©️", "all rights reserved"
-        ]
-        self.confidentiality_patterns = [
-            "confidential", "proprietary", "internal", "restricted", "private",
-            "not for distribution", "do not distribute", "internal use only"
-        ]
-        self.company_patterns = [
-            "inc.", "llc", "corp.", "corporation", "ltd.", "limited", "company"
-        ]
+        if self.image_store:
+            self.image_store.mkdir(parents=True, exist_ok=True)
+
+        # Detection patterns, compiled into a single matcher scanned once per text
+        patterns = self.patterns = load_patterns(patterns_file)
+        self.copyright_patterns = patterns["copyright"]
+        self.confidentiality_patterns = patterns["confidentiality"]
+        self.company_patterns = patterns["company"]
+        self.brand_patterns = patterns["brand"]
+        self.tag_patterns = patterns["tags"]
+        self.matcher = PatternMatcher({
+            "copyright": self.copyright_patterns,
+            "confidentiality": self.confidentiality_patterns,
+            "company": self.company_patterns,
+            "brand": self.brand_patterns,
+            **{f"tag:{tag}": words for tag, words in self.tag_patterns.items()}
+        }, whole_words=patterns.get("whole_words", False))
 
     def load_presentation(self) -> None:
         """Load PowerPoint presentation."""
         if not self.filepath.exists():
             raise FileNotFoundError(f"File not found: {self.filepath}")
 
-        self.presentation = Presentation(str(self.filepath))
+        with self.metrics.span('load_presentation'):
+            self.presentation = Presentation(str(self.filepath))
         print(f"Loaded presentation: {self.filepath.name}")
         print(f"Total slides: {len(self.presentation.slides)}")
 
+    def load_cached_analysis(self, metadata: DocumentMetadata, slides_info: List[SlideInfo]) -> None:
+        """Populate the inspector from a previously stored analysis instead of loading the deck."""
+        self.metadata = metadata
+        self.slides_info = slides_info
+        self.metrics.count('analysis_cache_hits')
+        self._reset_aggregates()
+        for slide_info in slides_info:
+            self._accumulate_slide(slide_info)
+        self._total_images = metadata.total_images
+        self._company_mentions.update(metadata.company_mentions)
+        self._copyright_notices.update(metadata.copyright_notices)
+        self._confidentiality_labels.update(metadata.confidentiality_labels)
+        self._analyzed = True
+
+    def extract_metadata_only(self) -> DocumentMetadata:
+        """Read document properties and slide count straight from the zip archive.
+
+        Only ``docProps/core.xml`` and the presentation part are parsed; no
+        slide object model is built and no shapes are analyzed, so image
+        counts and compliance matches are left empty.
+        """
+        if not self.filepath.exists():
+            raise FileNotFoundError(f"File not found: {self.filepath}")
+
+        with self.metrics.span('read_metadata'), zipfile.ZipFile(self.filepath) as zf:
+            props = core_properties(zf)
+            slide_count = len(slide_part_names(zf))
+
+        self.metadata = DocumentMetadata(
+            filename=self.filepath.name,
+            file_size=self.filepath.stat().st_size,
+            created_date=props["created"],
+            modified_date=props["modified"],
+            author=props["author"],
+            title=props["title"],
+            subject=props["subject"],
+            category=props["category"],
+            comments=props["comments"],
+            slide_count=slide_count,
+            total_images=0,
+            company_mentions=[],
+            copyright_notices=[],
+            confidentiality_labels=[],
+            custom_tags=[]
+        )
+        return self.metadata
+
     def extract_document_metadata(self) -> DocumentMetadata:
         """Extract document-level metadata and properties."""
+        # Document-wide aggregates come from the single shape traversal
+        self._ensure_analyzed()
+        self.metadata = self._build_metadata()
+        return self.metadata
+
+    def extract_slide_content(self) -> List[SlideInfo]:
+        """Extract content from each slide."""
+        self._ensure_analyzed()
+        return self.slides_info
+
+    def to_columns(self) -> DeckColumns:
+        """Return the analysed slides in array-backed form, for holding many decks in memory."""
+        self._ensure_analyzed()
+        return DeckColumns.from_slides(self.slides_info)
+
+    def iter_slides(self, retain: bool = True) -> Iterator[SlideInfo]:
+        """Yield each slide's SlideInfo as soon as it has been analyzed.
+
+        Document-level aggregates are updated as slides are yielded, so
+        ``current_metadata()`` reflects every slide seen so far. With
+        ``retain=False`` slides are not kept on the inspector, which keeps
+        memory flat but means a later ``extract_slide_content()`` walks the
+        deck again.
+        """
+        if self._analyzed:
+            yield from self.slides_info
+            return
+
+        slides_info = []
+        for slide_info in self._iter_analyzed_slides():
+            if retain:
+                slides_info.append(slide_info)
+            yield slide_info
+
+        if retain:
+            self.slides_info = slides_info
+            self._analyzed = True
+
+    def current_metadata(self) -> DocumentMetadata:
+        """Return document metadata with the aggregates accumulated so far.
+
+        Core properties and the slide count are available before any slide
+        has been analyzed; image counts and compliance matches grow as
+        ``iter_slides()`` advances.
+        """
+        return self._build_metadata()
+
+    def _build_metadata(self) -> DocumentMetadata:
+        """Build document metadata from core properties and the traversal aggregates.
+
+        After ``load_cached_analysis()`` no presentation is loaded, so the
+        stored metadata supplies the properties instead.
+        """
+        aggregates = dict(
+            total_images=self._total_images,
+            company_mentions=self._ordered_matches(self._company_mentions, self.company_patterns),
+            copyright_notices=self._ordered_matches(self._copyright_notices, self.copyright_patterns),
+            confidentiality_labels=self._ordered_matches(self._confidentiality_labels, self.confidentiality_patterns)
+        )
+        if self.presentation is None and self.metadata is not None:
+            return replace(self.metadata, custom_tags=list(self.metadata.custom_tags), **aggregates)
+
         core_props = self.presentation.core_properties
         file_stats = self.filepath.stat()
 
-        # Collect all text for pattern analysis
-        all_text = self._get_all_text_content()
-
         metadata = DocumentMetadata(
             filename=self.filepath.name,
             file_size=file_stats.st_size,
@@ -113,126 +282,265 @@ class PowerPointInspector:
             category=core_props.category,
             comments=core_props.comments,
             slide_count=len(self.presentation.slides),
-            total_images=self._count_total_images(),
-            company_mentions=self._find_pattern_matches(all_text, self.company_patterns),
-            copyright_notices=self._find_pattern_matches(all_text, self.copyright_patterns),
-            confidentiality_labels=self._find_pattern_matches(all_text, self.confidentiality_patterns),
-            custom_tags=[]
+            custom_tags=[],
+            **aggregates
         )
 
-        self.metadata = metadata
         return metadata
 
-    def extract_slide_content(self) -> List[SlideInfo]:
-        """Extract content from each slide."""
-        slides_info = []
+    def settings_digest(self) -> str:
+        """Digest of what shapes an analysis besides the deck itself: the
+        detection patterns and the brand images matched against."""
+        digest = hashlib.sha256(json.dumps(self.patterns, sort_keys=True).encode('utf-8'))
+        if self.brand_assets_dir:
+            digest.update(brand_assets_digest(self.brand_assets_dir).encode())
+        return digest.hexdigest()
+
+    def slide_hashes(self) -> List[str]:
+        """Content hash of each slide's parts, in slide order (see ``slide_part_hashes``)."""
+        if self._slide_hashes is None:
+            with self.metrics.span('slide_hashing'), zipfile.ZipFile(self.filepath) as zf:
+                self._slide_hashes = slide_part_hashes(zf)
+        return self._slide_hashes
+
+    def reuse_slides(self, slides: List[Dict[str, Any]], slide_parts: List[Dict[str, Any]]) -> None:
+        """Offer a previous analysis of an earlier version of this deck for reuse.
+
+        ``slides`` are serialized SlideInfo dicts and ``slide_parts`` their
+        ``{'hash', 'pictures'}`` entries. During the traversal, a slide whose
+        part hash matches a previous slide is taken from that result instead
+        of being analysed again, as long as its images are present. Without
+        an image store, image names include the slide number, so only slides
+        that kept their position are reused.
+        """
+        self._previous_slides = {
+            part['hash']: (slide, part['pictures'])
+            for slide, part in zip(slides, slide_parts)
+        }
 
-        for i, slide in enumerate(self.presentation.slides):
-            slide_info = self._analyze_slide(slide, i + 1)
-            slides_info.append(slide_info)
+    def _reused_slide(self, slide_hash: str, slide_number: int) -> Optional[SlideInfo]:
+        """Rebuild a previously analysed slide at ``slide_number``, or None if it cannot be reused."""
+        previous = self._previous_slides.get(slide_hash)
+        if not previous:
+            return None
+        slide, pictures = previous
+        if not self.image_store and slide['slide_number'] != slide_number:
+            return None
 
-        self.slides_info = slides_info
-        return slides_info
+        image_dir = self.image_store or self.image_dir
+        if not all((image_dir / filename).exists() for filename in slide['image_files']):
+            return None
+
+        slide = dict(slide, slide_number=slide_number)
+        for key in ('text_shapes', 'graphic_elements', 'logos_and_brands'):
+            slide[key] = [dict(item, slide_number=slide_number) for item in slide[key]]
+        slide_info = SlideInfo(**slide)
+
+        # Restore what the traversal would have accumulated for this slide
+        self._total_images += pictures
+        self._accumulate_matches(self.matcher.match_categories(' '.join(slide_info.text_content)))
+        self._stored_images.update(slide_info.image_files)
+        for detail in slide_info.image_details:
+            if detail.get('phash'):
+                self._image_hashes.setdefault(detail['file'], {
+                    'ahash': detail['ahash'], 'dhash': detail['dhash'], 'phash': detail['phash']})
+        return slide_info
+
+    def _ensure_analyzed(self) -> None:
+        """Walk every slide's shape tree once, collecting slides, images and text together."""
+        for _ in self.iter_slides():
+            pass
+
+    def _iter_analyzed_slides(self) -> Iterator[SlideInfo]:
+        """Analyze slides one at a time, accumulating document-level aggregates as they are yielded."""
+        self._reset_aggregates()
+        self.slide_pictures = []
+        slides = self.presentation.slides
+        hashes = self.slide_hashes() if self._previous_slides else None
+        if hashes is not None and len(hashes) != len(slides):
+            hashes = None
+
+        for i, slide in enumerate(slides):
+            start = time.perf_counter()
+            pictures = self._total_images
+            slide_info = self._reused_slide(hashes[i], i + 1) if hashes else None
+            if slide_info is None:
+                slide_info = self._analyze_slide(slide, i + 1)
+            else:
+                self.metrics.count('slides_reused')
+            self.slide_pictures.append(self._total_images - pictures)
+            self._accumulate_slide(slide_info)
+            seconds = time.perf_counter() - start
+            self.metrics.add_time('analyze_slides', seconds)
+            self.metrics.slide(i + 1, seconds, slide_info.shape_count)
+            yield slide_info
+
+    def _reset_aggregates(self) -> None:
+        """Clear document-level aggregates before a traversal."""
+        self._slide_count = 0
+        self._total_images = 0
+        self._total_text_items = 0
+        self._slides_with_images = 0
+        self._unique_tags = set()
+        self._company_mentions = set()
+        self._copyright_notices = set()
+        self._confidentiality_labels = set()
+
+    def _accumulate_slide(self, slide_info: SlideInfo) -> None:
+        """Fold a slide's results into the document-level aggregates."""
+        self._slide_count += 1
+        self._total_text_items += len(slide_info.text_content)
+        if slide_info.image_count > 0:
+            self._slides_with_images += 1
+        self._unique_tags.update(slide_info.tags)
+
+    def _accumulate_matches(self, hits: Dict[str, set]) -> None:
+        """Fold a slide's compliance pattern hits into the document-level aggregates."""
+        self._company_mentions.update(hits.get("company", ()))
+        self._copyright_notices.update(hits.get("copyright", ()))
+        self._confidentiality_labels.update(hits.get("confidentiality", ()))
+
+    def _ordered_matches(self, matches: set, patterns: List[str]) -> List[str]:
+        """Return accumulated pattern matches in pattern-list order."""
+        return [pattern for pattern in patterns if pattern in matches]
 
     def _analyze_slide(self, slide, slide_number: int) -> SlideInfo:
         """Analyze individual slide content."""
-        text_content = []
-        image_files = []
-        text_shapes = []
-        graphic_elements = []
-        logos_and_brands = []
+        collected = {
+            'text': [],
+            'image_file': [],
+            'text_shape': [],
+            'graphic_element': [],
+            'logo_brand': [],
+            'image_logo': []
+        }
+        title = None
         shape_count = 0
-        image_count = 0
-
-        # Extract slide title
-        title = self._extract_slide_title(slide)
+        layout = []
 
-        # Process all shapes
+        # Process all shapes; nested groups are visited in the same pass
         for shape in slide.shapes:
             shape_count += 1
-            shape_analysis = self._analyze_shape_comprehensive(shape, slide_number)
-
-            # Collect text content
-            if shape_analysis['text']:
-                if isinstance(shape_analysis['text'], list):
-                    text_content.extend(shape_analysis['text'])
-                else:
-                    text_content.append(shape_analysis['text'])
+            text = self._visit_shape(shape, slide_number, collected)
+            positioning = self._get_shape_positioning(shape)
+            layout.append((str(shape.shape_type), positioning.to_dict() if positioning else {}))
 
-            # Collect images
-            if shape_analysis['image_file']:
-                if isinstance(shape_analysis['image_file'], list):
-                    image_files.extend(shape_analysis['image_file'])
-                    image_count += len(shape_analysis['image_file'])
-                else:
-                    image_files.append(shape_analysis['image_file'])
-                    image_count += 1
-
-            # Collect text shapes (logos, titles, formatted text)
-            if shape_analysis['text_shape']:
-                if isinstance(shape_analysis['text_shape'], list):
-                    text_shapes.extend(shape_analysis['text_shape'])
-                else:
-                    text_shapes.append(shape_analysis['text_shape'])
+            # The title placeholder is the top-level placeholder with idx 0
+            if title is None and text and self._is_title_placeholder(shape):
+                title = text
 
-            # Collect graphic elements
-            if shape_analysis['graphic_element']:
-                if isinstance(shape_analysis['graphic_element'], list):
-                    graphic_elements.extend(shape_analysis['graphic_element'])
-                else:
-                    graphic_elements.append(shape_analysis['graphic_element'])
-
-            # Detect logos and brand elements
-            if shape_analysis['logo_brand']:
-                if isinstance(shape_analysis['logo_brand'], list):
-                    logos_and_brands.extend(shape_analysis['logo_brand'])
-                else:
-                    logos_and_brands.append(shape_analysis['logo_brand'])
+        with self.metrics.span('image_hashing'):
+            image_details = self._describe_images(collected['image_file'])
+        logos_and_brands = self._resolve_image_logos(collected, image_details, slide_number)
 
         # Extract notes
         notes = None
         if slide.notes_slide and slide.notes_slide.notes_text_frame:
             notes = slide.notes_slide.notes_text_frame.text.strip()
 
+        # One scan of the slide text feeds both document compliance and slide tags
+        text_hits = self.matcher.match_categories(' '.join(collected['text']))
+        self._accumulate_matches(text_hits)
+
         # Apply tags based on content
-        tags = self._generate_slide_tags(text_content, notes)
+        tags = self._generate_slide_tags(text_hits, notes)
+
+        with self.metrics.span('fingerprint'):
+            fingerprint = slide_fingerprint(collected['text'], collected['image_file'], layout)
 
         return SlideInfo(
             slide_number=slide_number,
             title=title,
-            text_content=text_content,
+            text_content=collected['text'],
             shape_count=shape_count,
-            image_count=image_count,
-            image_files=image_files,
-            text_shapes=text_shapes,
-            graphic_elements=graphic_elements,
+            image_count=len(collected['image_file']),
+            image_files=collected['image_file'],
+            text_shapes=collected['text_shape'],
+            graphic_elements=collected['graphic_element'],
             logos_and_brands=logos_and_brands,
             tags=tags,
-            notes=notes
+            notes=notes,
+            fingerprint=fingerprint,
+            image_details=image_details
         )
 
-    def _extract_slide_title(self, slide) -> Optional[str]:
-        """Extract slide title if available."""
-        if slide.shapes.title and slide.shapes.title.text:
-            return slide.shapes.title.text.strip()
-        return None
+    def _describe_images(self, image_files: List[str]) -> List[Dict[str, Any]]:
+        """Perceptual hashes and brand matches for a slide's images.
+
+        The slide's new images are hashed as one batch on the shared thread
+        pool; images seen earlier in the deck reuse their hashes.
+        """
+        unique_files = list(dict.fromkeys(image_files))
+        pending = [name for name in unique_files if name in self._pending_image_blobs]
+        blobs = [self._pending_image_blobs.pop(name) for name in pending]
+        self.metrics.count('images_hashed', len(pending))
+        self.metrics.count('image_hash_cache_hits', len(unique_files) - len(pending))
+        for name, hashes in zip(pending, hash_images(blobs, shared_executor())):
+            self._image_hashes[name] = hashes
+
+        details = []
+        for name in unique_files:
+            hashes = self._image_hashes.get(name)
+            brand_matches = self.brand_index.match(hashes) if self.brand_index and hashes else []
+            details.append({
+                'file': name,
+                **(hashes or {'ahash': None, 'dhash': None, 'phash': None}),
+                'brand_match': brand_matches[0]['label'] if brand_matches else None
+            })
+        return details
+
+    def _resolve_image_logos(self, collected: Dict[str, List], image_details: List[Dict[str, Any]],
+                             slide_number: int) -> List[Any]:
+        """Fill in the image logo entries held back until the slide's images were hashed.
+
+        An image is a logo if its size and position look like one or it
+        matches a known brand asset.
+        """
+        brand_matches = {detail['file']: detail['brand_match'] for detail in image_details}
+        logos = collected['logo_brand']
+        for position, image_file, positioning, logo_shaped in collected['image_logo']:
+            brand_match = brand_matches.get(image_file)
+            if logo_shaped or brand_match:
+                logos[position] = ImageLogo(image_file, positioning, slide_number, brand_match)
+        return [logo for logo in logos if logo is not None]
+
+    def _is_title_placeholder(self, shape) -> bool:
+        """Check whether a top-level shape is the slide's title placeholder."""
+        try:
+            return shape.is_placeholder and shape.placeholder_format.idx == 0
+        except Exception:
+            return False
 
     def _extract_image(self, shape, slide_number: int) -> Optional[str]:
         """Extract and save image from shape."""
         try:
             if hasattr(shape, 'image'):
-                image = shape.image
-                image_bytes = image.blob
+                image = self._get_image_part(shape)
+                ext = self._get_image_extension(getattr(image, 'partname', None), image.content_type)
 
-                # Create unique filename
-                image_hash = hashlib.md5(image_bytes).hexdigest()[:8]
-                ext = self._get_image_extension(image.content_type)
-                filename = f"slide_{slide_number:02d}_{image_hash}.{ext}"
+                # The package part hashes its blob once, however many shapes use it
+                if self.image_store:
+                    filename = f"{image.sha1}.{ext}"
+                    image_path = self.image_store / filename
+                else:
+                    filename = f"slide_{slide_number:02d}_{image.sha1[:8]}.{ext}"
+                    image_path = self.image_dir / filename
+
+                # Names are content-addressed, so an existing file already holds these bytes
+                if filename not in self._stored_images:
+                    if not image_path.exists():
+                        with self.metrics.span('image_write'):
+                            self._write_atomic(image_path, image.blob)
+                        self.metrics.count('images_written')
+                        self.metrics.count('bytes_written', len(image.blob))
+                    else:
+                        self.metrics.count('image_cache_hits')
+                    self._stored_images.add(filename)
+                else:
+                    self.metrics.count('image_cache_hits')
 
-                # Save image
-                image_path = self.image_dir / filename
-                with open(image_path, 'wb') as f:
-                    f.write(image_bytes)
+                if filename not in self._image_hashes:
+                    self._pending_image_blobs[filename] = image.blob
 
                 return filename
         except Exception as e:
@@ -240,7 +548,110 @@ class PowerPointInspector:
 
         return None
 
-    def _analyze_text_shape(self, shape, text: str, slide_number: int) -> Optional[Dict[str, Any]]:
+    def extract_media_only(self) -> List[Dict[str, Any]]:
+        """Extract slide images straight from the zip archive without loading the deck.
+
+        Reads ``ppt/media/*`` through the slide relationship parts, so every
+        image a slide references is included (picture shapes as well as
+        picture fills and backgrounds); media used only by layouts and masters
+        is skipped. Each media part is streamed to disk once and named after
+        the first slide that uses it. Returns one record per image listing the
+        slides that reference it.
+        """
+        if not self.filepath.exists():
+            raise FileNotFoundError(f"File not found: {self.filepath}")
+
+        images = []
+        with self.metrics.span('extract_media'), zipfile.ZipFile(self.filepath) as zf:
+            # Map each media part to the slides that reference it, in slide order
+            media_slides = {}
+            for slide_number, slide_part in enumerate(slide_part_names(zf), start=1):
+                for rel in read_relationships(zf, slide_part):
+                    if rel["type"].endswith(RT_IMAGE):
+                        slides = media_slides.setdefault(rel["target"], [])
+                        if slide_number not in slides:
+                            slides.append(slide_number)
+
+            for media_part, slides in media_slides.items():
+                try:
+                    info = zf.getinfo(media_part)
+                except KeyError:
+                    print(f"Missing media part referenced by slide {slides[0]}: {media_part}")
+                    continue
+
+                filename = self._stream_media_part(zf, info, slides[0])
+                images.append({
+                    'file': filename,
+                    'media_part': media_part,
+                    'size': info.file_size,
+                    'slides': slides
+                })
+
+        return images
+
+    def _stream_media_part(self, zf: zipfile.ZipFile, info: zipfile.ZipInfo, slide_number: int) -> str:
+        """Copy a media part to disk in chunks, hashing it on the way, and return its filename."""
+        ext = self._get_image_extension(info.filename)
+        target_dir = self.image_store or self.image_dir
+
+        digest = hashlib.sha1()
+        fd, temp_path = tempfile.mkstemp(prefix=".media.", dir=target_dir)
+        try:
+            with zf.open(info) as source, os.fdopen(fd, 'wb') as f:
+                for chunk in iter(lambda: source.read(1024 * 1024), b''):
+                    digest.update(chunk)
+                    f.write(chunk)
+
+            sha1 = digest.hexdigest()
+            if self.image_store:
+                filename = f"{sha1}.{ext}"
+            else:
+                filename = f"slide_{slide_number:02d}_{sha1[:8]}.{ext}"
+
+            image_path = target_dir / filename
+            if image_path.exists():
+                os.remove(temp_path)
+                self.metrics.count('image_cache_hits')
+            else:
+                os.chmod(temp_path, 0o644)
+                os.replace(temp_path, image_path)
+                self.metrics.count('images_written')
+                self.metrics.count('bytes_written', info.file_size)
+            return filename
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _get_image_part(self, shape):
+        """Return the package image part behind a picture, falling back to ``shape.image``.
+
+        The part exposes the same ``blob``, ``sha1`` and ``content_type`` as
+        the Image wrapper, but caches its SHA-1 and needs no PIL decode to
+        report its content type.
+        """
+        try:
+            return shape.part.related_part(shape._element.blip_rId)
+        except Exception:
+            return shape.image
+
+    def _write_atomic(self, path: Path, data: bytes) -> None:
+        """Write bytes via a temporary file and rename so readers never see a partial file."""
+        fd, temp_path = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            # mkstemp creates files readable only by the owner
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def _analyze_text_shape(self, shape, text: str, slide_number: int) -> Optional[TextShape]:
         """Analyze text shape formatting and properties."""
         try:
             if not hasattr(shape, 'text_frame') or not shape.text_frame:
@@ -249,56 +660,38 @@ class PowerPointInspector:
             text_frame = shape.text_frame
 
             # Get font and formatting info
-            font_info = {}
+            font_info = None
             if text_frame.paragraphs:
                 first_para = text_frame.paragraphs[0]
                 if first_para.runs:
                     first_run = first_para.runs[0]
                     font = first_run.font
-                    font_info = {
-                        'name': font.name,
-                        'size': font.size.pt if font.size else None,
-                        'bold': font.bold,
-                        'italic': font.italic,
-                        'color': str(font.color.rgb) if font.color and hasattr(font.color, 'rgb') else None
-                    }
-
-            return {
-                'text': text,
-                'font_info': font_info,
-                'positioning': self._get_shape_positioning(shape),
-                'shape_type': 'text_shape',
-                'slide_number': slide_number
-            }
+                    font_info = FontInfo(
+                        font.name,
+                        font.size.pt if font.size else None,
+                        font.bold,
+                        font.italic,
+                        str(font.color.rgb) if font.color and hasattr(font.color, 'rgb') else None
+                    )
+
+            return TextShape(text, font_info, self._get_shape_positioning(shape), slide_number)
         except Exception as e:
             return None
 
     def _is_logo_or_brand_text(self, text: str, shape) -> bool:
         """Detect if text might be a logo or brand element."""
-        text_lower = text.lower()
-
-        # Common logo/brand indicators
-        brand_indicators = [
-            'garden', 'giving', 'company', 'corp', 'inc', 'llc', 'ltd',
-            '©', 'copyright', 'trademark', '™', '®', 'all rights reserved'
-        ]
-
-        # Check if text contains brand indicators
-        has_brand_text = any(indicator in text_lower for indicator in brand_indicators)
-
-        # Check positioning (logos often at top/bottom of slide)
+        # Check positioning first (logos often at top/bottom of slide); it is
+        # cheaper than scanning the text
         try:
             if hasattr(shape, 'top') and hasattr(shape, 'left'):
                 # Consider it a potential logo if positioned like one
-                is_positioned_like_logo = (
-                    shape.top.inches < 1.0 or  # Top of slide
-                    shape.top.inches > 6.0     # Bottom of slide
-                )
-                return has_brand_text or is_positioned_like_logo
+                if shape.top.inches < 1.0 or shape.top.inches > 6.0:
+                    return True
         except:
             pass
 
-        return has_brand_text
+        # Check if text contains brand indicators
+        return "brand" in self.matcher.match_categories(text)
 
     def _is_logo_image(self, shape) -> bool:
         """Detect if image might be a logo."""
@@ -322,208 +715,139 @@ class PowerPointInspector:
             pass
         return False
 
-    def _get_shape_positioning(self, shape) -> Dict[str, Any]:
+    def _get_shape_positioning(self, shape) -> Optional[Positioning]:
         """Get shape positioning information."""
         try:
-            return {
-                'left': shape.left.inches if hasattr(shape, 'left') and shape.left else None,
-                'top': shape.top.inches if hasattr(shape, 'top') and shape.top else None,
-                'width': shape.width.inches if hasattr(shape, 'width') and shape.width else None,
-                'height': shape.height.inches if hasattr(shape, 'height') and shape.height else None
-            }
+            return Positioning(
+                shape.left.inches if hasattr(shape, 'left') and shape.left else None,
+                shape.top.inches if hasattr(shape, 'top') and shape.top else None,
+                shape.width.inches if hasattr(shape, 'width') and shape.width else None,
+                shape.height.inches if hasattr(shape, 'height') and shape.height else None
+            )
         except:
-            return {}
+            return None
 
-    def _analyze_graphic_element(self, shape, slide_number: int) -> Optional[Dict[str, Any]]:
+    def _analyze_graphic_element(self, shape, slide_number: int, text: Optional[str] = None) -> Optional[GraphicElement]:
         """Analyze graphic elements like shapes and drawings."""
         try:
-            element_info = {
-                'type': 'graphic_element',
-                'shape_type': str(shape.shape_type),
-                'positioning': self._get_shape_positioning(shape),
-                'slide_number': slide_number
-            }
+            element_info = GraphicElement(str(shape.shape_type), self._get_shape_positioning(shape), slide_number)
 
             # Try to get additional shape properties
             if hasattr(shape, 'auto_shape_type'):
-                element_info['auto_shape_type'] = str(shape.auto_shape_type)
+                element_info.auto_shape_type = str(shape.auto_shape_type)
 
             # Check for fill color
             if hasattr(shape, 'fill'):
                 try:
                     if hasattr(shape.fill, 'fore_color') and hasattr(shape.fill.fore_color, 'rgb'):
-                        element_info['fill_color'] = str(shape.fill.fore_color.rgb)
+                        element_info.fill_color = str(shape.fill.fore_color.rgb)
                 except:
                     pass
 
-            # Check if it has text
-            if hasattr(shape, 'text') and shape.text:
-                element_info['text'] = shape.text.strip()
+            # Attach text already read by the traversal (None is left out of exports)
+            element_info.text = text
 
             return element_info
         except Exception as e:
             return None
 
-    def _analyze_shape_comprehensive(self, shape, slide_number: int) -> Dict[str, Any]:
-        """Comprehensive shape analysis for all content types."""
-        result = {
-            'text': None,
-            'image_file': None,
-            'text_shape': None,
-            'graphic_element': None,
-            'logo_brand': None
-        }
+    def _visit_shape(self, shape, slide_number: int, collected: Dict[str, List]) -> Optional[str]:
+        """Analyze a shape (recursing into groups) and append its findings to ``collected``.
 
-        # Handle text content
-        if hasattr(shape, 'text') and shape.text:
-            text = shape.text.strip()
-            result['text'] = text
+        Returns the stripped text of the shape, or None if it has no text.
+        """
+        shape_type = shape.shape_type
+        self.metrics.count('shapes')
+
+        # Read the text once; building it walks the shape's XML
+        try:
+            raw_text = shape.text
+        except AttributeError:
+            raw_text = None
+
+        text = None
+        if raw_text:
+            text = raw_text.strip()
+            if text:
+                collected['text'].append(text)
 
             # Analyze text formatting and detect logos/brands
             text_analysis = self._analyze_text_shape(shape, text, slide_number)
             if text_analysis:
-                result['text_shape'] = text_analysis
+                collected['text_shape'].append(text_analysis)
 
                 # Detect if this might be a logo or brand element
                 if self._is_logo_or_brand_text(text, shape):
-                    result['logo_brand'] = {
-                        'type': 'text_logo',
-                        'content': text,
-                        'font_info': text_analysis.get('font_info', {}),
-                        'positioning': text_analysis.get('positioning', {}),
-                        'slide_number': slide_number
-                    }
+                    collected['logo_brand'].append(TextLogo(text, text_analysis.font_info,
+                                                            text_analysis.positioning, slide_number))
 
         # Handle pictures
-        if (MSO_SHAPE_TYPE and shape.shape_type == MSO_SHAPE_TYPE.PICTURE) or shape.shape_type == 13:
+        if (MSO_SHAPE_TYPE and shape_type == MSO_SHAPE_TYPE.PICTURE) or shape_type == 13:
+            self._total_images += 1
+            self.metrics.count('pictures')
             image_file = self._extract_image(shape, slide_number)
             if image_file:
-                result['image_file'] = image_file
+                collected['image_file'].append(image_file)
 
-                # Check if image might be a logo
-                if self._is_logo_image(shape):
-                    result['logo_brand'] = {
-                        'type': 'image_logo',
-                        'file': image_file,
-                        'positioning': self._get_shape_positioning(shape),
-                        'slide_number': slide_number
-                    }
+                # Whether the image is a logo is settled once the slide's
+                # images are hashed; keep its place among the slide's logos
+                collected['image_logo'].append((len(collected['logo_brand']), image_file,
+                                                self._get_shape_positioning(shape), self._is_logo_image(shape)))
+                collected['logo_brand'].append(None)
 
         # Handle other graphic elements (shapes, drawings, etc.)
-        elif (MSO_SHAPE_TYPE and shape.shape_type in [MSO_SHAPE_TYPE.AUTO_SHAPE, MSO_SHAPE_TYPE.FREEFORM]) or shape.shape_type in [1, 5]:
-            graphic_info = self._analyze_graphic_element(shape, slide_number)
+        elif (MSO_SHAPE_TYPE and shape_type in [MSO_SHAPE_TYPE.AUTO_SHAPE, MSO_SHAPE_TYPE.FREEFORM]) or shape_type in [1, 5]:
+            graphic_info = self._analyze_graphic_element(shape, slide_number, text)
             if graphic_info:
-                result['graphic_element'] = graphic_info
+                collected['graphic_element'].append(graphic_info)
 
         # Handle group shapes recursively
-        elif (MSO_SHAPE_TYPE and shape.shape_type == MSO_SHAPE_TYPE.GROUP) or shape.shape_type == 6:
-            group_results = self._process_group_shape_comprehensive(shape, slide_number)
-            # Merge group results
-            for key in result.keys():
-                if group_results.get(key):
-                    if isinstance(result[key], list):
-                        result[key].extend(group_results[key])
-                    elif result[key] is None:
-                        result[key] = group_results[key]
-
-        return result
-
-    def _process_group_shape_comprehensive(self, group_shape, slide_number: int) -> Dict[str, List]:
-        """Process all content within group shapes."""
-        results = {
-            'text': [],
-            'image_file': [],
-            'text_shape': [],
-            'graphic_element': [],
-            'logo_brand': []
-        }
-
-        for shape in group_shape.shapes:
-            shape_analysis = self._analyze_shape_comprehensive(shape, slide_number)
-            for key in results.keys():
-                if shape_analysis[key]:
-                    if isinstance(shape_analysis[key], list):
-                        results[key].extend(shape_analysis[key])
-                    else:
-                        results[key].append(shape_analysis[key])
-
-        return results
-
-    def _get_image_extension(self, content_type: str) -> str:
-        """Get file extension from content type."""
+        elif (MSO_SHAPE_TYPE and shape_type == MSO_SHAPE_TYPE.GROUP) or shape_type == 6:
+            self.metrics.count('groups')
+            for child in shape.shapes:
+                self._visit_shape(child, slide_number, collected)
+
+        return text
+
+    def _get_image_extension(self, part_name: Optional[str], content_type: Optional[str] = None) -> str:
+        """Get the file extension for an extracted image.
+
+        Both full analysis and ``extract_media_only`` use this rule: the media
+        part's own extension (so EMF, WMF and TIFF keep theirs), falling back
+        to the content type for parts named without one.
+        """
+        ext = posixpath.splitext(part_name or '')[1][1:].lower()
+        if ext:
+            return {'jpeg': 'jpg', 'tif': 'tiff'}.get(ext, ext)
         type_map = {
             'image/png': 'png',
             'image/jpeg': 'jpg',
             'image/gif': 'gif',
             'image/bmp': 'bmp',
-            'image/tiff': 'tiff'
+            'image/tiff': 'tiff',
+            'image/x-emf': 'emf',
+            'image/x-wmf': 'wmf'
         }
         return type_map.get(content_type, 'png')
 
-    def _get_all_text_content(self) -> str:
-        """Get all text content from presentation."""
-        all_text = []
-
-        for slide in self.presentation.slides:
-            for shape in slide.shapes:
-                if hasattr(shape, 'text') and shape.text:
-                    all_text.append(shape.text)
-
-        return ' '.join(all_text).lower()
-
-    def _count_total_images(self) -> int:
-        """Count total images in presentation."""
-        total = 0
-        for slide in self.presentation.slides:
-            for shape in slide.shapes:
-                if shape.shape_type == 13:  # Picture
-                    total += 1
-                elif hasattr(shape, 'shapes'):  # Group
-                    total += self._count_images_in_group(shape)
-        return total
-
-    def _count_images_in_group(self, group_shape) -> int:
-        """Count images in group shape."""
-        count = 0
-        for shape in group_shape.shapes:
-            if shape.shape_type == 13:
-                count += 1
-            elif hasattr(shape, 'shapes'):
-                count += self._count_images_in_group(shape)
-        return count
-
-    def _find_pattern_matches(self, text: str, patterns: List[str]) -> List[str]:
-        """Find pattern matches in text."""
-        matches = []
-        for pattern in patterns:
-            if pattern.lower() in text.lower():
-                matches.append(pattern)
-        return list(set(matches))  # Remove duplicates
-
-    def _generate_slide_tags(self, text_content: List[str], notes: Optional[str]) -> List[str]:
+    def _generate_slide_tags(self, text_hits: Dict[str, set], notes: Optional[str]) -> List[str]:
         """Generate tags for slide based on content."""
-        tags = []
-        all_text = ' '.join(text_content + ([notes] if notes else [])).lower()
+        hits = set(text_hits)
+        if notes:
+            hits.update(self.matcher.match_categories(notes))
 
-        # Check for copyright
-        if any(pattern in all_text for pattern in self.copyright_patterns):
+        tags = []
+        if "copyright" in hits:
             tags.append("copyright")
-
-        # Check for confidentiality
-        if any(pattern in all_text for pattern in self.confidentiality_patterns):
+        if "confidentiality" in hits:
             tags.append("confidential")
-
-        # Check for company mentions
-        if any(pattern in all_text for pattern in self.company_patterns):
+        if "company" in hits:
             tags.append("company_info")
 
         # Add content-based tags
-        if "agenda" in all_text:
-            tags.append("agenda")
-        if any(word in all_text for word in ["introduction", "overview"]):
-            tags.append("introduction")
-        if any(word in all_text for word in ["conclusion", "summary", "thank you"]):
-            tags.append("conclusion")
+        for tag in self.tag_patterns:
+            if f"tag:{tag}" in hits:
+                tags.append(tag)
 
         return tags
 
@@ -535,28 +859,84 @@ class PowerPointInspector:
             for i, slide_info in enumerate(self.slides_info):
                 slide_tags = custom_tags.get(f"slide_{slide_info.slide_number}", [])
                 slide_info.tags.extend(slide_tags)
+                self._unique_tags.update(slide_tags)
 
-    def export_to_json(self, filename: str = None) -> str:
-        """Export all data to JSON format."""
+    def export_to_json(self, filename: str = None, compact: bool = False) -> str:
+        """Export all data to JSON format.
+
+        Slides are serialized one at a time rather than building the whole
+        document in memory; ``compact`` drops indentation and whitespace.
+        """
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"{self.filepath.stem}_analysis_{timestamp}.json"
 
         output_path = self.output_dir / filename
 
-        data = {
-            "metadata": asdict(self.metadata),
-            "slides": [asdict(slide) for slide in self.slides_info],
-            "analysis_timestamp": datetime.now().isoformat(),
-            "inspector_version": "1.0.0"
-        }
+        if compact:
+            dump_options = {'separators': (',', ':'), 'ensure_ascii': False}
+        else:
+            dump_options = {'indent': 2, 'ensure_ascii': False}
+
+        def dump_value(value, depth: int) -> str:
+            text = json.dumps(value, **dump_options)
+            return text if compact else text.replace('\n', '\n' + '  ' * depth)
 
+        def newline(depth: int) -> str:
+            return '' if compact else '\n' + '  ' * depth
+
+        key_separator = ':' if compact else ': '
+
+        start = time.perf_counter()
         with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.write('{' + newline(1) + '"metadata"' + key_separator + dump_value(asdict(self.metadata), 1) + ',')
+            f.write(newline(1) + '"slides"' + key_separator + '[')
+            for i, slide in enumerate(self.slides_info):
+                f.write((',' if i else '') + newline(2) + dump_value(slide.to_dict(), 2))
+            f.write((newline(1) if self.slides_info else '') + '],')
+            f.write(newline(1) + '"analysis_timestamp"' + key_separator + json.dumps(datetime.now().isoformat()) + ',')
+            f.write(newline(1) + '"inspector_version"' + key_separator + json.dumps(INSPECTOR_VERSION))
+            if self.image_store:
+                f.write(',' + newline(1) + '"image_store"' + key_separator + json.dumps(str(self.image_store)))
+            f.write(newline(0) + '}')
+        self._record_export('export_json', output_path, start)
 
         print(f"JSON export saved: {output_path}")
         return str(output_path)
 
+    def export_to_ndjson(self, filename: str = None) -> str:
+        """Export analysis as newline-delimited JSON.
+
+        Writes one ``slide`` record per line followed by a final ``metadata``
+        record. If the slides have not been analyzed yet they are streamed to
+        disk as they are analyzed and not kept in memory.
+        """
+        if not filename:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"{self.filepath.stem}_analysis_{timestamp}.ndjson"
+
+        output_path = self.output_dir / filename
+
+        # When slides are streamed, this span includes their analysis
+        start = time.perf_counter()
+        with open(output_path, 'w', encoding='utf-8') as f:
+            for slide in self.iter_slides(retain=False):
+                f.write(json.dumps({'type': 'slide', 'slide': slide.to_dict()},
+                                   separators=(',', ':'), ensure_ascii=False) + '\n')
+
+            metadata = self.metadata if self._analyzed and self.metadata else self._build_metadata()
+            f.write(json.dumps({
+                'type': 'metadata',
+                'metadata': asdict(metadata),
+                'analysis_timestamp': datetime.now().isoformat(),
+                'inspector_version': INSPECTOR_VERSION,
+                **({'image_store': str(self.image_store)} if self.image_store else {})
+            }, separators=(',', ':'), ensure_ascii=False) + '\n')
+        self._record_export('export_ndjson', output_path, start)
+
+        print(f"NDJSON export saved: {output_path}")
+        return str(output_path)
+
     def export_to_csv(self, filename: str = None) -> str:
         """Export slide data to CSV format."""
         if not filename:
@@ -576,6 +956,7 @@ class PowerPointInspector:
             "notes"
         ]
 
+        start = time.perf_counter()
         with open(output_path, 'w', newline='', encoding='utf-8') as csvfile:
             writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
             writer.writeheader()
@@ -591,21 +972,25 @@ class PowerPointInspector:
                     "tags": " | ".join(slide.tags),
                     "notes": slide.notes or ""
                 })
+        self._record_export('export_csv', output_path, start)
 
         print(f"CSV export saved: {output_path}")
         return str(output_path)
 
+    def _record_export(self, name: str, output_path: Path, start: float) -> None:
+        """Record an export's duration and size."""
+        self.metrics.add_time(name, time.perf_counter() - start)
+        self.metrics.count('bytes_written', output_path.stat().st_size)
+
     def generate_summary_report(self) -> Dict[str, Any]:
         """Generate summary report."""
-        if not self.metadata or not self.slides_info:
+        if not self.metadata or not self._slide_count:
             raise ValueError("No data available. Run analysis first.")
 
-        # Aggregate statistics
-        total_text_items = sum(len(slide.text_content) for slide in self.slides_info)
-        slides_with_images = sum(1 for slide in self.slides_info if slide.image_count > 0)
-        all_tags = set()
-        for slide in self.slides_info:
-            all_tags.update(slide.tags)
+        # Aggregate statistics accumulated during analysis
+        total_text_items = self._total_text_items
+        slides_with_images = self._slides_with_images
+        all_tags = self._unique_tags
 
         summary = {
             "file_info": {
@@ -629,59 +1014,126 @@ class PowerPointInspector:
         return summary
 
 
+def save_metrics_file(inspector: PowerPointInspector) -> str:
+    """Write the inspector's metrics next to its exports and print the slowest phases."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_path = inspector.output_dir / f"{inspector.filepath.stem}_metrics_{timestamp}.json"
+    metrics = inspector.metrics.to_dict()
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(metrics, f, indent=2)
+
+    print("\n⏱️  Phase timings:")
+    for name, timing in sorted(metrics['timings'].items(), key=lambda item: item[1]['seconds'], reverse=True):
+        print(f"  {name:20s} {timing['seconds'] * 1000:9.1f} ms ({timing['count']}x)")
+    print(f"Metrics saved: {output_path}")
+    return str(output_path)
+
+
 @click.command()
 @click.argument('filepath', type=click.Path(exists=True))
 @click.option('--output-dir', '-o', default='exports', help='Output directory for exports')
 @click.option('--image-dir', '-i', default='images', help='Directory for extracted images')
+@click.option('--image-store', type=click.Path(file_okay=False),
+              help='Shared content-addressed image directory; each unique image is written once')
 @click.option('--tags-file', '-t', type=click.Path(exists=True), help='JSON file with custom tags')
+@click.option('--patterns-file', '-p', type=click.Path(exists=True),
+              help='JSON file overriding the detection pattern lists')
 @click.option('--export-format', '-f', multiple=True, default=['json'],
-              type=click.Choice(['json', 'csv', 'both']), help='Export format(s)')
-def main(filepath, output_dir, image_dir, tags_file, export_format):
+              type=click.Choice(['json', 'csv', 'both', 'ndjson']), help='Export format(s)')
+@click.option('--compact', is_flag=True, help='Write JSON exports without indentation')
+@click.option('--brand-assets', type=click.Path(exists=True, file_okay=False),
+              help='Directory of known brand images to match extracted images against')
+@click.option('--images-only', is_flag=True,
+              help='Only extract slide images, reading them straight from the zip archive')
+@click.option('--metadata-only', is_flag=True,
+              help='Only read document properties and slide count, skipping slide analysis')
+@click.option('--metrics', 'save_metrics', is_flag=True,
+              help='Save phase timings and counters to a metrics JSON file in the output directory')
+@click.option('--profile', type=click.Choice(PROFILE_MODES),
+              help='Also capture a cProfile and/or tracemalloc profile in the metrics file')
+def main(filepath, output_dir, image_dir, image_store, tags_file, patterns_file, export_format, compact,
+         brand_assets, images_only, metadata_only, save_metrics, profile):
     """PowerPoint Inspector - Extract and analyze PowerPoint presentations."""
 
     print(f"🔍 Analyzing PowerPoint file: {filepath}")
 
     # Initialize inspector
-    inspector = PowerPointInspector(filepath, output_dir, image_dir)
-
-    # Load and analyze presentation
-    inspector.load_presentation()
-
-    print("\n📊 Extracting document metadata...")
-    metadata = inspector.extract_document_metadata()
-
-    print("📄 Analyzing slide content...")
-    slides_info = inspector.extract_slide_content()
-
-    # Apply custom tags if provided
-    if tags_file:
-        print(f"🏷️  Applying custom tags from: {tags_file}")
-        with open(tags_file, 'r') as f:
-            custom_tags = json.load(f)
-        inspector.apply_standardized_tags(custom_tags)
-
-    # Generate summary
-    print("\n📈 Generating summary report...")
-    summary = inspector.generate_summary_report()
-
-    print("\n=== SUMMARY REPORT ===")
-    print(f"File: {summary['file_info']['name']} ({summary['file_info']['size_mb']} MB)")
-    print(f"Slides: {summary['file_info']['slide_count']}")
-    print(f"Text Items: {summary['content_analysis']['total_text_items']}")
-    print(f"Images: {summary['content_analysis']['total_images']} (in {summary['content_analysis']['slides_with_images']} slides)")
-    print(f"Tags Found: {', '.join(summary['content_analysis']['unique_tags']) if summary['content_analysis']['unique_tags'] else 'None'}")
-    print(f"Copyright: {'✓' if summary['compliance_check']['has_copyright'] else '✗'}")
-    print(f"Confidentiality: {'✓' if summary['compliance_check']['has_confidentiality'] else '✗'}")
-
-    # Export data
-    print("\n💾 Exporting data...")
-    for fmt in export_format:
-        if fmt == 'json' or fmt == 'both':
-            inspector.export_to_json()
-        if fmt == 'csv' or fmt == 'both':
-            inspector.export_to_csv()
-
-    print("\n✅ Analysis complete!")
+    inspector = PowerPointInspector(filepath, output_dir, image_dir, image_store, patterns_file, brand_assets)
+
+    try:
+        with inspector.metrics.capture(profile):
+            if images_only:
+                print("\n🖼️  Extracting images...")
+                images = inspector.extract_media_only()
+                for image in images:
+                    print(f"  {image['file']} (slides {', '.join(str(n) for n in image['slides'])})")
+                print(f"\n✅ Extracted {len(images)} images to {inspector.image_store or inspector.image_dir}")
+                return
+
+            if metadata_only:
+                metadata = inspector.extract_metadata_only()
+                print("\n=== DOCUMENT METADATA ===")
+                print(f"File: {metadata.filename} ({round(metadata.file_size / (1024 * 1024), 2)} MB)")
+                print(f"Title: {metadata.title or '-'}")
+                print(f"Author: {metadata.author or '-'}")
+                print(f"Created: {metadata.created_date or '-'}")
+                print(f"Modified: {metadata.modified_date or '-'}")
+                print(f"Slides: {metadata.slide_count}")
+                if any(fmt in ('json', 'both') for fmt in export_format):
+                    inspector.export_to_json(compact=compact)
+                print("\n✅ Metadata scan complete!")
+                return
+
+            # Load and analyze presentation
+            inspector.load_presentation()
+
+            # NDJSON on its own streams slides to disk as they are analyzed
+            if set(export_format) == {'ndjson'} and not tags_file:
+                print("\n📄 Streaming slide analysis...")
+                inspector.export_to_ndjson()
+                print("\n✅ Analysis complete!")
+                return
+
+            print("\n📊 Extracting document metadata...")
+            metadata = inspector.extract_document_metadata()
+
+            print("📄 Analyzing slide content...")
+            slides_info = inspector.extract_slide_content()
+
+            # Apply custom tags if provided
+            if tags_file:
+                print(f"🏷️  Applying custom tags from: {tags_file}")
+                with open(tags_file, 'r') as f:
+                    custom_tags = json.load(f)
+                inspector.apply_standardized_tags(custom_tags)
+
+            # Generate summary
+            print("\n📈 Generating summary report...")
+            summary = inspector.generate_summary_report()
+
+            print("\n=== SUMMARY REPORT ===")
+            print(f"File: {summary['file_info']['name']} ({summary['file_info']['size_mb']} MB)")
+            print(f"Slides: {summary['file_info']['slide_count']}")
+            print(f"Text Items: {summary['content_analysis']['total_text_items']}")
+            print(f"Images: {summary['content_analysis']['total_images']} (in {summary['content_analysis']['slides_with_images']} slides)")
+            print(f"Tags Found: {', '.join(summary['content_analysis']['unique_tags']) if summary['content_analysis']['unique_tags'] else 'None'}")
+            print(f"Copyright: {'✓' if summary['compliance_check']['has_copyright'] else '✗'}")
+            print(f"Confidentiality: {'✓' if summary['compliance_check']['has_confidentiality'] else '✗'}")
+
+            # Export data
+            print("\n💾 Exporting data...")
+            for fmt in export_format:
+                if fmt == 'json' or fmt == 'both':
+                    inspector.export_to_json(compact=compact)
+                if fmt == 'csv' or fmt == 'both':
+                    inspector.export_to_csv()
+                if fmt == 'ndjson':
+                    inspector.export_to_ndjson()
+
+            print("\n✅ Analysis complete!")
+    finally:
+        if save_metrics or profile:
+            save_metrics_file(inspector)
 
 
 if __name__ == "__main__":
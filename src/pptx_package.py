@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""Minimal helpers for reading a .pptx package straight from its zip archive,
+for fast paths that do not need python-pptx's full object model."""
+
+import re
+import hashlib
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+
+RELS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+PML_NS = "http://schemas.openxmlformats.org/presentationml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+CP_NS = "http://schemas.openxmlformats.org/package/2006/metadata/core-properties"
+DC_NS = "http://purl.org/dc/elements/1.1/"
+DCTERMS_NS = "http://purl.org/dc/terms/"
+
+RT_OFFICE_DOCUMENT = "/officeDocument"
+RT_CORE_PROPERTIES = "/core-properties"
+RT_SLIDE = "/slide"
+RT_IMAGE = "/image"
+
+
+def rels_part_name(part_name: str) -> str:
+    """Return the relationships part name for a part, e.g. ppt/slides/_rels/slide1.xml.rels."""
+    directory, filename = posixpath.split(part_name)
+    return posixpath.join(directory, "_rels", f"{filename}.rels")
+
+
+def resolve_target(source_part: str, target: str) -> str:
+    """Resolve a relationship target relative to its source part into a zip member name."""
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source_part), target))
+
+
+def read_relationships(zf: zipfile.ZipFile, part_name: str) -> List[Dict[str, str]]:
+    """Read the relationships of a part ('' for the package itself).
+
+    Each relationship is a dict with ``id``, ``type`` and ``target``; internal
+    targets are resolved to zip member names and external ones are skipped.
+    """
+    try:
+        xml = zf.read(rels_part_name(part_name))
+    except KeyError:
+        return []
+
+    relationships = []
+    for rel in ET.fromstring(xml).iter(f"{{{RELS_NS}}}Relationship"):
+        if rel.get("TargetMode") == "External":
+            continue
+        relationships.append({
+            "id": rel.get("Id"),
+            "type": rel.get("Type", ""),
+            "target": resolve_target(part_name, rel.get("Target", ""))
+        })
+    return relationships
+
+
+def find_relationship(relationships: List[Dict[str, str]], type_suffix: str) -> Optional[Dict[str, str]]:
+    """Return the first relationship whose type ends with ``type_suffix``."""
+    for rel in relationships:
+        if rel["type"].endswith(type_suffix):
+            return rel
+    return None
+
+
+def main_document_part(zf: zipfile.ZipFile) -> str:
+    """Return the name of the presentation part, normally ppt/presentation.xml."""
+    rel = find_relationship(read_relationships(zf, ""), RT_OFFICE_DOCUMENT)
+    return rel["target"] if rel else "ppt/presentation.xml"
+
+
+def slide_part_names(zf: zipfile.ZipFile) -> List[str]:
+    """Return slide part names in presentation order."""
+    presentation_part = main_document_part(zf)
+    targets = {
+        rel["id"]: rel["target"]
+        for rel in read_relationships(zf, presentation_part)
+        if rel["type"].endswith(RT_SLIDE)
+    }
+
+    root = ET.fromstring(zf.read(presentation_part))
+    slide_ids = root.find(f"{{{PML_NS}}}sldIdLst")
+    if slide_ids is None:
+        return []
+
+    return [
+        targets[sld_id.get(f"{{{R_NS}}}id")]
+        for sld_id in slide_ids
+        if sld_id.get(f"{{{R_NS}}}id") in targets
+    ]
+
+
+def slide_size(zf: zipfile.ZipFile) -> Tuple[int, int]:
+    """Return the slide width and height in EMU (the 4:3 default when unspecified)."""
+    root = ET.fromstring(zf.read(main_document_part(zf)))
+    size = root.find(f"{{{PML_NS}}}sldSz")
+    if size is None:
+        return 9144000, 6858000
+    return int(size.get("cx", 9144000)), int(size.get("cy", 6858000))
+
+
+def first_slide_number(zf: zipfile.ZipFile) -> int:
+    """Return the number shown on the first slide (``firstSlideNum``, normally 1)."""
+    root = ET.fromstring(zf.read(main_document_part(zf)))
+    return int(root.get("firstSlideNum", 1))
+
+
+def slide_part_hashes(zf: zipfile.ZipFile, depth: int = 2) -> List[str]:
+    """Return a content hash per slide, in presentation order.
+
+    Each hash covers the slide XML and, through its relationships, the
+    parts it uses up to ``depth`` levels away: media, notes, and the layout
+    and master that placeholders inherit positions from. A slide whose hash
+    is unchanged would analyse to the same result. Shared parts are hashed
+    once.
+    """
+    digests = {}
+
+    def part_digest(part_name: str, level: int) -> str:
+        key = (part_name, level)
+        if key not in digests:
+            digest = hashlib.sha256()
+            try:
+                with zf.open(part_name) as f:
+                    for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                        digest.update(chunk)
+            except KeyError:
+                digest.update(b'missing')
+            if level > 0 and not part_name.startswith("ppt/media/"):
+                for rel in sorted(read_relationships(zf, part_name), key=lambda rel: rel["id"] or ""):
+                    digest.update(f"\0{rel['id']}\0{rel['type']}\0".encode())
+                    digest.update(part_digest(rel["target"], level - 1).encode())
+            digests[key] = digest.hexdigest()
+        return digests[key]
+
+    return [part_digest(part_name, depth) for part_name in slide_part_names(zf)]
+
+
+def parse_w3cdtf(value: str) -> Optional[datetime]:
+    """Parse a W3CDTF timestamp to a naive UTC datetime, as python-pptx does."""
+    for template in ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%d", "%Y-%m", "%Y"):
+        try:
+            dt = datetime.strptime(value[:19], template)
+            break
+        except ValueError:
+            continue
+    else:
+        return None
+
+    match = re.match(r"([+-])(\d\d):(\d\d)", value[19:])
+    if match:
+        sign, hours, minutes = match.groups()
+        offset = timedelta(hours=int(hours), minutes=int(minutes))
+        dt = dt - offset if sign == "+" else dt + offset
+    return dt
+
+
+def core_properties(zf: zipfile.ZipFile) -> Dict[str, Optional[str]]:
+    """Read document properties from docProps/core.xml.
+
+    Text properties default to '' and dates to None when absent, matching
+    python-pptx's CoreProperties.
+    """
+    rel = find_relationship(read_relationships(zf, ""), RT_CORE_PROPERTIES)
+    try:
+        root = ET.fromstring(zf.read(rel["target"] if rel else "docProps/core.xml"))
+    except KeyError:
+        root = None
+
+    def text(namespace: str, name: str) -> str:
+        element = root.find(f"{{{namespace}}}{name}") if root is not None else None
+        return (element.text or "") if element is not None else ""
+
+    def date(name: str) -> Optional[str]:
+        value = text(DCTERMS_NS, name).strip()
+        dt = parse_w3cdtf(value) if value else None
+        return dt.isoformat() if dt else None
+
+    return {
+        "author": text(DC_NS, "creator"),
+        "title": text(DC_NS, "title"),
+        "subject": text(DC_NS, "subject"),
+        "category": text(CP_NS, "category"),
+        "comments": text(DC_NS, "description"),
+        "created": date("created"),
+        "modified": date("modified")
+    }
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""Compact record types for per-shape analysis results.
+
+Each text shape, graphic element and logo found on a slide is held in a
+``__slots__`` object instead of a dict, and ``DeckColumns`` stores a whole
+deck's shapes in typed arrays. Both serialise to exactly the dicts the JSON
+exports have always contained.
+"""
+
+import math
+from array import array
+from typing import Dict, List, Any, Optional, Iterable
+
+
+def to_json_value(value: Any) -> Any:
+    """Convert records (anything with ``to_dict``) inside lists and dicts to plain dicts."""
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [to_json_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: to_json_value(item) for key, item in value.items()}
+    return value
+
+
+def _field(record: Any, name: str) -> Any:
+    """Read a field from a record or from its dict form."""
+    return record.get(name) if isinstance(record, dict) else getattr(record, name)
+
+
+class Positioning:
+    """Shape box in inches; a missing measurement is None."""
+    __slots__ = ('left', 'top', 'width', 'height')
+
+    def __init__(self, left: Optional[float], top: Optional[float],
+                 width: Optional[float], height: Optional[float]):
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+
+    def to_dict(self) -> Dict[str, Optional[float]]:
+        return {'left': self.left, 'top': self.top, 'width': self.width, 'height': self.height}
+
+
+class FontInfo:
+    """Font of the first run of a text frame."""
+    __slots__ = ('name', 'size', 'bold', 'italic', 'color')
+
+    def __init__(self, name: Optional[str], size: Optional[float], bold: Optional[bool],
+                 italic: Optional[bool], color: Optional[str]):
+        self.name = name
+        self.size = size
+        self.bold = bold
+        self.italic = italic
+        self.color = color
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'name': self.name, 'size': self.size, 'bold': self.bold, 'italic': self.italic, 'color': self.color}
+
+
+def _optional_dict(record: Optional[Any]) -> Dict[str, Any]:
+    """Serialise an optional record; a missing one is the empty dict the schema uses."""
+    return record.to_dict() if record is not None else {}
+
+
+class TextShape:
+    """A shape with text, as listed in ``SlideInfo.text_shapes``."""
+    __slots__ = ('text', 'font_info', 'positioning', 'slide_number')
+
+    def __init__(self, text: str, font_info: Optional[FontInfo], positioning: Optional[Positioning],
+                 slide_number: int):
+        self.text = text
+        self.font_info = font_info
+        self.positioning = positioning
+        self.slide_number = slide_number
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'text': self.text,
+            'font_info': _optional_dict(self.font_info),
+            'positioning': _optional_dict(self.positioning),
+            'shape_type': 'text_shape',
+            'slide_number': self.slide_number
+        }
+
+
+class GraphicElement:
+    """An autoshape or freeform, as listed in ``SlideInfo.graphic_elements``.
+
+    ``auto_shape_type``, ``fill_color`` and ``text`` are left out of the
+    serialised form when None.
+    """
+    __slots__ = ('shape_type', 'positioning', 'slide_number', 'auto_shape_type', 'fill_color', 'text')
+
+    def __init__(self, shape_type: str, positioning: Optional[Positioning], slide_number: int,
+                 auto_shape_type: Optional[str] = None, fill_color: Optional[str] = None,
+                 text: Optional[str] = None):
+        self.shape_type = shape_type
+        self.positioning = positioning
+        self.slide_number = slide_number
+        self.auto_shape_type = auto_shape_type
+        self.fill_color = fill_color
+        self.text = text
+
+    def to_dict(self) -> Dict[str, Any]:
+        element = {
+            'type': 'graphic_element',
+            'shape_type': self.shape_type,
+            'positioning': _optional_dict(self.positioning),
+            'slide_number': self.slide_number
+        }
+        if self.auto_shape_type is not None:
+            element['auto_shape_type'] = self.auto_shape_type
+        if self.fill_color is not None:
+            element['fill_color'] = self.fill_color
+        if self.text is not None:
+            element['text'] = self.text
+        return element
+
+
+class TextLogo:
+    """Text that looks like a logo or brand mark."""
+    __slots__ = ('content', 'font_info', 'positioning', 'slide_number')
+
+    def __init__(self, content: str, font_info: Optional[FontInfo], positioning: Optional[Positioning],
+                 slide_number: int):
+        self.content = content
+        self.font_info = font_info
+        self.positioning = positioning
+        self.slide_number = slide_number
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'type': 'text_logo',
+            'content': self.content,
+            'font_info': _optional_dict(self.font_info),
+            'positioning': _optional_dict(self.positioning),
+            'slide_number': self.slide_number
+        }
+
+
+class ImageLogo:
+    """An image that looks like a logo, or matches a known brand image."""
+    __slots__ = ('file', 'positioning', 'slide_number', 'brand_match')
+
+    def __init__(self, file: str, positioning: Optional[Positioning], slide_number: int,
+                 brand_match: Optional[str] = None):
+        self.file = file
+        self.positioning = positioning
+        self.slide_number = slide_number
+        self.brand_match = brand_match
+
+    def to_dict(self) -> Dict[str, Any]:
+        logo = {
+            'type': 'image_logo',
+            'file': self.file,
+            'positioning': _optional_dict(self.positioning),
+            'slide_number': self.slide_number
+        }
+        if self.brand_match is not None:
+            logo['brand_match'] = self.brand_match
+        return logo
+
+
+NAN = float('nan')
+
+# Per-row flags in DeckColumns
+_HAS_POSITIONING = 1
+_HAS_FONT = 2
+
+# Tri-state booleans stored as signed bytes
+_BOOL_CODES = {None: -1, False: 0, True: 1}
+_BOOL_VALUES = {-1: None, 0: False, 1: True}
+
+
+def _float_or_nan(value: Optional[float]) -> float:
+    return NAN if value is None else value
+
+
+def _nan_to_none(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+class _StringTable:
+    """Interned strings referenced by index; -1 stands for None."""
+
+    def __init__(self):
+        self.values = []
+        self._index = {}
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        index = self._index.get(value)
+        if index is None:
+            index = self._index[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+    def intern(self, value: Optional[str]) -> Optional[str]:
+        """Return the table's copy of a string, so equal strings are held once."""
+        code = self.code(value)
+        return None if code < 0 else self.values[code]
+
+    def value(self, code: int) -> Optional[str]:
+        return None if code < 0 else self.values[code]
+
+
+class _ShapeColumns:
+    """Typed columns shared by text shapes and graphic elements."""
+
+    def __init__(self):
+        self.slide_index = array('i')
+        self.flags = array('b')
+        self.left = array('d')
+        self.top = array('d')
+        self.width = array('d')
+        self.height = array('d')
+
+    def __len__(self) -> int:
+        return len(self.slide_index)
+
+    def append_shape(self, slide_index: int, positioning: Any, flags: int = 0) -> None:
+        if positioning:
+            flags |= _HAS_POSITIONING
+        self.slide_index.append(slide_index)
+        self.flags.append(flags)
+        for column, name in ((self.left, 'left'), (self.top, 'top'), (self.width, 'width'), (self.height, 'height')):
+            column.append(_float_or_nan(_field(positioning, name)) if positioning else NAN)
+
+    def positioning(self, row: int) -> Optional[Positioning]:
+        if not self.flags[row] & _HAS_POSITIONING:
+            return None
+        return Positioning(_nan_to_none(self.left[row]), _nan_to_none(self.top[row]),
+                           _nan_to_none(self.width[row]), _nan_to_none(self.height[row]))
+
+
+class DeckColumns:
+    """Array-backed store for the slides of one deck.
+
+    Text shapes and graphic elements are kept as typed columns with
+    interned strings rather than one object per shape, which makes holding
+    many decks in memory far cheaper. Per-slide fields stay as Python
+    values. ``slide_dicts`` rebuilds the exact slide dicts of the JSON
+    export.
+    """
+
+    def __init__(self):
+        self.strings = _StringTable()
+        self.slides = []
+
+        self.text = _ShapeColumns()
+        self.text_values = array('i')
+        self.font_name = array('i')
+        self.font_size = array('d')
+        self.font_bold = array('b')
+        self.font_italic = array('b')
+        self.font_color = array('i')
+
+        self.graphics = _ShapeColumns()
+        self.graphic_shape_type = array('i')
+        self.graphic_auto_shape_type = array('i')
+        self.graphic_fill_color = array('i')
+        self.graphic_text = []
+
+    @classmethod
+    def from_slides(cls, slides: Iterable[Any]) -> 'DeckColumns':
+        """Build from SlideInfo objects or their dict form."""
+        columns = cls()
+        for slide in slides:
+            columns.append(slide)
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.slides)
+
+    def append(self, slide: Any) -> None:
+        """Add one slide (a SlideInfo or its dict form)."""
+        slide_index = len(self.slides)
+        intern = self.strings.code
+
+        for shape in _field(slide, 'text_shapes'):
+            font = _field(shape, 'font_info')
+            self.text.append_shape(slide_index, _field(shape, 'positioning'), _HAS_FONT if font else 0)
+            self.text_values.append(intern(_field(shape, 'text')))
+            self.font_name.append(intern(_field(font, 'name')) if font else -1)
+            self.font_size.append(_float_or_nan(_field(font, 'size')) if font else NAN)
+            self.font_bold.append(_BOOL_CODES[_field(font, 'bold')] if font else -1)
+            self.font_italic.append(_BOOL_CODES[_field(font, 'italic')] if font else -1)
+            self.font_color.append(intern(_field(font, 'color')) if font else -1)
+
+        for element in _field(slide, 'graphic_elements'):
+            self.graphics.append_shape(slide_index, _field(element, 'positioning'))
+            self.graphic_shape_type.append(intern(_field(element, 'shape_type')))
+            self.graphic_auto_shape_type.append(intern(_field(element, 'auto_shape_type')))
+            self.graphic_fill_color.append(intern(_field(element, 'fill_color')))
+            self.graphic_text.append(_field(element, 'text'))
+
+        # The remaining fields are per slide rather than per shape; their
+        # text repeats the shape text, so it shares the interned strings
+        shared = self.strings.intern
+        self.slides.append({
+            'slide_number': _field(slide, 'slide_number'),
+            'title': shared(_field(slide, 'title')),
+            'text_content': tuple(shared(text) for text in _field(slide, 'text_content')),
+            'shape_count': _field(slide, 'shape_count'),
+            'image_count': _field(slide, 'image_count'),
+            'image_files': tuple(_field(slide, 'image_files')),
+            'logos_and_brands': [self._logo_record(logo) for logo in _field(slide, 'logos_and_brands')],
+            'tags': tuple(_field(slide, 'tags')),
+            'notes': _field(slide, 'notes'),
+            'fingerprint': _field(slide, 'fingerprint'),
+            'image_details': _field(slide, 'image_details'),
+            'preview': _field(slide, 'preview')
+        })
+
+    def _logo_record(self, logo: Any) -> Any:
+        """Convert a logo in dict form to its record."""
+        if not isinstance(logo, dict):
+            return logo
+
+        positioning = logo.get('positioning')
+        positioning = Positioning(**positioning) if positioning else None
+        if logo.get('type') == 'text_logo':
+            font = logo.get('font_info')
+            return TextLogo(self.strings.intern(logo['content']), FontInfo(**font) if font else None,
+                            positioning, logo['slide_number'])
+        return ImageLogo(self.strings.intern(logo['file']), positioning, logo['slide_number'], logo.get('brand_match'))
+
+    def text_shape(self, row: int) -> TextShape:
+        font = None
+        if self.text.flags[row] & _HAS_FONT:
+            font = FontInfo(self.strings.value(self.font_name[row]), _nan_to_none(self.font_size[row]),
+                            _BOOL_VALUES[self.font_bold[row]], _BOOL_VALUES[self.font_italic[row]],
+                            self.strings.value(self.font_color[row]))
+        return TextShape(self.strings.value(self.text_values[row]), font, self.text.positioning(row),
+                         self.slides[self.text.slide_index[row]]['slide_number'])
+
+    def graphic_element(self, row: int) -> GraphicElement:
+        return GraphicElement(
+            self.strings.value(self.graphic_shape_type[row]),
+            self.graphics.positioning(row),
+            self.slides[self.graphics.slide_index[row]]['slide_number'],
+            self.strings.value(self.graphic_auto_shape_type[row]),
+            self.strings.value(self.graphic_fill_color[row]),
+            self.graphic_text[row]
+        )
+
+    def slide_dicts(self) -> Iterable[Dict[str, Any]]:
+        """Yield each slide as the dict the JSON export writes for it."""
+        text_row = graphic_row = 0
+        for slide_index, slide in enumerate(self.slides):
+            text_shapes = []
+            while text_row < len(self.text) and self.text.slide_index[text_row] == slide_index:
+                text_shapes.append(self.text_shape(text_row).to_dict())
+                text_row += 1
+
+            graphic_elements = []
+            while graphic_row < len(self.graphics) and self.graphics.slide_index[graphic_row] == slide_index:
+                graphic_elements.append(self.graphic_element(graphic_row).to_dict())
+                graphic_row += 1
+
+            yield {
+                'slide_number': slide['slide_number'],
+                'title': slide['title'],
+                'text_content': list(slide['text_content']),
+                'shape_count': slide['shape_count'],
+                'image_count': slide['image_count'],
+                'image_files': list(slide['image_files']),
+                'text_shapes': text_shapes,
+                'graphic_elements': graphic_elements,
+                'logos_and_brands': to_json_value(slide['logos_and_brands']),
+                'tags': list(slide['tags']),
+                'notes': slide['notes'],
+                'fingerprint': slide['fingerprint'],
+                'image_details': slide['image_details'],
+                'preview': slide['preview']
+            }
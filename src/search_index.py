@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""On-disk full-text index over analysed slides and asset-library text assets,
+backed by SQLite FTS5."""
+
+import re
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id TEXT PRIMARY KEY,
+    filename TEXT,
+    slide_count INTEGER,
+    indexed_at TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS slides_fts USING fts5(
+    doc_id UNINDEXED,
+    slide_number UNINDEXED,
+    title,
+    text_content,
+    notes,
+    tags
+);
+CREATE TABLE IF NOT EXISTS document_slides (
+    doc_id TEXT NOT NULL,
+    fts_rowid INTEGER NOT NULL,
+    PRIMARY KEY (doc_id, fts_rowid)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS library_assets (
+    asset_id TEXT PRIMARY KEY,
+    version TEXT,
+    fts_rowid INTEGER
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS assets_fts USING fts5(
+    asset_id UNINDEXED,
+    name,
+    content,
+    tags,
+    category UNINDEXED,
+    source_file UNINDEXED,
+    slide_number UNINDEXED
+);
+"""
+
+
+def to_fts_query(query: str) -> str:
+    """Turn free text into a safe FTS5 query: every word must match, as a prefix."""
+    terms = re.findall(r"\w+", query, flags=re.UNICODE)
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+class SearchIndex:
+    """Incrementally maintained full-text index.
+
+    Each analysed deck is (re)indexed as a unit keyed by ``doc_id``; library
+    assets are synchronised by id so only added, changed or removed assets
+    touch the index. The database uses WAL mode so several analysis workers
+    can write while the server queries.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+        # Indexes written before document_slides existed: record their slide rowids once
+        if (self.conn.execute("SELECT 1 FROM slides_fts LIMIT 1").fetchone()
+                and not self.conn.execute("SELECT 1 FROM document_slides LIMIT 1").fetchone()):
+            with self.conn:
+                self.conn.execute("INSERT INTO document_slides (doc_id, fts_rowid) SELECT doc_id, rowid FROM slides_fts")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def index_document(self, doc_id: str, filename: str, slides: List[Dict[str, Any]]) -> None:
+        """Replace the indexed slides of one deck with ``slides`` (SlideInfo dicts)."""
+        with self.conn:
+            self._delete_slides(doc_id)
+            for slide in slides:
+                cursor = self.conn.execute(
+                    "INSERT INTO slides_fts (doc_id, slide_number, title, text_content, notes, tags) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        doc_id,
+                        slide["slide_number"],
+                        slide.get("title") or "",
+                        "\n".join(slide.get("text_content") or []),
+                        slide.get("notes") or "",
+                        " ".join(slide.get("tags") or [])
+                    )
+                )
+                self.conn.execute("INSERT INTO document_slides (doc_id, fts_rowid) VALUES (?, ?)",
+                                  (doc_id, cursor.lastrowid))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO documents (doc_id, filename, slide_count, indexed_at) VALUES (?, ?, ?, ?)",
+                (doc_id, filename, len(slides), datetime.now().isoformat())
+            )
+
+    def remove_document(self, doc_id: str) -> None:
+        """Drop a deck from the index."""
+        with self.conn:
+            self._delete_slides(doc_id)
+            self.conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+
+    def _delete_slides(self, doc_id: str) -> None:
+        # doc_id is UNINDEXED in slides_fts, so delete by the rowids recorded for the deck
+        rowids = self.conn.execute("SELECT fts_rowid FROM document_slides WHERE doc_id = ?", (doc_id,)).fetchall()
+        self.conn.executemany("DELETE FROM slides_fts WHERE rowid = ?", rowids)
+        self.conn.execute("DELETE FROM document_slides WHERE doc_id = ?", (doc_id,))
+
+    def sync_library(self, assets: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Bring the indexed library text assets in line with ``assets``.
+
+        Only text assets are indexed. Returns counts of added, updated and
+        removed assets.
+        """
+        text_assets = {
+            asset["id"]: asset for asset in assets
+            if asset.get("id") and asset.get("type") != "image"
+        }
+        indexed = {
+            asset_id: (version, fts_rowid)
+            for asset_id, version, fts_rowid in self.conn.execute(
+                "SELECT asset_id, version, fts_rowid FROM library_assets")
+        }
+
+        counts = {"added": 0, "updated": 0, "removed": 0}
+        with self.conn:
+            for asset_id, (_, fts_rowid) in indexed.items():
+                if asset_id not in text_assets:
+                    self._delete_asset(asset_id, fts_rowid)
+                    counts["removed"] += 1
+
+            for asset_id, asset in text_assets.items():
+                version = asset.get("lastModified") or asset.get("dateAdded") or ""
+                if asset_id in indexed:
+                    if indexed[asset_id][0] == version:
+                        continue
+                    self._delete_asset(asset_id, indexed[asset_id][1])
+                    counts["updated"] += 1
+                else:
+                    counts["added"] += 1
+                self._insert_asset(asset, version)
+
+        return counts
+
+    def index_assets(self, assets: List[Dict[str, Any]]) -> None:
+        """Add or replace the given library assets, leaving the rest of the library untouched.
+
+        Image assets are not indexed (and dropped if they were).
+        """
+        with self.conn:
+            for asset in assets:
+                self._remove_asset(asset["id"])
+                if asset.get("type") != "image":
+                    self._insert_asset(asset, asset.get("lastModified") or asset.get("dateAdded") or "")
+
+    def remove_assets(self, asset_ids: List[str]) -> None:
+        """Drop library assets from the index by id."""
+        with self.conn:
+            for asset_id in asset_ids:
+                self._remove_asset(asset_id)
+
+    def sync_library_file(self, library_file: str) -> Dict[str, int]:
+        """Synchronise the library index from an asset-library.json file."""
+        try:
+            with open(library_file, 'r', encoding='utf-8') as f:
+                assets = json.load(f)
+        except FileNotFoundError:
+            assets = []
+        return self.sync_library(assets)
+
+    def _insert_asset(self, asset: Dict[str, Any], version: str) -> None:
+        cursor = self.conn.execute(
+            "INSERT INTO assets_fts (asset_id, name, content, tags, category, source_file, slide_number) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                asset["id"],
+                asset.get("name") or "",
+                asset.get("content") or "",
+                " ".join(asset.get("tags") or []),
+                asset.get("category"),
+                asset.get("sourceFile"),
+                asset.get("slideNumber")
+            )
+        )
+        self.conn.execute(
+            "INSERT INTO library_assets (asset_id, version, fts_rowid) VALUES (?, ?, ?)",
+            (asset["id"], version, cursor.lastrowid)
+        )
+
+    def _delete_asset(self, asset_id: str, fts_rowid: int) -> None:
+        self.conn.execute("DELETE FROM assets_fts WHERE rowid = ?", (fts_rowid,))
+        self.conn.execute("DELETE FROM library_assets WHERE asset_id = ?", (asset_id,))
+
+    def _remove_asset(self, asset_id: str) -> None:
+        row = self.conn.execute("SELECT fts_rowid FROM library_assets WHERE asset_id = ?", (asset_id,)).fetchone()
+        if row:
+            self._delete_asset(asset_id, row[0])
+
+    def search(self, query: str, limit: int = 20, scope: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Search slides and/or library assets, best matches first.
+
+        ``scope`` may be 'slides' or 'assets' to restrict the search.
+        """
+        fts_query = to_fts_query(query)
+        results = {"slides": [], "assets": []}
+        if not fts_query:
+            return results
+
+        if scope in (None, "slides"):
+            rows = self.conn.execute(
+                "SELECT s.doc_id, d.filename, s.slide_number, s.title, "
+                "snippet(slides_fts, -1, '[', ']', '…', 12), bm25(slides_fts) "
+                "FROM slides_fts s LEFT JOIN documents d ON d.doc_id = s.doc_id "
+                "WHERE slides_fts MATCH ? ORDER BY bm25(slides_fts) LIMIT ?",
+                (fts_query, limit)
+            )
+            results["slides"] = [
+                {
+                    "doc_id": doc_id,
+                    "filename": filename,
+                    "slide_number": int(slide_number),
+                    "title": title,
+                    "snippet": snippet,
+                    "score": -rank
+                }
+                for doc_id, filename, slide_number, title, snippet, rank in rows
+            ]
+
+        if scope in (None, "assets"):
+            rows = self.conn.execute(
+                "SELECT asset_id, name, category, source_file, slide_number, "
+                "snippet(assets_fts, -1, '[', ']', '…', 12), bm25(assets_fts) "
+                "FROM assets_fts WHERE assets_fts MATCH ? ORDER BY bm25(assets_fts) LIMIT ?",
+                (fts_query, limit)
+            )
+            results["assets"] = [
+                {
+                    "asset_id": asset_id,
+                    "name": name,
+                    "category": category,
+                    "source_file": source_file,
+                    "slide_number": slide_number,
+                    "snippet": snippet,
+                    "score": -rank
+                }
+                for asset_id, name, category, source_file, slide_number, snippet, rank in rows
+            ]
+
+        return results
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""Compact slide fingerprints and an LSH index for finding near-duplicate
+slides across many decks."""
+
+import re
+import random
+import sqlite3
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+
+# Text: MinHash keeping the low byte of each of 32 minimums (32 bytes per
+# slide), banded 4 rows at a time for LSH
+MINHASH_PERMUTATIONS = 32
+MINHASH_ROWS = 4
+MIN_TEXT_SIMILARITY = 0.6
+
+# Layout: 64-bit SimHash, banded into 4 x 16 bits, so layouts within 3 bits
+# of each other always share a band
+HASH_BITS = 64
+LAYOUT_BANDS = 4
+LAYOUT_BAND_BITS = HASH_BITS // LAYOUT_BANDS
+MAX_LAYOUT_DISTANCE = LAYOUT_BANDS - 1
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(0x51DE)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(_MERSENNE_PRIME))
+                 for _ in range(MINHASH_PERMUTATIONS)]
+
+# Layout positions are compared on a half-inch grid
+LAYOUT_GRID = 2
+
+# Minimum Jaccard overlap of the image sets of two near-duplicate slides
+MIN_IMAGE_OVERLAP = 0.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS slides (
+    slide_key TEXT PRIMARY KEY,
+    doc_id TEXT,
+    filename TEXT,
+    slide_number INTEGER,
+    text_signature TEXT,
+    layout_hash TEXT,
+    images TEXT
+);
+CREATE INDEX IF NOT EXISTS slides_doc ON slides (doc_id);
+CREATE TABLE IF NOT EXISTS slide_bands (
+    band INTEGER,
+    bucket INTEGER,
+    slide_key TEXT
+);
+CREATE INDEX IF NOT EXISTS slide_bands_bucket ON slide_bands (band, bucket);
+CREATE INDEX IF NOT EXISTS slide_bands_key ON slide_bands (slide_key);
+"""
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def simhash(features: Iterable[str]) -> int:
+    """Return the 64-bit SimHash of a bag of features (0 for no features)."""
+    weights = [0] * HASH_BITS
+    for feature in features:
+        value = _feature_hash(feature)
+        for bit in range(HASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def minhash(features: Iterable[str]) -> bytes:
+    """Return the b-bit MinHash signature of a set of features (empty for no features)."""
+    hashes = {_feature_hash(feature) for feature in features}
+    if not hashes:
+        return b''
+    return bytes(
+        min((a * value + b) % _MERSENNE_PRIME for value in hashes) & 0xFF
+        for a, b in _PERMUTATIONS
+    )
+
+
+def minhash_similarity(a: bytes, b: bytes) -> float:
+    """Estimate the Jaccard similarity of two feature sets from their signatures."""
+    agreement = sum(x == y for x, y in zip(a, b)) / len(a)
+    # Unrelated minimums still agree on their low byte 1 time in 256
+    return max(0.0, (agreement - 1 / 256) / (1 - 1 / 256))
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count('1')
+
+
+def text_features(texts: List[str], size: int = 2) -> List[str]:
+    """Word shingles of the slide text, normalised for case and punctuation."""
+    words = re.findall(r"\w+", ' '.join(texts).lower())
+    if len(words) < size:
+        return [' '.join(words)] if words else []
+    return [' '.join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+def layout_features(boxes: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+    """One feature per top-level shape: its kind and its box snapped to the layout grid."""
+    features = []
+    for kind, positioning in boxes:
+        cells = [
+            str(round(positioning[key] * LAYOUT_GRID)) if positioning.get(key) is not None else '-'
+            for key in ('left', 'top', 'width', 'height')
+        ]
+        features.append(f"{kind}:{':'.join(cells)}")
+    return features
+
+
+def image_key(image_file: str) -> str:
+    """Content key of an extracted image: the leading SHA-1 digits in its filename."""
+    return Path(image_file).stem.rsplit('_', 1)[-1][:8]
+
+
+def slide_fingerprint(texts: List[str], image_files: List[str],
+                      boxes: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """Build a slide's fingerprint: text MinHash and layout SimHash (hex) and its image keys."""
+    return {
+        'text': minhash(text_features(texts)).hex(),
+        'layout': f"{simhash(layout_features(boxes)):016x}",
+        'images': sorted({image_key(image_file) for image_file in image_files})
+    }
+
+
+def _bands(fingerprint: Dict[str, Any]) -> List[Tuple[int, int]]:
+    """LSH bands of a fingerprint as (band, bucket) pairs.
+
+    Slides with text are banded on their MinHash signature; slides without
+    text are banded on their layout instead (numbered after the text bands)
+    so that image-only slides do not all share one empty-text bucket.
+    """
+    if fingerprint['text']:
+        signature = bytes.fromhex(fingerprint['text'])
+        return [
+            (band, int.from_bytes(signature[start:start + MINHASH_ROWS], 'big'))
+            for band, start in enumerate(range(0, len(signature), MINHASH_ROWS))
+        ]
+
+    offset = MINHASH_PERMUTATIONS // MINHASH_ROWS
+    layout_hash = int(fingerprint['layout'], 16)
+    mask = (1 << LAYOUT_BAND_BITS) - 1
+    return [(offset + band, layout_hash >> (band * LAYOUT_BAND_BITS) & mask) for band in range(LAYOUT_BANDS)]
+
+
+class SlideIndex:
+    """On-disk LSH index of slide fingerprints.
+
+    Decks are (re)indexed as a unit keyed by ``doc_id``. Lookups only
+    compare a slide against the candidates sharing one of its LSH buckets,
+    so their cost does not grow with the size of the corpus.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def index_document(self, doc_id: str, filename: str, slides: List[Dict[str, Any]]) -> None:
+        """Replace the indexed slides of one deck with ``slides`` (SlideInfo dicts).
+
+        Slides without a fingerprint, or with neither text nor images, are
+        not indexed.
+        """
+        with self.conn:
+            self._delete_document(doc_id)
+            for slide in slides:
+                fingerprint = slide.get('fingerprint')
+                if not fingerprint or not (fingerprint['text'] or fingerprint['images']):
+                    continue
+
+                slide_key = f"{doc_id}#{slide['slide_number']}"
+                self.conn.execute(
+                    "INSERT INTO slides (slide_key, doc_id, filename, slide_number, text_signature, layout_hash, images) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (slide_key, doc_id, filename, slide['slide_number'],
+                     fingerprint['text'], fingerprint['layout'], ' '.join(fingerprint['images']))
+                )
+                self.conn.executemany(
+                    "INSERT INTO slide_bands (band, bucket, slide_key) VALUES (?, ?, ?)",
+                    [(band, bucket, slide_key) for band, bucket in _bands(fingerprint)]
+                )
+
+    def remove_document(self, doc_id: str) -> None:
+        """Drop a deck from the index."""
+        with self.conn:
+            self._delete_document(doc_id)
+
+    def _delete_document(self, doc_id: str) -> None:
+        self.conn.execute(
+            "DELETE FROM slide_bands WHERE slide_key IN (SELECT slide_key FROM slides WHERE doc_id = ?)",
+            (doc_id,))
+        self.conn.execute("DELETE FROM slides WHERE doc_id = ?", (doc_id,))
+
+    def find_similar(self, fingerprint: Dict[str, Any], exclude_doc: Optional[str] = None,
+                     limit: int = 10) -> List[Dict[str, Any]]:
+        """Return indexed slides that are near-duplicates of ``fingerprint``, closest first.
+
+        A candidate matches when it shares most of its images and either
+        its text is similar or, for slides without text, its layout is
+        within a few bits.
+        """
+        bands = _bands(fingerprint)
+        rows = self.conn.execute(
+            "SELECT DISTINCT s.slide_key, s.doc_id, s.filename, s.slide_number, s.text_signature, s.layout_hash, s.images "
+            "FROM slide_bands b JOIN slides s ON s.slide_key = b.slide_key "
+            "WHERE " + " OR ".join(["(b.band = ? AND b.bucket = ?)"] * len(bands)),
+            [value for band in bands for value in band]
+        )
+
+        signature = bytes.fromhex(fingerprint['text'])
+        layout_hash = int(fingerprint['layout'], 16)
+        images = set(fingerprint['images'])
+
+        matches = []
+        for slide_key, doc_id, filename, slide_number, candidate_text, candidate_layout, candidate_images in rows:
+            if exclude_doc is not None and doc_id == exclude_doc:
+                continue
+            candidate_images = set(candidate_images.split())
+            if images or candidate_images:
+                if len(images & candidate_images) < MIN_IMAGE_OVERLAP * len(images | candidate_images):
+                    continue
+
+            layout_distance = hamming(layout_hash, int(candidate_layout, 16))
+            if signature:
+                if not candidate_text:
+                    continue
+                text_similarity = minhash_similarity(signature, bytes.fromhex(candidate_text))
+                if text_similarity < MIN_TEXT_SIMILARITY:
+                    continue
+            else:
+                if candidate_text or layout_distance > MAX_LAYOUT_DISTANCE:
+                    continue
+                text_similarity = None
+
+            matches.append({
+                'doc_id': doc_id,
+                'filename': filename,
+                'slide_number': slide_number,
+                'text_similarity': round(text_similarity, 3) if text_similarity is not None else None,
+                'layout_distance': layout_distance
+            })
+
+        matches.sort(key=lambda match: (-(match['text_similarity'] or 0), match['layout_distance'],
+                                        match['doc_id'], match['slide_number']))
+        return matches[:limit]
+
+    def find_document_duplicates(self, doc_id: str, slides: List[Dict[str, Any]],
+                                 limit: int = 10) -> Dict[int, List[Dict[str, Any]]]:
+        """Map each slide number of a deck to its near-duplicates in other decks."""
+        duplicates = {}
+        for slide in slides:
+            fingerprint = slide.get('fingerprint')
+            if not fingerprint:
+                continue
+            matches = self.find_similar(fingerprint, exclude_doc=doc_id, limit=limit)
+            if matches:
+                duplicates[slide['slide_number']] = matches
+        return duplicates
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""Raster previews of whole slides: LibreOffice renders the deck to PDF and
+pdftoppm rasterizes the pages that have no preview yet."""
+
+import os
+import re
+import shutil
+import hashlib
+import subprocess
+import tempfile
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+import click
+
+try:
+    from pptx_package import (slide_part_hashes, slide_size, slide_part_names, first_slide_number,
+                              read_relationships, find_relationship, PML_NS)
+    from office_convert import OfficeConverter, ConversionError, detect_format, CONVERTIBLE_FORMATS
+    from metrics import Metrics
+except ImportError:
+    # Imported as src.slide_render from the asset manager
+    from src.pptx_package import (slide_part_hashes, slide_size, slide_part_names, first_slide_number,
+                                  read_relationships, find_relationship, PML_NS)
+    from src.office_convert import OfficeConverter, ConversionError, detect_format, CONVERTIBLE_FORMATS
+    from src.metrics import Metrics
+
+
+PREVIEW_WIDTH = 640
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+# Seconds allowed per rasterized page
+RASTERIZE_TIMEOUT = 30
+
+# Slide -> layout -> master -> theme: every part that changes how a slide looks
+PREVIEW_HASH_DEPTH = 3
+
+# DrawingML namespace of text fields (<a:fld type="slidenum">), which LibreOffice fills in at render time
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+
+PDF_PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?![A-Za-z])")
+PAGE_FILE_PATTERN = re.compile(r"-(\d+)\.png$")
+
+
+class RenderError(RuntimeError):
+    """pdftoppm is unavailable, or the rendered PDF does not match the deck."""
+
+
+def find_pdftoppm() -> Optional[str]:
+    """Locate pdftoppm (poppler): $PPT_PDFTOPPM, else on the PATH."""
+    return os.environ.get('PPT_PDFTOPPM') or shutil.which('pdftoppm')
+
+
+def _part_fields(zf: zipfile.ZipFile, part_name: str) -> Tuple[Set[str], Dict[str, Set[str]]]:
+    """Return the field types of a part's ordinary shapes, and those of its placeholders by placeholder type."""
+    try:
+        root = ET.fromstring(zf.read(part_name))
+    except KeyError:
+        return set(), {}
+    shapes, placeholders = set(), {}
+    for shape in root.iter(f"{{{PML_NS}}}sp"):
+        types = {field.get("type") for field in shape.iter(f"{{{A_NS}}}fld") if field.get("type")}
+        placeholder = shape.find(f"{{{PML_NS}}}nvSpPr/{{{PML_NS}}}nvPr/{{{PML_NS}}}ph")
+        if placeholder is None:
+            shapes |= types
+        else:
+            placeholders.setdefault(placeholder.get("type", "obj"), set()).update(types)
+    return shapes, placeholders
+
+
+def slide_field_types(zf: zipfile.ZipFile) -> List[Set[str]]:
+    """Return, per slide, the types of the fields it shows.
+
+    Besides the slide's own fields, these are the fields of its layout and
+    master: in ordinary shapes, and in placeholders (such as the slide
+    number) only where the slide has a placeholder of the same type.
+    """
+    found = {}
+
+    def part_fields(part_name: str) -> Tuple[Set[str], Dict[str, Set[str]]]:
+        if part_name not in found:
+            found[part_name] = _part_fields(zf, part_name)
+        return found[part_name]
+
+    fields = []
+    for part_name in slide_part_names(zf):
+        shapes, placeholders = part_fields(part_name)
+        types = shapes.union(*placeholders.values())
+        # The slide's layout, then the layout's master
+        for rel_type in ("/slideLayout", "/slideMaster"):
+            rel = find_relationship(read_relationships(zf, part_name), rel_type)
+            if not rel:
+                break
+            part_name = rel["target"]
+            inherited, inherited_placeholders = part_fields(part_name)
+            types |= inherited.union(*(inherited_placeholders.get(kind, ()) for kind in placeholders))
+        fields.append(types)
+    return fields
+
+
+def preview_keys(zf: zipfile.ZipFile, width: int = PREVIEW_WIDTH) -> List[str]:
+    """Name each slide's preview after everything that determines it: the
+    slide's parts down to the theme, the slide size and the render width.
+
+    Slides showing a slide number or date field render differently by
+    position or day, so their keys also carry the number or today's date.
+    """
+    cx, cy = slide_size(zf)
+    first_number = first_slide_number(zf)
+    keys = []
+    for index, (part_hash, fields) in enumerate(zip(slide_part_hashes(zf, PREVIEW_HASH_DEPTH),
+                                                    slide_field_types(zf))):
+        key = f"{part_hash}:{cx}x{cy}:{width}"
+        if "slidenum" in fields:
+            key += f":slide={first_number + index}"
+        if any(field.startswith("datetime") for field in fields):
+            key += f":date={date.today().isoformat()}"
+        keys.append(hashlib.sha256(key.encode()).hexdigest())
+    return keys
+
+
+def page_runs(pages: List[int], parts: int) -> List[List[int]]:
+    """Split sorted page numbers into consecutive runs, cutting long runs so
+    the work spreads over roughly ``parts`` rasterizer processes."""
+    longest = max(1, -(-len(pages) // parts))
+    runs = []
+    for page in pages:
+        if runs and page == runs[-1][-1] + 1 and len(runs[-1]) < longest:
+            runs[-1].append(page)
+        else:
+            runs.append([page])
+    return runs
+
+
+def pdf_page_count(pdf_path: str) -> int:
+    """Count the page objects of a PDF written by LibreOffice (which does not use object streams)."""
+    with open(pdf_path, 'rb') as f:
+        return len(PDF_PAGE_PATTERN.findall(f.read()))
+
+
+class SlideRenderer:
+    """Renders slide previews into a content-addressed directory.
+
+    ``plan`` names every slide's preview from its content without rendering
+    anything, so an analysis can link slides to previews that are produced
+    later. ``render`` then converts the deck to PDF once (through the
+    converter's bounded, cached LibreOffice pool) and rasterizes only the
+    slides whose previews are missing, as runs of consecutive pages spread
+    over ``workers`` pdftoppm processes. Identical slides in any deck share
+    one preview.
+    """
+
+    def __init__(self, preview_dir: str, converter: OfficeConverter, width: int = PREVIEW_WIDTH,
+                 workers: int = DEFAULT_WORKERS, timeout: float = RASTERIZE_TIMEOUT,
+                 pdftoppm: Optional[str] = None):
+        self.preview_dir = Path(preview_dir)
+        self.converter = converter
+        self.width = width
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.pdftoppm = pdftoppm or find_pdftoppm()
+
+    def plan(self, deck_path: str) -> List[Dict[str, Any]]:
+        """Return each slide's preview as ``file`` (relative to the preview dir), ``width`` and ``height``."""
+        with zipfile.ZipFile(deck_path) as zf:
+            cx, cy = slide_size(zf)
+            keys = preview_keys(zf, self.width)
+        height = max(1, round(self.width * cy / cx))
+        return [{'file': f"{key}.png", 'width': self.width, 'height': height} for key in keys]
+
+    def missing(self, previews: List[Dict[str, Any]]) -> List[int]:
+        """Slide numbers whose previews have not been rendered."""
+        return [number for number, preview in enumerate(previews, 1)
+                if not (self.preview_dir / preview['file']).exists()]
+
+    def render(self, deck_path: str, previews: Optional[List[Dict[str, Any]]] = None,
+               metrics: Optional[Metrics] = None) -> Dict[str, Any]:
+        """Render the missing previews of a .pptx deck.
+
+        Returns the ``previews`` plan and ``rendered``/``reused`` counts,
+        with ``errors`` for pages that failed. Raises ConversionError or
+        RenderError when the deck cannot be rendered at all.
+        """
+        metrics = metrics or Metrics()
+        with metrics.span('plan_previews'):
+            previews = previews or self.plan(deck_path)
+            missing = self.missing(previews)
+        result = {'previews': previews, 'rendered': 0, 'reused': len(previews) - len(missing), 'errors': []}
+        metrics.count('previews_reused', result['reused'])
+        if not missing:
+            return result
+
+        if not self.pdftoppm:
+            raise RenderError("pdftoppm was not found; install poppler or set PPT_PDFTOPPM to render previews")
+
+        with metrics.span('render_pdf'):
+            conversion = self.converter.convert(deck_path, 'pdf')
+        if conversion['cached']:
+            metrics.count('pdf_cache_hits')
+        pages = pdf_page_count(conversion['path'])
+        if pages != len(previews):
+            raise RenderError(f"Rendered PDF has {pages} pages for {len(previews)} slides")
+
+        self.preview_dir.mkdir(parents=True, exist_ok=True)
+        with metrics.span('rasterize'), ThreadPoolExecutor(max_workers=self.workers,
+                                                           thread_name_prefix='rasterize') as executor:
+            futures = [(run, executor.submit(self._rasterize, conversion['path'], run, previews))
+                       for run in page_runs(missing, self.workers)]
+            for run, future in futures:
+                try:
+                    rendered = future.result()
+                except Exception as e:
+                    result['errors'].append(f"Slides {run[0]}-{run[-1]}: {e}")
+                    continue
+                result['rendered'] += len(rendered)
+                result['errors'].extend(f"Slide {page}: pdftoppm wrote no image" for page in run
+                                        if page not in rendered)
+        metrics.count('previews_rendered', result['rendered'])
+        return result
+
+    def _rasterize(self, pdf_path: str, run: List[int], previews: List[Dict[str, Any]]) -> List[int]:
+        """Rasterize a run of consecutive PDF pages into their preview files; returns the pages written."""
+        size = previews[run[0] - 1]
+        work_dir = tempfile.mkdtemp(prefix=".render_", dir=self.preview_dir)
+        try:
+            command = [
+                self.pdftoppm, "-png",
+                "-f", str(run[0]), "-l", str(run[-1]),
+                "-scale-to-x", str(size['width']), "-scale-to-y", str(size['height']),
+                pdf_path, os.path.join(work_dir, "page")
+            ]
+            timeout = self.timeout * len(run)
+            try:
+                completed = subprocess.run(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                           stderr=subprocess.STDOUT, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                raise RenderError(f"pdftoppm timed out after {timeout}s")
+
+            # Output names are zero-padded to the document's page count, e.g. page-007.png
+            rendered = []
+            for name in os.listdir(work_dir):
+                match = PAGE_FILE_PATTERN.search(name)
+                page = int(match.group(1)) if match else None
+                if page in run:
+                    output = os.path.join(work_dir, name)
+                    os.chmod(output, 0o644)
+                    os.replace(output, self.preview_dir / previews[page - 1]['file'])
+                    rendered.append(page)
+            if not rendered:
+                detail = completed.stdout.decode('utf-8', 'replace').strip().splitlines()
+                raise RenderError(f"pdftoppm failed{': ' + detail[-1] if detail else ''}")
+            return rendered
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+@click.command()
+@click.argument('filepath', type=click.Path(exists=True, dir_okay=False))
+@click.option('--output-dir', '-o', default='slide-previews', help='Directory for slide previews')
+@click.option('--width', default=PREVIEW_WIDTH, type=click.IntRange(min=16), help='Preview width in pixels')
+@click.option('--workers', '-w', default=DEFAULT_WORKERS, type=click.IntRange(min=1),
+              help='Number of pages to rasterize at once')
+@click.option('--timeout', default=120, type=click.FloatRange(min=1),
+              help='Seconds before a LibreOffice conversion is abandoned')
+def main(filepath, output_dir, width, workers, timeout):
+    """Render a preview of every slide in a PowerPoint file."""
+    converter = OfficeConverter(str(Path(output_dir) / ".converted"), workers=1, timeout=timeout)
+    try:
+        deck_path = filepath
+        if detect_format(filepath) in CONVERTIBLE_FORMATS:
+            print(f"🔄 Converting {Path(filepath).name} to .pptx")
+            deck_path = converter.convert(filepath)['path']
+
+        renderer = SlideRenderer(output_dir, converter, width, workers)
+        start = time.perf_counter()
+        result = renderer.render(deck_path)
+    except (ConversionError, RenderError) as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    finally:
+        converter.close()
+
+    for number, preview in enumerate(result['previews'], 1):
+        print(f"  Slide {number}: {Path(output_dir) / preview['file']}")
+    for error in result['errors']:
+        print(f"⚠️  {error}")
+    print(f"🖼️  Rendered {result['rendered']} previews, reused {result['reused']} "
+          f"({time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
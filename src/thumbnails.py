@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Size-bounded preview derivatives of extracted images."""
+
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from PIL import Image, features
+
+
+THUMBNAIL_MAX_SIZE = 320
+THUMBNAIL_DIR = "thumbnails"
+
+_executor = None
+
+
+def thumbnail_format() -> str:
+    """WebP where Pillow was built with it, JPEG otherwise."""
+    return "webp" if features.check("webp") else "jpeg"
+
+
+def shared_executor() -> ThreadPoolExecutor:
+    """Thread pool that renders thumbnails, created on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=min(2, os.cpu_count() or 1),
+                                       thread_name_prefix='thumbnails')
+    return _executor
+
+
+def bounded_size(width: int, height: int, max_size: int) -> Tuple[int, int]:
+    """Scale dimensions down to fit in a ``max_size`` square, keeping the aspect ratio."""
+    scale = min(1.0, max_size / width, max_size / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def render_thumbnail(source: Path, destination: Path, size: Tuple[int, int], image_format: str) -> None:
+    """Decode ``source`` cheaply and write it at ``size`` to ``destination``.
+
+    ``draft`` lets the JPEG decoder skip most of the full-resolution work,
+    and ``reducing_gap`` shrinks other formats by whole factors before the
+    final resample.
+    """
+    with Image.open(source) as image:
+        image.draft('RGB', size)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or 'A' in image.mode else 'RGB')
+        if image_format == 'jpeg' and image.mode == 'RGBA':
+            # JPEG has no alpha; flatten onto white as on a slide
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        image = image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+
+        fd, temp_path = tempfile.mkstemp(prefix=f".{destination.name}.", dir=destination.parent)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                image.save(f, image_format.upper(), quality=80)
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, destination)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+
+class ThumbnailGenerator:
+    """Plans and renders thumbnails for the images in one directory.
+
+    ``describe`` only reads the image header, so it returns the original
+    and thumbnail dimensions at once while the thumbnail itself is rendered
+    on a background thread. Thumbnails are named after their (content
+    addressed) source image and are not rendered again if present.
+    Images that already fit the bound get no thumbnail.
+    """
+
+    def __init__(self, image_dir: str, max_size: int = THUMBNAIL_MAX_SIZE,
+                 image_format: Optional[str] = None, executor: Optional[ThreadPoolExecutor] = None):
+        self.image_dir = Path(image_dir)
+        self.thumbnail_dir = self.image_dir / THUMBNAIL_DIR
+        self.max_size = max_size
+        self.image_format = image_format or thumbnail_format()
+        self.executor = executor or shared_executor()
+        self.futures = []
+        self._described = {}
+
+    def describe(self, filename: str) -> Dict[str, Any]:
+        """Return ``width``, ``height`` and ``thumbnail`` (file relative to the image dir, width, height)."""
+        if filename in self._described:
+            return self._described[filename]
+
+        description = {'width': None, 'height': None, 'thumbnail': None}
+        try:
+            with Image.open(self.image_dir / filename) as image:
+                width, height = image.size
+        except Exception:
+            # Formats Pillow cannot read (e.g. EMF) are shown as-is
+            self._described[filename] = description
+            return description
+
+        description['width'] = width
+        description['height'] = height
+        if max(width, height) > self.max_size:
+            size = bounded_size(width, height, self.max_size)
+            thumbnail_name = f"{Path(filename).stem}.{'jpg' if self.image_format == 'jpeg' else self.image_format}"
+            description['thumbnail'] = {
+                'file': f"{THUMBNAIL_DIR}/{thumbnail_name}",
+                'width': size[0],
+                'height': size[1]
+            }
+
+            destination = self.thumbnail_dir / thumbnail_name
+            if not destination.exists():
+                self.thumbnail_dir.mkdir(parents=True, exist_ok=True)
+                self.futures.append(self.executor.submit(
+                    render_thumbnail, self.image_dir / filename, destination, size, self.image_format))
+
+        self._described[filename] = description
+        return description
+
+    def wait(self) -> List[str]:
+        """Block until scheduled thumbnails are written; return the errors of any that failed."""
+        errors = []
+        for future in self.futures:
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(str(e))
+        self.futures = []
+        return errors